@@ -1,8 +1,8 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from .models import (
 	Sanction, User, SchoolYear, Term, Sequence, Classroom, Teacher, Student,
 	Subject, ClassSubject, Grade, Discipline, MentionRule,
-	Settings, Bulletin, ArchivedGrade, ArchivedBulletin, StudentSubject
+	Settings, Bulletin, ArchivedGrade, ArchivedBulletin, ArchivedDiscipline, StudentSubject
 )
 
 @admin.register(Sanction)
@@ -16,10 +16,53 @@ class StudentSubjectAdmin(admin.ModelAdmin):
 	list_display = ('student', 'subject', 'is_optional')
 	search_fields = ('student__matricule', 'student__first_name', 'student__last_name', 'subject__name')
 
+
+
+def _run_bulletin_campaign(modeladmin, request, scope, periods):
+	# Rendu dans des threads : pas de processus fils depuis le serveur web
+	from .services import campaign
+	for school_year, period in periods:
+		reports = campaign.run_campaign(school_year, scope, period, executor='thread')
+		generated = sum(r['bulletins'] for r in reports)
+		blocked = [r['classroom'] for r in reports if r['status'] != 'ok']
+		modeladmin.message_user(request, f"{period} : {generated} bulletins générés.", messages.SUCCESS)
+		if blocked:
+			modeladmin.message_user(request, f"{period} : classes non générées : {', '.join(blocked)}", messages.WARNING)
+
+
+@admin.register(SchoolYear)
+class SchoolYearAdmin(admin.ModelAdmin):
+	list_display = ('name', 'start_date', 'end_date', 'is_active', 'is_closed')
+	actions = ['generate_annual_bulletins']
+
+	@admin.action(description="Générer les bulletins annuels (toutes les classes)")
+	def generate_annual_bulletins(self, request, queryset):
+		_run_bulletin_campaign(self, request, 'annual', [(sy, sy) for sy in queryset])
+
+
+@admin.register(Term)
+class TermAdmin(admin.ModelAdmin):
+	list_display = ('name', 'school_year', 'order')
+	list_select_related = ('school_year',)
+	actions = ['generate_trimester_bulletins']
+
+	@admin.action(description="Générer les bulletins trimestriels (toutes les classes)")
+	def generate_trimester_bulletins(self, request, queryset):
+		_run_bulletin_campaign(self, request, 'trimester', [(t.school_year, t) for t in queryset.select_related('school_year')])
+
+
+@admin.register(Sequence)
+class SequenceAdmin(admin.ModelAdmin):
+	list_display = ('name', 'term', 'order', 'active')
+	list_select_related = ('term__school_year',)
+	actions = ['generate_sequence_bulletins']
+
+	@admin.action(description="Générer les bulletins de séquence (toutes les classes)")
+	def generate_sequence_bulletins(self, request, queryset):
+		_run_bulletin_campaign(self, request, 'sequence', [(s.term.school_year, s) for s in queryset.select_related('term__school_year')])
+
+
 admin.site.register(User)
-admin.site.register(SchoolYear)
-admin.site.register(Term)
-admin.site.register(Sequence)
 admin.site.register(Classroom)
 admin.site.register(Teacher)
 admin.site.register(Student)
@@ -30,5 +73,33 @@ admin.site.register(Discipline)
 admin.site.register(MentionRule)
 admin.site.register(Settings)
 admin.site.register(Bulletin)
-admin.site.register(ArchivedGrade)
-admin.site.register(ArchivedBulletin)
+
+
+class ReadOnlyArchiveAdmin(admin.ModelAdmin):
+	# Les archives ne s'écrivent que par la clôture d'une année (commande archive_school_year)
+	list_filter = ('school_year',)
+	search_fields = ('matricule', 'student_name')
+
+	def has_add_permission(self, request):
+		return False
+
+	def has_change_permission(self, request, obj=None):
+		return False
+
+	def has_delete_permission(self, request, obj=None):
+		return False
+
+
+@admin.register(ArchivedGrade)
+class ArchivedGradeAdmin(ReadOnlyArchiveAdmin):
+	list_display = ('matricule', 'student_name', 'classroom_name', 'subject_code', 'sequence_name', 'value', 'school_year')
+
+
+@admin.register(ArchivedBulletin)
+class ArchivedBulletinAdmin(ReadOnlyArchiveAdmin):
+	list_display = ('matricule', 'student_name', 'classroom_name', 'sequence_name', 'average', 'rank', 'mention', 'school_year')
+
+
+@admin.register(ArchivedDiscipline)
+class ArchivedDisciplineAdmin(ReadOnlyArchiveAdmin):
+	list_display = ('matricule', 'student_name', 'classroom_name', 'term_name', 'absences', 'sanction', 'school_year')
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class BullConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Bull'
+
+    def ready(self):
+        # Enregistre les signaux d'invalidation du cache (vue d'ensemble, paramétrage)
+        # et de mise à jour des mentions enregistrées sur les bulletins
+        from Bull.services import averages, overview, versions  # noqa: F401
+        # Triggers de l'index de recherche des élèves, perdus quand SQLite reconstruit la table
+        from django.db.models.signals import post_migrate
+        from Bull.services.search import ensure_triggers
+        post_migrate.connect(ensure_triggers, sender=self, dispatch_uid='Bull.search.ensure_triggers')
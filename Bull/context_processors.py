@@ -0,0 +1,12 @@
+from django.utils.functional import SimpleLazyObject
+
+from Bull.services.academic import academic_context
+
+
+def academic(request):
+    # Paresseux : seuls les templates qui s'en servent le résolvent.
+    # Sans le middleware (render hors requête complète), on le crée ici.
+    context = getattr(request, 'academic', None)
+    if context is None:
+        context = SimpleLazyObject(academic_context)
+    return {'academic': context}
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Bull.models import SchoolYear
+from Bull.services import archive, bundles
+
+
+class Command(BaseCommand):
+    help = ("Clôture une année scolaire : ses notes, bulletins et fiches de discipline sont copiés dans les "
+            "tables d'archive puis supprimés des tables courantes, par lots.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('school_year', help="Id ou nom de l'année (ex. 2023-2024)")
+        parser.add_argument('--batch-size', type=int, default=archive.BATCH_SIZE, help="Lignes par transaction")
+        parser.add_argument('--dry-run', action='store_true', help="Afficher les lignes à archiver sans rien modifier")
+        parser.add_argument('--skip-bundle', action='store_true',
+                            help="Laisser les PDF de l'année dans bulletins/<année>/ au lieu de les regrouper")
+
+    def handle(self, *args, **options):
+        key = options['school_year']
+        years = SchoolYear.objects.filter(id=key) if key.isdigit() else SchoolYear.objects.filter(name=key)
+        school_year = years.first()
+        if school_year is None:
+            raise CommandError(f"Année scolaire introuvable : {key}")
+
+        if options['dry_run']:
+            for table, queryset in archive.hot_rows(school_year).items():
+                self.stdout.write(f"  {table} : {queryset.count()} à archiver")
+            return
+
+        started = time.perf_counter()
+        try:
+            counts = archive.close_school_year(school_year, options['batch_size'], log=self.stdout.write)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"Année {school_year} clôturée en {time.perf_counter() - started:.1f} s : "
+            + ", ".join(f"{count} {table}" for table, count in counts.items())
+        ))
+        if not options['skip_bundle']:
+            packed = bundles.pack_school_year(school_year.id)
+            self.stdout.write(self.style.SUCCESS(f"{packed} PDF regroupés dans {bundles.bundle_paths(school_year.id)[0]}"))
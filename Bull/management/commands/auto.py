@@ -3,12 +3,13 @@ from Bull.models import Student, ClassSubject, StudentSubject, Sequence, Grade
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
-system_user = User.objects.filter(role='admin').first()
 
 class Command(BaseCommand):
     help = "Lie tous les élèves existants aux matières de leur classe et initialise les notes (Grade) pour chaque séquence."
 
     def handle(self, *args, **options):
+        system_user = User.objects.filter(role='admin').first()
+        sequences = list(Sequence.objects.select_related('term'))
         ss_count = 0
         grade_count = 0
         # Supprimer tous les liens et notes existants
@@ -21,14 +22,14 @@ class Command(BaseCommand):
                     obj, created = StudentSubject.objects.get_or_create(student=student, subject=cs.subject, defaults={'is_optional': False})
                     if created:
                         ss_count += 1
-                    for seq in Sequence.objects.all():
+                    for seq in sequences:
                         gobj, gcreated = Grade.objects.get_or_create(
                             student=student,
                             class_subject=cs,
                             sequence=seq,
                             defaults={
                                 'value': 0,
-                                'coefficient': cs.coefficient,
+                                'term': seq.term,
                                 'status': 'draft',
                                 'created_by': system_user,
                                 'updated_by': system_user
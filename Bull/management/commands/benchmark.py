@@ -0,0 +1,76 @@
+import json
+import platform
+import tempfile
+from pathlib import Path
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from django.utils import timezone
+
+from Bull.services import benchmark
+
+
+def _load(path):
+    try:
+        return json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError) as exc:
+        raise CommandError(f"Lecture impossible de {path} : {exc}")
+
+
+class Command(BaseCommand):
+    help = ("Mesure durée, requêtes SQL et pic mémoire des vues de saisie, de bulletins, d'export et de l'API "
+            "sur des jeux de données générés (base de test jetable).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', action='append', dest='datasets', choices=sorted(benchmark.DATASETS),
+                            help="Jeu de données (répétable, défaut : small)")
+        parser.add_argument('--only', action='append', help="Limiter à un scénario (répétable)")
+        parser.add_argument('--repeat', type=int, default=3, help="Exécutions par scénario (durée médiane)")
+        parser.add_argument('--seed', type=int, default=42, help="Graine du générateur de données")
+        parser.add_argument('--output', help="Fichier JSON des résultats")
+        parser.add_argument('--baseline', help="Résultats JSON de référence à ne pas dépasser")
+        parser.add_argument('--tolerance', type=float, default=0.25, help="Marge tolérée sur la référence (0.25 = +25 %%)")
+        parser.add_argument('--budgets', help="Budgets JSON {jeu|*: {scénario: {ms, queries, peak_kb}}}")
+
+    def handle(self, *args, **options):
+        datasets = options['datasets'] or ['small']
+        baseline = _load(options['baseline'])['results'] if options['baseline'] else None
+        budgets = _load(options['budgets']) if options['budgets'] else None
+
+        results = {}
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            with tempfile.TemporaryDirectory() as media, \
+                    override_settings(MEDIA_ROOT=media, ALLOWED_HOSTS=['testserver']):
+                for name in datasets:
+                    call_command('flush', interactive=False, verbosity=0)
+                    self.stdout.write(f"Jeu {name} : {benchmark.DATASETS[name]}")
+                    results[name] = benchmark.run_dataset(
+                        name, only=options['only'], repeat=options['repeat'], seed=options['seed'],
+                        log=self.stdout.write,
+                    )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'seed': options['seed'],
+            'repeat': options['repeat'],
+            'results': results,
+        }
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+            self.stdout.write(f"Résultats écrits dans {options['output']}")
+
+        failures = []
+        if baseline:
+            failures += benchmark.compare(results, baseline, options['tolerance'])
+        if budgets:
+            failures += benchmark.compare(results, budgets)
+        if failures:
+            raise CommandError("Budgets dépassés :\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS(f"{sum(len(r) for r in results.values())} mesures dans les budgets"))
@@ -0,0 +1,28 @@
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from Bull.storage import precompress, service_worker_context
+
+
+class Command(BaseCommand):
+    help = "Construit les fichiers statiques : noms hachés, minification, .gz/.br et service worker."
+
+    def handle(self, *args, **options):
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+        # Copie du service worker pour un serveur web qui servirait la racine lui-même
+        context = service_worker_context()
+        path = os.path.join(settings.STATIC_ROOT, 'service-worker.js')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(render_to_string('Bull/service-worker.js', context))
+        precompress(path)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(staticfiles_storage.hashed_files)} fichier(s) versionné(s) dans {settings.STATIC_ROOT} "
+            f"(cache {context['cache_name']})"
+        ))
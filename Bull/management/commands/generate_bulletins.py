@@ -0,0 +1,66 @@
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+from Bull.models import SchoolYear, Term, Sequence
+from Bull.services import campaign, generation, profiling
+from Bull.services.academic import academic_context
+
+
+class Command(BaseCommand):
+    help = "Génère les bulletins (séquence, trimestre ou année) de toutes les classes d'une année scolaire."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schoolyear', type=int, help="ID de l'année scolaire (par défaut : année active)")
+        scope = parser.add_mutually_exclusive_group(required=True)
+        scope.add_argument('--sequence', type=int, help="ID de la séquence")
+        scope.add_argument('--term', type=int, help="ID du trimestre")
+        scope.add_argument('--year', action='store_true', help="Bulletins annuels")
+        parser.add_argument('--classroom', type=int, action='append', dest='classrooms', help="Limiter à une classe (répétable)")
+        parser.add_argument('--workers', type=int, default=None, help="Nombre de workers pour le rendu PDF")
+        parser.add_argument('--threads', action='store_true', help="Utiliser des threads plutôt que des processus")
+        parser.add_argument('--profile', choices=('spans',) + profiling.MODES,
+                            help="Résumé par étape ; cprofile/sample écrivent aussi un fichier de profil")
+        parser.add_argument('--profile-dir', default='profiles', help="Dossier des fichiers de profil")
+
+    def handle(self, *args, **options):
+        if options['schoolyear']:
+            school_year = SchoolYear.objects.filter(id=options['schoolyear']).first()
+        else:
+            school_year = academic_context()['school_year']
+        if not school_year:
+            raise CommandError("Année scolaire introuvable.")
+
+        if options['sequence']:
+            scope = generation.SEQUENCE
+            period = Sequence.objects.select_related('term').filter(id=options['sequence'], term__school_year=school_year).first()
+        elif options['term']:
+            scope = generation.TRIMESTER
+            period = Term.objects.filter(id=options['term'], school_year=school_year).first()
+        else:
+            scope = generation.ANNUAL
+            period = school_year
+        if period is None:
+            raise CommandError("Séquence ou trimestre introuvable pour cette année scolaire.")
+
+        self.stdout.write(f"Génération des bulletins ({scope}) : {period} — {school_year}")
+        if options['profile']:
+            mode = options['profile'] if options['profile'] in profiling.MODES else None
+            profiler = profiling.profile_run(scope, mode, options['profile_dir'])
+        else:
+            profiler = nullcontext()
+        with profiler as profile:
+            reports = campaign.run_campaign(
+                school_year, scope, period,
+                classroom_ids=options['classrooms'],
+                workers=options['workers'],
+                executor='thread' if options['threads'] else 'process',
+                log=self.stdout.write,
+            )
+        self.stdout.write(campaign.format_report(reports))
+        if profile:
+            self.stdout.write(profiling.format_summary(profile))
+        generated = sum(r['bulletins'] for r in reports)
+        blocked = [r['classroom'] for r in reports if r['status'] != 'ok']
+        self.stdout.write(self.style.SUCCESS(f"{generated} bulletins générés."))
+        if blocked:
+            self.stdout.write(self.style.WARNING(f"Classes non générées : {', '.join(blocked)}"))
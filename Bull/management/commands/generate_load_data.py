@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Bull.services import loadgen
+
+
+class Command(BaseCommand):
+    help = "Génère un jeu de données de charge reproductible (écoles, classes, élèves, notes) pour les benchmarks."
+
+    def add_arguments(self, parser):
+        defaults = loadgen.DEFAULTS
+        parser.add_argument('--schools', type=int, default=defaults['schools'], help="Nombre d'écoles")
+        parser.add_argument('--classes', type=int, default=defaults['classes'], help="Classes par école")
+        parser.add_argument('--students', type=int, default=defaults['students'], help="Élèves par école")
+        parser.add_argument('--subjects', type=int, default=defaults['subjects'], help="Matières par classe")
+        parser.add_argument('--terms', type=int, default=defaults['terms'], help="Trimestres")
+        parser.add_argument('--sequences', type=int, default=defaults['sequences'], help="Séquences par trimestre")
+        parser.add_argument('--filled', type=int, default=None, help="Séquences déjà saisies (par défaut : toutes)")
+        parser.add_argument('--seed', type=int, default=defaults['seed'], help="Graine du générateur aléatoire")
+        parser.add_argument('--prefix', default=defaults['prefix'], help="Préfixe des classes, matricules et comptes")
+        parser.add_argument('--batch-size', type=int, default=defaults['batch_size'], help="Taille des lots bulk_create")
+        parser.add_argument('--flush', action='store_true', help="Supprimer d'abord le jeu existant de même préfixe")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['flush']:
+            loadgen.delete_dataset(options['prefix'])
+        counts = loadgen.generate_dataset(**{key: options[key] for key in loadgen.DEFAULTS})
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{counts['classrooms']} classes, {counts['teachers']} enseignants, {counts['students']} élèves, "
+            f"{counts['grades']} notes ({counts['school_year']})"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Jeu de données généré en {elapsed:.1f} s"))
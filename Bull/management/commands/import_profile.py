@@ -0,0 +1,54 @@
+import os
+import re
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Bibliothèques qui ne doivent être chargées qu'à l'usage (exports, PDF, documentation d'API)
+HEAVY_MODULES = ('openpyxl', 'reportlab', 'docx', 'drf_yasg')
+
+# Démarrage à froid d'un worker : configuration de Django puis chargement des URL (et donc des vues)
+BOOT = "import django; django.setup(); import SmartBull.urls"
+LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def profile_imports():
+    """Lance un interpréteur neuf avec -X importtime ; retourne {module: (propre_us, cumul_us, profondeur)}."""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'SmartBull.settings'))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT],
+        capture_output=True, text=True, env=env, check=False,
+    )
+    if result.returncode != 0:
+        raise CommandError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "Échec du démarrage")
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            modules[name] = (int(own), int(cumulative), (len(indent) - 1) // 2)
+    return modules
+
+
+class Command(BaseCommand):
+    help = "Profil des imports au démarrage (python -X importtime) : modules les plus coûteux et bibliothèques lourdes chargées."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help="Nombre de modules affichés")
+        parser.add_argument('--budget-ms', type=float, default=None, help="Échoue si le démarrage dépasse ce temps")
+
+    def handle(self, *args, **options):
+        modules = profile_imports()
+        total_ms = sum(own for own, _, _ in modules.values()) / 1000
+        self.stdout.write(f"{'Module':<50} {'Cumul ms':>10} {'Propre ms':>10}")
+        ranked = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)
+        for name, (own, cumulative, _) in ranked[:options['top']]:
+            self.stdout.write(f"{name[:50]:<50} {cumulative / 1000:>10.1f} {own / 1000:>10.1f}")
+
+        loaded = sorted({name.split('.')[0] for name in modules} & set(HEAVY_MODULES))
+        if loaded:
+            raise CommandError(f"Bibliothèques lourdes chargées au démarrage : {', '.join(loaded)}")
+        if options['budget_ms'] is not None and total_ms > options['budget_ms']:
+            raise CommandError(f"Démarrage en {total_ms:.0f} ms (budget {options['budget_ms']:.0f} ms)")
+        self.stdout.write(self.style.SUCCESS(f"{len(modules)} modules importés en {total_ms:.0f} ms"))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Bull.models import SchoolYear
+from Bull.services import averages
+
+
+class Command(BaseCommand):
+    help = ("Recalcule la moyenne trimestrielle, la mention et l'appréciation enregistrées sur les bulletins "
+            "(après la correction d'une note déjà utilisée, ou pour compléter les bulletins plus anciens).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('school_year', nargs='?', help="Id ou nom de l'année (toutes par défaut)")
+        parser.add_argument('--batch-size', type=int, default=averages.BATCH_SIZE, help="Bulletins par lot")
+
+    def handle(self, *args, **options):
+        school_year_id = None
+        key = options['school_year']
+        if key:
+            years = SchoolYear.objects.filter(id=key) if key.isdigit() else SchoolYear.objects.filter(name=key)
+            school_year = years.first()
+            if school_year is None:
+                raise CommandError(f"Année scolaire introuvable : {key}")
+            school_year_id = school_year.id
+        changed = averages.reapply_term_results(school_year_id, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{changed} bulletins mis à jour."))
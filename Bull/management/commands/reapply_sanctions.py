@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from Bull.services import sanctions
+
+
+class Command(BaseCommand):
+    help = ("Recalcule la sanction de chaque fiche de discipline d'après les seuils actuels "
+            "(à lancer après avoir modifié les sanctions).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=sanctions.BATCH_SIZE, help="Fiches lues par lot")
+
+    def handle(self, *args, **options):
+        changed = sanctions.reapply(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{changed} fiches de discipline mises à jour."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from Bull.services import bundles
+
+
+class Command(BaseCommand):
+    help = ("Range les PDF de bulletins de l'ancien dossier plat media/bulletins/ dans l'arborescence "
+            "bulletins/<année>/<classe>/<période>/ et met à jour les chemins enregistrés.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Afficher les déplacements sans rien modifier")
+
+    def handle(self, *args, **options):
+        moves = bundles.shard_legacy_files(dry_run=options['dry_run'])
+        if options['dry_run']:
+            for old, new in moves:
+                self.stdout.write(f"  {old} -> {new}")
+            self.stdout.write(f"{len(moves)} fichiers à déplacer")
+            return
+        self.stdout.write(self.style.SUCCESS(f"{len(moves)} fichiers déplacés"))
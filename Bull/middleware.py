@@ -0,0 +1,55 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils.functional import SimpleLazyObject
+
+from Bull.services import telemetry
+from Bull.services.academic import academic_context
+
+
+class AcademicContextMiddleware:
+    """Attache le contexte académique courant à la requête (``request.academic``).
+
+    Résolu au premier accès seulement : les requêtes qui ne s'en servent pas ne paient rien.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.academic = SimpleLazyObject(academic_context)
+        return self.get_response(request)
+
+
+class RequestStatsMiddleware:
+    """Mesure chaque requête (durée, requêtes SQL, temps SQL, N+1, taille) par nom d'URL.
+
+    Désactivé avec ``REQUEST_STATS = False`` ; voir services/telemetry.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_STATS', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = telemetry.QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        telemetry.record({
+            'endpoint': match.view_name if match else '<non résolu>',
+            'method': request.method,
+            'status': response.status_code,
+            'ms': round(elapsed * 1000, 2),
+            'db_ms': round(recorder.seconds * 1000, 2),
+            'queries': recorder.count,
+            'duplicates': recorder.duplicates(),
+            'bytes': None if response.streaming else len(response.content),
+            'at': round(time.time()),
+        })
+        return response
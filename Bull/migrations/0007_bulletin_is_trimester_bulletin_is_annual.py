@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Bull', '0006_bulletintemplate_html_canvas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulletin',
+            name='is_annual',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='bulletin',
+            name='is_trimester',
+            field=models.BooleanField(default=False),
+        ),
+    ]
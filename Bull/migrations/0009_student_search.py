@@ -0,0 +1,24 @@
+# Index plein texte des élèves (FTS5, SQLite uniquement) : voir Bull/services/search.py
+
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from Bull.services import search
+    search.install(schema_editor)
+
+
+def uninstall(apps, schema_editor):
+    from Bull.services import search
+    search.uninstall(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Bull', '0008_idempotentrequest'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
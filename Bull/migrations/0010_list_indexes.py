@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Bull', '0009_student_search'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bulletintemplate',
+            index=models.Index(fields=['created_at', 'id'], name='bulletintemplate_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='classroom',
+            index=models.Index(fields=['name', 'id'], name='classroom_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['last_name', 'first_name', 'id'], name='student_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['classroom', 'last_name', 'first_name', 'id'], name='student_class_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subject',
+            index=models.Index(fields=['name', 'id'], name='subject_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['last_name', 'first_name', 'id'], name='user_name_idx'),
+        ),
+    ]
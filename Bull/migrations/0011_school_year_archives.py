@@ -0,0 +1,259 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_existing_archives(apps, schema_editor):
+    # Les fiches d'archive existantes ne faisaient que pointer vers les lignes vivantes :
+    # on y recopie les valeurs pour qu'elles survivent à leur suppression.
+    ArchivedGrade = apps.get_model('Bull', 'ArchivedGrade')
+    ArchivedBulletin = apps.get_model('Bull', 'ArchivedBulletin')
+    Grade = apps.get_model('Bull', 'Grade')
+    Bulletin = apps.get_model('Bull', 'Bulletin')
+    grades = Grade.objects.select_related('student', 'class_subject__classroom', 'class_subject__subject', 'sequence__term')
+    for archive in ArchivedGrade.objects.all():
+        grade = grades.filter(id=archive.grade_id).first()
+        if grade is None:
+            continue
+        archive.matricule = grade.student.matricule
+        archive.student_name = f"{grade.student.last_name} {grade.student.first_name}".strip()
+        archive.classroom_name = grade.class_subject.classroom.name
+        archive.subject_code = grade.class_subject.subject.code
+        archive.subject_name = grade.class_subject.subject.name
+        archive.coefficient = grade.class_subject.coefficient
+        archive.term_name = grade.sequence.term.name
+        archive.sequence_name = grade.sequence.name
+        archive.sequence_order = grade.sequence.order
+        archive.value = grade.value
+        archive.status = grade.status
+        archive.comment = grade.comment or ''
+        archive.save()
+    bulletins = Bulletin.objects.select_related('student', 'classroom', 'sequence__term')
+    for archive in ArchivedBulletin.objects.all():
+        bulletin = bulletins.filter(id=archive.bulletin_id).first()
+        if bulletin is None:
+            continue
+        archive.school_year_id = bulletin.sequence.term.school_year_id
+        archive.matricule = bulletin.student.matricule
+        archive.student_name = f"{bulletin.student.last_name} {bulletin.student.first_name}".strip()
+        archive.classroom_name = bulletin.classroom.name
+        archive.term_name = bulletin.sequence.term.name
+        archive.sequence_name = bulletin.sequence.name
+        archive.is_trimester = bulletin.is_trimester
+        archive.is_annual = bulletin.is_annual
+        archive.average = bulletin.average
+        archive.rank = bulletin.rank
+        archive.comment = bulletin.comment or ''
+        archive.pdf_path = bulletin.pdf_path.name or ''
+        archive.checksum = bulletin.checksum
+        archive.generated_at = bulletin.generated_at
+        archive.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Bull', '0010_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedDiscipline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matricule', models.CharField(max_length=20)),
+                ('student_name', models.CharField(max_length=101)),
+                ('classroom_name', models.CharField(max_length=50)),
+                ('term_name', models.CharField(max_length=20)),
+                ('sequence_name', models.CharField(blank=True, default='', max_length=20)),
+                ('absences', models.PositiveIntegerField(default=0)),
+                ('lates', models.PositiveIntegerField(default=0)),
+                ('sanction', models.CharField(blank=True, default='', max_length=255)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='archivedbulletin',
+            name='appreciation',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='archivedbulletin',
+            name='average',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedbulletin',
+            name='checksum',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedbulletin',
+            name='classroom_name',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='archivedbulletin',
+            name='comment',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='archivedbulletin',
+            name='generated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedbulletin',
+            name='is_annual',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='archivedbulletin',
+            name='is_trimester',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='archivedbulletin',
+            name='matricule',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='archivedbulletin',
+            name='mention',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedbulletin',
+            name='pdf_path',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='archivedbulletin',
+            name='rank',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedbulletin',
+            name='school_year',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='Bull.schoolyear'),
+        ),
+        migrations.AddField(
+            model_name='archivedbulletin',
+            name='sequence_name',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='archivedbulletin',
+            name='student_name',
+            field=models.CharField(blank=True, default='', max_length=101),
+        ),
+        migrations.AddField(
+            model_name='archivedbulletin',
+            name='term_average',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedbulletin',
+            name='term_name',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='archivedgrade',
+            name='classroom_name',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='archivedgrade',
+            name='coefficient',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedgrade',
+            name='comment',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='archivedgrade',
+            name='matricule',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='archivedgrade',
+            name='sequence_name',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='archivedgrade',
+            name='sequence_order',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedgrade',
+            name='status',
+            field=models.CharField(blank=True, default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='archivedgrade',
+            name='student_name',
+            field=models.CharField(blank=True, default='', max_length=101),
+        ),
+        migrations.AddField(
+            model_name='archivedgrade',
+            name='subject_code',
+            field=models.CharField(blank=True, default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='archivedgrade',
+            name='subject_name',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='archivedgrade',
+            name='term_name',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='archivedgrade',
+            name='value',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='schoolyear',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='schoolyear',
+            name='is_closed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='archivedbulletin',
+            name='bulletin',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='Bull.bulletin'),
+        ),
+        migrations.AlterField(
+            model_name='archivedgrade',
+            name='grade',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='Bull.grade'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedbulletin',
+            index=models.Index(fields=['school_year', 'matricule'], name='archivedbulletin_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedgrade',
+            index=models.Index(fields=['school_year', 'matricule'], name='archivedgrade_student_idx'),
+        ),
+        migrations.AddField(
+            model_name='archiveddiscipline',
+            name='school_year',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='Bull.schoolyear'),
+        ),
+        migrations.AddIndex(
+            model_name='archiveddiscipline',
+            index=models.Index(fields=['school_year', 'matricule'], name='archiveddiscipline_student_idx'),
+        ),
+        migrations.RunPython(fill_existing_archives, migrations.RunPython.noop),
+    ]
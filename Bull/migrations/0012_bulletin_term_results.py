@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Bull', '0011_school_year_archives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulletin',
+            name='appreciation',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='bulletin',
+            name='mention',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='bulletin',
+            name='term_average',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
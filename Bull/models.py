@@ -23,6 +23,10 @@ class User(AbstractUser):
         default=Roles.STUDENT
     )
 
+    class Meta(AbstractUser.Meta):
+        # Clé de tri de la liste des enseignants (pagination par clé)
+        indexes = [models.Index(fields=['last_name', 'first_name', 'id'], name='user_name_idx')]
+
     def is_admin(self):
         return self.role == self.Roles.ADMIN
 
@@ -38,6 +42,9 @@ class SchoolYear(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
     is_active = models.BooleanField(default=False)
+    # Année clôturée : notes, bulletins et discipline déplacés dans les tables d'archive
+    is_closed = models.BooleanField(default=False)
+    closed_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return self.name
@@ -85,6 +92,9 @@ class Classroom(models.Model):
     series = models.CharField(max_length=20, blank=True, null=True)
     head_teacher = models.ForeignKey('Teacher', on_delete=models.SET_NULL, null=True, blank=True, related_name='head_classes')
 
+    class Meta:
+        indexes = [models.Index(fields=['name', 'id'], name='classroom_name_idx')]
+
     def __str__(self):
         return self.name
 
@@ -100,6 +110,13 @@ class Student(models.Model):
     classroom = models.ForeignKey(Classroom, on_delete=models.CASCADE, related_name='students')
     repeater = models.BooleanField(default=False)
 
+    class Meta:
+        # Clés de tri de la liste des élèves, avec ou sans filtre de classe
+        indexes = [
+            models.Index(fields=['last_name', 'first_name', 'id'], name='student_name_idx'),
+            models.Index(fields=['classroom', 'last_name', 'first_name', 'id'], name='student_class_name_idx'),
+        ]
+
     def __str__(self):
         return f"{self.matricule} - {self.first_name} {self.last_name}"
 
@@ -131,8 +148,8 @@ def link_student_to_class_subjects(sender, instance, created, **kwargs):
             class_subjects = ClassSubject.objects.filter(classroom=instance.classroom)
             for cs in class_subjects:
                 StudentSubject.objects.get_or_create(student=instance, subject=cs.subject, defaults={'is_optional': False})
-                # Créer les notes pour chaque séquence existante
-                for seq in Sequence.objects.all():
+                # Créer les notes pour chaque séquence des années non clôturées
+                for seq in Sequence.objects.filter(term__school_year__is_closed=False):
                     Grade.objects.get_or_create(
                         student=instance,
                         class_subject=cs,
@@ -159,6 +176,9 @@ class BulletinTemplate(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['created_at', 'id'], name='bulletintemplate_created_idx')]
+
     def __str__(self):
         return f"{self.name} ({self.school_year})"
 
@@ -184,6 +204,9 @@ class Subject(models.Model):
     ]
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='core')
 
+    class Meta:
+        indexes = [models.Index(fields=['name', 'id'], name='subject_name_idx')]
+
     def __str__(self):
         return self.name
 
@@ -227,6 +250,8 @@ class Grade(models.Model):
         ('validated', 'Validé'),
         ('locked', 'Verrouillé')
     ]
+    # Notes prises en compte dans les moyennes : une note verrouillée a d'abord été validée
+    COUNTED_STATUSES = ('validated', 'locked')
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='grades')
     class_subject = models.ForeignKey(ClassSubject, on_delete=models.CASCADE)
     term = models.ForeignKey('Term', on_delete=models.CASCADE, null=True, blank=True, related_name='grades')
@@ -245,7 +270,7 @@ class Grade(models.Model):
     # ---------------------------------
     @staticmethod
     def calculate_student_average(student, sequence):
-        grades = Grade.objects.filter(student=student, sequence=sequence, status='validated')
+        grades = Grade.objects.filter(student=student, sequence=sequence, status__in=Grade.COUNTED_STATUSES)
         if not grades.exists():
             return None
         total_coef = sum(g.class_subject.coefficient for g in grades)
@@ -314,6 +339,13 @@ class Bulletin(models.Model):
     comment = models.TextField(blank=True, null=True)
     checksum = models.CharField(max_length=64, blank=True, null=True)
     verified_url = models.URLField(blank=True, null=True)
+    # Bulletins consolidés : la séquence référencée est la première de la période
+    is_trimester = models.BooleanField(default=False)
+    is_annual = models.BooleanField(default=False)
+    # Résultats du trimestre enregistrés à la génération (services.averages.store_term_results)
+    term_average = models.FloatField(null=True, blank=True)
+    mention = models.CharField(max_length=20, blank=True, null=True)
+    appreciation = models.CharField(max_length=255, blank=True, default='')
 
     def __str__(self):
         return f"Bulletin {self.student} - {self.classroom} - {self.sequence}"
@@ -331,6 +363,10 @@ class Bulletin(models.Model):
 
     def generate_appreciation(self):
         avg = Grade.calculate_term_average(self.student, self.sequence.term)
+        return Bulletin.appreciation_for(avg)
+
+    @staticmethod
+    def appreciation_for(avg):
         if avg is None:
             return "Pas de données disponibles"
         if avg >= 16:
@@ -360,8 +396,8 @@ class Discipline(models.Model):
     def save(self, *args, **kwargs):
         # Attribue automatiquement la sanction selon le nombre d'heures d'absence
         if self.absences is not None:
-            sanction = Sanction.objects.filter(min_heures_absence__lte=self.absences).order_by('-min_heures_absence').first()
-            self.sanction = sanction
+            from Bull.services.sanctions import sanction_id_for
+            self.sanction_id = sanction_id_for(self.absences)
         super().save(*args, **kwargs)
 
 
@@ -388,12 +424,83 @@ class Settings(models.Model):
 # ---------------------------
 # Archivage
 # ---------------------------
+# Copies dénormalisées (noms, matricules, libellés) des lignes d'une année
+# clôturée : elles restent lisibles après suppression des lignes d'origine,
+# dont l'id est conservé sans contrainte de clé étrangère.
 class ArchivedGrade(models.Model):
-    grade = models.ForeignKey(Grade, on_delete=models.CASCADE)
+    grade = models.ForeignKey(Grade, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+')
     school_year = models.ForeignKey(SchoolYear, on_delete=models.CASCADE)
+    matricule = models.CharField(max_length=20, blank=True, default='')
+    student_name = models.CharField(max_length=101, blank=True, default='')
+    classroom_name = models.CharField(max_length=50, blank=True, default='')
+    subject_code = models.CharField(max_length=10, blank=True, default='')
+    subject_name = models.CharField(max_length=100, blank=True, default='')
+    coefficient = models.FloatField(null=True, blank=True)
+    term_name = models.CharField(max_length=20, blank=True, default='')
+    sequence_name = models.CharField(max_length=20, blank=True, default='')
+    sequence_order = models.PositiveSmallIntegerField(null=True, blank=True)
+    value = models.FloatField(null=True, blank=True)
+    status = models.CharField(max_length=10, blank=True, default='')
+    comment = models.TextField(blank=True, default='')
     archived_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['school_year', 'matricule'], name='archivedgrade_student_idx')]
+
 
 class ArchivedBulletin(models.Model):
-    bulletin = models.ForeignKey(Bulletin, on_delete=models.CASCADE)
+    bulletin = models.ForeignKey(Bulletin, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+')
+    school_year = models.ForeignKey(SchoolYear, on_delete=models.CASCADE, null=True, blank=True)
+    matricule = models.CharField(max_length=20, blank=True, default='')
+    student_name = models.CharField(max_length=101, blank=True, default='')
+    classroom_name = models.CharField(max_length=50, blank=True, default='')
+    term_name = models.CharField(max_length=20, blank=True, default='')
+    sequence_name = models.CharField(max_length=20, blank=True, default='')
+    is_trimester = models.BooleanField(default=False)
+    is_annual = models.BooleanField(default=False)
+    average = models.FloatField(null=True, blank=True)
+    rank = models.PositiveIntegerField(null=True, blank=True)
+    term_average = models.FloatField(null=True, blank=True)
+    mention = models.CharField(max_length=20, blank=True, null=True)
+    appreciation = models.CharField(max_length=255, blank=True, default='')
+    comment = models.TextField(blank=True, default='')
+    pdf_path = models.CharField(max_length=255, blank=True, default='')
+    checksum = models.CharField(max_length=64, blank=True, null=True)
+    generated_at = models.DateTimeField(null=True, blank=True)
     archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['school_year', 'matricule'], name='archivedbulletin_student_idx')]
+
+
+class ArchivedDiscipline(models.Model):
+    school_year = models.ForeignKey(SchoolYear, on_delete=models.CASCADE)
+    matricule = models.CharField(max_length=20)
+    student_name = models.CharField(max_length=101)
+    classroom_name = models.CharField(max_length=50)
+    term_name = models.CharField(max_length=20)
+    sequence_name = models.CharField(max_length=20, blank=True, default='')
+    absences = models.PositiveIntegerField(default=0)
+    lates = models.PositiveIntegerField(default=0)
+    sanction = models.CharField(max_length=255, blank=True, default='')
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['school_year', 'matricule'], name='archiveddiscipline_student_idx')]
+
+
+# ---------------------------
+# API : requêtes idempotentes
+# ---------------------------
+class IdempotentRequest(models.Model):
+    """Réponse mémorisée d'une écriture groupée, rejouée si le client renvoie la même clé."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotent_requests')
+    endpoint = models.CharField(max_length=100)
+    key = models.CharField(max_length=100)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(default=200)
+    response = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'endpoint', 'key')
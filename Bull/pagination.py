@@ -0,0 +1,142 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination
+
+
+# ---------------------------
+# Pagination par curseur
+# ---------------------------
+# Tri sur la clé primaire (indexée) : l'ordre est stable même quand des lignes
+# sont ajoutées entre deux pages, et aucune requête COUNT n'est exécutée.
+class IdCursorPagination(CursorPagination):
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+# ---------------------------
+# Pagination par clé (pages HTML)
+# ---------------------------
+# Chaque page reprend après la dernière ligne affichée (« clé > dernière clé »)
+# au lieu de sauter N lignes : coût constant quelle que soit la page, servi par
+# un index composite sur les clés de tri. Le tri se termine toujours par 'id'
+# pour rester stable entre deux lignes égales. Le curseur (valeurs de clé de
+# la ligne limite et sens) est opaque pour le navigateur.
+class KeysetPage:
+    """Page de résultats : itérable, avec les curseurs des pages voisines (None en bord de liste)."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Pagine ``queryset`` selon ``ordering`` (ex. ('last_name', 'first_name'), '-' pour décroissant).
+
+    Les champs de tri doivent être non nuls ; 'id' est ajouté s'il manque.
+    """
+
+    def __init__(self, queryset, ordering, per_page=50):
+        ordering = tuple(ordering)
+        if ordering[-1].lstrip('-') not in ('id', 'pk'):
+            ordering += ('-id',) if ordering[-1].startswith('-') else ('id',)
+        self.queryset = queryset
+        self.ordering = ordering
+        self.per_page = per_page
+
+    def _keys(self, obj):
+        values = []
+        for field in self.ordering:
+            value = obj
+            for attr in field.lstrip('-').split('__'):
+                value = getattr(value, attr)
+            values.append(value)
+        return values
+
+    def _encode(self, obj, direction):
+        # str() garde les microsecondes des dates (DjangoJSONEncoder les tronque à la milliseconde)
+        payload = json.dumps([direction] + self._keys(obj), default=str, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def _decode(self, cursor):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        except (ValueError, TypeError):
+            return None, None
+        if not isinstance(payload, list) or len(payload) != len(self.ordering) + 1 or payload[0] not in ('n', 'p'):
+            return None, None
+        # Curseur modifié à la main : chaque valeur doit être convertible dans le type de son champ
+        values = []
+        for field, value in zip(self.ordering, payload[1:]):
+            if value is None or isinstance(value, (dict, list)):
+                return None, None
+            try:
+                values.append(self._field(field).to_python(value))
+            except (TypeError, ValueError, ValidationError):
+                return None, None
+        return payload[0], values
+
+    def _field(self, name):
+        model, field = self.queryset.model, None
+        for attr in name.lstrip('-').split('__'):
+            field = model._meta.pk if attr == 'pk' else model._meta.get_field(attr)
+            model = field.related_model or model
+        return field
+
+    def _after(self, values, reverse):
+        """Lignes strictement après ``values`` dans l'ordre de tri (avant si ``reverse``)."""
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[i]})
+            for prev, value in zip(self.ordering[:i], values[:i]):
+                step &= Q(**{prev.lstrip('-'): value})
+            condition |= step
+        return condition
+
+    def get_page(self, cursor=None):
+        """Page suivant (ou précédant) le curseur ; première page si le curseur est absent ou invalide."""
+        direction, values = self._decode(cursor) if cursor else (None, None)
+        backwards = direction == 'p'
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._after(values, backwards))
+        ordering = self.ordering
+        if backwards:
+            ordering = tuple(f[1:] if f.startswith('-') else f'-{f}' for f in ordering)
+        # Une ligne de plus pour savoir s'il existe une page au-delà
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+        if not rows:
+            # Retour en arrière sur des lignes supprimées entre-temps : première page
+            return self.get_page() if backwards else KeysetPage([])
+        has_next = more if not backwards else True
+        has_previous = more if backwards else values is not None
+        return KeysetPage(
+            rows,
+            next_cursor=self._encode(rows[-1], 'n') if has_next else None,
+            previous_cursor=self._encode(rows[0], 'p') if has_previous else None,
+        )
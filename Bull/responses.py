@@ -0,0 +1,115 @@
+import gzip
+import hashlib
+import json
+import math
+import re
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from Bull.services import versions
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle
+    brotli = None
+
+# En dessous de cette taille, la compression coûte plus qu'elle ne rapporte
+MIN_COMPRESS_SIZE = 512
+BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def compact_json_response(request, data, etag=None, status=200):
+    """JSON sans espaces, compressé en brotli ou gzip selon Accept-Encoding."""
+    body = json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+    accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    encoding = None
+    if len(body) >= MIN_COMPRESS_SIZE:
+        if brotli is not None and 'br' in accepted:
+            body, encoding = brotli.compress(body), 'br'
+        elif 'gzip' in accepted:
+            body, encoding = gzip.compress(body), 'gzip'
+    response = HttpResponse(body, status=status, content_type='application/json')
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if etag:
+        response['ETag'] = etag
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def byte_range_response(request, content, filename, content_type='application/pdf'):
+    """Sert ``content`` en entier ou, si le client envoie ``Range: bytes=a-b``, la tranche demandée (206).
+
+    Une seule plage est prise en charge ; une plage multiple ou illisible renvoie le contenu entier.
+    """
+    size = len(content)
+    match = BYTE_RANGE.match(request.META.get('HTTP_RANGE', '').strip())
+    status = 200
+    if match and any(match.groups()):
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1
+        if start > end or start >= size:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        content, status = content[start:end + 1], 206
+    response = HttpResponse(content, status=status, content_type=content_type)
+    if status == 206:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = f'inline; filename="{filename}"'
+    return response
+
+
+def not_modified(request, etag):
+    """Réponse 304 si le client possède déjà cette version."""
+    candidates = [tag.strip() for tag in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]
+    if etag in candidates or '*' in candidates:
+        response = HttpResponse(status=304)
+        response['ETag'] = etag
+        return response
+    return None
+
+
+def versioned_cache(*models, timeout=versions.CACHE_TIMEOUT):
+    """Met en cache une vue GET (indépendante de l'utilisateur) tant que ``models`` n'ont pas changé.
+
+    L'ETag et Last-Modified dérivent des versions des modèles : un client qui les
+    renvoie reçoit 304, les autres la réponse mémorisée, sans requête SQL.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            stamps = [versions.model_version(m) for m in models]
+            digest = hashlib.sha1(f"{request.get_full_path()}:{stamps}".encode()).hexdigest()[:20]
+            etag = f'W/"{digest}"'
+            last_modified = math.ceil(max(stamps) / 1e9)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                return response
+
+            key = f"view:{view.__module__}.{view.__name__}:{digest}"
+            cached = cache.get(key)
+            if cached is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                cached = (response.content, response['Content-Type'])
+                cache.set(key, cached, timeout)
+            response = HttpResponse(cached[0], content_type=cached[1])
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            # Le navigateur garde la réponse mais revalide à chaque fois (304 le plus souvent)
+            response['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
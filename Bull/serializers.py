@@ -1,21 +1,57 @@
-GitHub: Sign out
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from django.contrib.auth import get_user_model
 from .models import (
     SchoolYear, Term, Sequence, Classroom, Teacher, Student,
     Subject, ClassSubject, Grade, Discipline, MentionRule,
-    Settings, Bulletin, ArchivedGrade, ArchivedBulletin
+    Settings, Bulletin, ArchivedGrade, ArchivedBulletin, ArchivedDiscipline
 )
+from .services.averages import bulletin_term_results
+from .services.academic import academic_context
 
 User = get_user_model()
 
+
+# ---------------------------
+# Champs à la demande
+# ---------------------------
+class DynamicFieldsMixin:
+    """Lecture allégée pilotée par la requête (serializer racine uniquement).
+
+    ``?fields=id,value`` ne renvoie que les champs listés ;
+    ``?nested=ids`` remplace les objets imbriqués par leur identifiant.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS or not self._is_top_level():
+            return fields
+        if request.query_params.get('nested') == 'ids':
+            for name, field in list(fields.items()):
+                if isinstance(field, serializers.ListSerializer):
+                    fields[name] = serializers.PrimaryKeyRelatedField(many=True, read_only=True, source=field.source)
+                elif isinstance(field, serializers.BaseSerializer):
+                    fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, source=field.source)
+        requested = request.query_params.get('fields')
+        if requested:
+            keep = {name.strip() for name in requested.split(',')}
+            fields = {name: field for name, field in fields.items() if name in keep}
+        return fields
+
+    def _is_top_level(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
 # ---------------------------
 # User Serializer
 # ---------------------------
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'first_name', 'last_name', 'email', 'role']
+        # Le rôle donne les droits : il ne se change que depuis l'administration Django
+        read_only_fields = ['role']
         extra_kwargs = {
             'username': {'label': 'Nom d’utilisateur'},
             'first_name': {'label': 'Prénom'},
@@ -28,13 +64,13 @@ class UserSerializer(serializers.ModelSerializer):
 # ---------------------------
 # SchoolYear / Term / Sequence
 # ---------------------------
-class SequenceSerializer(serializers.ModelSerializer):
+class SequenceSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Sequence
         fields = ['id', 'name', 'order', 'weight', 'term']
 
 
-class TermSerializer(serializers.ModelSerializer):
+class TermSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     sequences = SequenceSerializer(many=True, read_only=True)
 
     class Meta:
@@ -42,18 +78,25 @@ class TermSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'order', 'weight', 'school_year', 'sequences']
 
 
-class SchoolYearSerializer(serializers.ModelSerializer):
+class SchoolYearSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     terms = TermSerializer(many=True, read_only=True)
 
     class Meta:
         model = SchoolYear
-        fields = ['id', 'name', 'start_date', 'end_date', 'is_active', 'terms']
+        fields = ['id', 'name', 'start_date', 'end_date', 'is_active', 'is_closed', 'terms']
+        # La clôture passe par archive_school_year (archivage des lignes)
+        read_only_fields = ['is_closed']
+
+    def validate_is_active(self, value):
+        if value and self.instance is not None and self.instance.is_closed:
+            raise serializers.ValidationError("Une année clôturée ne peut pas redevenir active.")
+        return value
 
 
 # ---------------------------
 # Classroom / Teacher / Student
 # ---------------------------
-class TeacherSerializer(serializers.ModelSerializer):
+class TeacherSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), label='Utilisateur')
     phone = serializers.CharField(label='Téléphone')
     is_active = serializers.BooleanField(label='Actif')
@@ -63,7 +106,7 @@ class TeacherSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'phone', 'is_active']
 
 
-class ClassroomSerializer(serializers.ModelSerializer):
+class ClassroomSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     head_teacher = serializers.PrimaryKeyRelatedField(queryset=Teacher.objects.all(), label='Professeur principal')
     name = serializers.CharField(label='Nom de la classe')
     level = serializers.CharField(label='Niveau')
@@ -74,7 +117,7 @@ class ClassroomSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'level', 'series', 'head_teacher']
 
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     classroom = serializers.PrimaryKeyRelatedField(queryset=Classroom.objects.all(), label='Classe')
     matricule = serializers.CharField(label='Matricule')
     first_name = serializers.CharField(label='Prénom')
@@ -96,7 +139,7 @@ class StudentSerializer(serializers.ModelSerializer):
 # ---------------------------
 # Subject / ClassSubject
 # ---------------------------
-class SubjectSerializer(serializers.ModelSerializer):
+class SubjectSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     code = serializers.CharField(label='Code')
     name = serializers.CharField(label='Nom de la matière')
     category = serializers.CharField(label='Catégorie')
@@ -106,7 +149,7 @@ class SubjectSerializer(serializers.ModelSerializer):
         fields = ['id', 'code', 'name', 'category']
 
 
-class ClassSubjectSerializer(serializers.ModelSerializer):
+class ClassSubjectSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     subject = serializers.PrimaryKeyRelatedField(queryset=Subject.objects.all(), label='Matière')
     teacher = serializers.PrimaryKeyRelatedField(queryset=Teacher.objects.all(), label='Enseignant')
     classroom = serializers.PrimaryKeyRelatedField(queryset=Classroom.objects.all(), label='Classe')
@@ -120,10 +163,11 @@ class ClassSubjectSerializer(serializers.ModelSerializer):
 # ---------------------------
 # Grade Serializer
 # ---------------------------
-class GradeSerializer(serializers.ModelSerializer):
+class GradeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     def validate_value(self, value):
-        if value < 0 or value > 20:
-            raise serializers.ValidationError("La note doit être comprise entre 0 et 20.")
+        scale_max = academic_context()['scale_max']
+        if value < 0 or value > scale_max:
+            raise serializers.ValidationError(f"La note doit être comprise entre 0 et {scale_max:g}.")
         return value
 
     def validate_coefficient(self, coefficient):
@@ -149,19 +193,19 @@ class GradeSerializer(serializers.ModelSerializer):
 # ---------------------------
 # Discipline
 # ---------------------------
-class DisciplineSerializer(serializers.ModelSerializer):
+class DisciplineSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     student = StudentSerializer(read_only=True)
     term = TermSerializer(read_only=True)
 
     class Meta:
         model = Discipline
-        fields = ['id', 'student', 'term', 'absences', 'lates', 'sanctions_text']
+        fields = ['id', 'student', 'term', 'sequence', 'absences', 'lates', 'sanction']
 
 
 # ---------------------------
 # MentionRule
 # ---------------------------
-class MentionRuleSerializer(serializers.ModelSerializer):
+class MentionRuleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = MentionRule
         fields = ['id', 'school_year', 'label', 'min_avg', 'max_avg']
@@ -170,7 +214,7 @@ class MentionRuleSerializer(serializers.ModelSerializer):
 # ---------------------------
 # Settings
 # ---------------------------
-class SettingsSerializer(serializers.ModelSerializer):
+class SettingsSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Settings
         fields = ['id', 'school_year', 'scale_max', 'rounding', 'min_pass_avg', 'localization', 'enable_ai']
@@ -179,41 +223,88 @@ class SettingsSerializer(serializers.ModelSerializer):
 # ---------------------------
 # Bulletin Serializer avec IA
 # ---------------------------
-class BulletinSerializer(serializers.ModelSerializer):
+class BulletinListSerializer(serializers.ListSerializer):
+    """Calcule mentions et appréciations de toute la liste en une fois (voir services.averages)."""
+
+    def to_representation(self, data):
+        bulletins = list(data.all() if hasattr(data, 'all') else data)
+        if {'term_average', 'mention', 'appreciation'} & set(self.child.fields):
+            # Seuls les bulletins générés avant l'enregistrement des résultats sont recalculés
+            self.context['term_results'] = bulletin_term_results([b for b in bulletins if not b.appreciation])
+        return super().to_representation(bulletins)
+
+
+class BulletinSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     student = StudentSerializer(read_only=True)
-    term = TermSerializer(read_only=True)
+    term = serializers.PrimaryKeyRelatedField(source='sequence.term', read_only=True)
+    term_average = serializers.SerializerMethodField()
     mention = serializers.SerializerMethodField()
     appreciation = serializers.SerializerMethodField()
 
     class Meta:
         model = Bulletin
+        list_serializer_class = BulletinListSerializer
         fields = [
-            'id', 'student', 'term', 'pdf_path', 'generated_at',
+            'id', 'student', 'classroom', 'sequence', 'term', 'is_trimester', 'is_annual',
+            'average', 'rank', 'term_average', 'pdf_path', 'generated_at',
             'checksum', 'verified_url', 'mention', 'appreciation'
         ]
 
+    def _term_result(self, obj):
+        # Valeurs enregistrées à la génération, tenues à jour par services.averages
+        # (changement de règle de mention) et la commande reapply_mentions (notes corrigées)
+        if obj.appreciation:
+            return {'term_average': obj.term_average, 'mention': obj.mention, 'appreciation': obj.appreciation}
+        results = self.context.get('term_results')
+        if results is None or obj.id not in results:
+            results = self.context.setdefault('term_results', {})
+            results.update(bulletin_term_results([obj]))
+        return results[obj.id]
+
+    def get_term_average(self, obj):
+        return self._term_result(obj)['term_average']
+
     def get_mention(self, obj):
-        return obj.assign_mention()
+        return self._term_result(obj)['mention']
 
     def get_appreciation(self, obj):
-        return obj.generate_appreciation()
+        return self._term_result(obj)['appreciation']
 
 
 # ---------------------------
 # Archivage
 # ---------------------------
-class ArchivedGradeSerializer(serializers.ModelSerializer):
-    grade = GradeSerializer(read_only=True)
-    school_year = SchoolYearSerializer(read_only=True)
+# Lignes dénormalisées : aucune jointure, les lignes d'origine peuvent ne plus exister
+# (``grade`` et ``bulletin`` sont leur ancien identifiant).
+class ArchivedGradeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    grade = serializers.IntegerField(source='grade_id', read_only=True)
 
     class Meta:
         model = ArchivedGrade
-        fields = ['id', 'grade', 'school_year', 'archived_at']
+        fields = [
+            'id', 'grade', 'school_year', 'matricule', 'student_name', 'classroom_name',
+            'subject_code', 'subject_name', 'coefficient', 'term_name', 'sequence_name', 'sequence_order',
+            'value', 'status', 'comment', 'archived_at',
+        ]
 
 
-class ArchivedBulletinSerializer(serializers.ModelSerializer):
-    bulletin = BulletinSerializer(read_only=True)
+class ArchivedBulletinSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    bulletin = serializers.IntegerField(source='bulletin_id', read_only=True)
 
     class Meta:
         model = ArchivedBulletin
-        fields = ['id', 'bulletin', 'archived_at']
+        fields = [
+            'id', 'bulletin', 'school_year', 'matricule', 'student_name', 'classroom_name',
+            'term_name', 'sequence_name', 'is_trimester', 'is_annual', 'average', 'rank',
+            'term_average', 'mention', 'appreciation', 'comment', 'pdf_path', 'checksum',
+            'generated_at', 'archived_at',
+        ]
+
+
+class ArchivedDisciplineSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedDiscipline
+        fields = [
+            'id', 'school_year', 'matricule', 'student_name', 'classroom_name', 'term_name',
+            'sequence_name', 'absences', 'lates', 'sanction', 'archived_at',
+        ]
@@ -0,0 +1,39 @@
+# ---------------------------
+# Contexte académique courant
+# ---------------------------
+# Année active, trimestre et séquence actifs, canevas actif et paramètres de
+# notation (barème, moyenne de passage, arrondi), résolus une fois puis gardés
+# en cache jusqu'à la prochaine écriture sur l'un de ces modèles (voir versions).
+# Le middleware l'attache à chaque requête (request.academic) et le processeur
+# de contexte le donne aux templates sous le nom ``academic``.
+from Bull.models import BulletinTemplate, SchoolYear, Sequence, Settings, Term
+from Bull.services import versions
+
+MODELS = (SchoolYear, Term, Sequence, BulletinTemplate, Settings)
+
+
+def _default(field):
+    return Settings._meta.get_field(field).default
+
+
+def _build():
+    school_year = SchoolYear.objects.filter(is_active=True).first()
+    # Séquence active de l'année active de préférence, sinon n'importe quelle séquence active
+    sequences = Sequence.objects.filter(active=True).select_related('term__school_year').order_by('id')
+    sequence = (sequences.filter(term__school_year=school_year).first() if school_year else None) or sequences.first()
+    params = Settings.objects.filter(school_year=school_year).order_by('id').first() if school_year else None
+    return {
+        'school_year': school_year,
+        'term': sequence.term if sequence else None,
+        'sequence': sequence,
+        'template': BulletinTemplate.objects.filter(active=True).first(),
+        'settings': params,
+        'scale_max': params.scale_max if params else _default('scale_max'),
+        'pass_mark': params.min_pass_avg if params else _default('min_pass_avg'),
+        'rounding': params.rounding if params else _default('rounding'),
+    }
+
+
+def academic_context():
+    """Dict {school_year, term, sequence, template, settings, scale_max, pass_mark, rounding}."""
+    return versions.cached('academic_context', MODELS, _build)
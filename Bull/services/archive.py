@@ -0,0 +1,143 @@
+# ---------------------------
+# Clôture et archivage d'une année scolaire
+# ---------------------------
+# Une année clôturée quitte les tables chaudes (Bull_grade, Bull_bulletin,
+# Bull_discipline) : ses lignes sont recopiées dans les tables d'archive,
+# dénormalisées (matricule, nom, classe, matière, libellés de période) pour
+# rester lisibles sans les lignes d'origine, puis supprimées. Chaque lot est
+# copié et supprimé dans la même transaction : une interruption laisse chaque
+# ligne soit vivante soit archivée, et relancer la clôture reprend là où elle
+# s'est arrêtée. Les bulletins passent en premier : leur moyenne trimestrielle,
+# leur mention et leur appréciation sont calculées à partir des notes.
+from django.db import connection, transaction
+from django.db.models import DateTimeField, F, TextField, Value
+from django.db.models.functions import Coalesce, Concat
+from django.utils import timezone
+
+from Bull.models import (
+    ArchivedBulletin, ArchivedDiscipline, ArchivedGrade, Bulletin, Discipline, Grade, SchoolYear,
+)
+from Bull.services import versions
+from Bull.services.averages import bulletin_term_results
+from Bull.services.overview import invalidate_overview
+
+BATCH_SIZE = 2000
+
+
+def _name(student):
+    return f"{student.last_name} {student.first_name}".strip()
+
+
+def hot_rows(school_year):
+    """Lignes de l'année encore dans les tables chaudes, par table."""
+    return {
+        'bulletins': Bulletin.objects.filter(sequence__term__school_year=school_year),
+        'disciplines': Discipline.objects.filter(term__school_year=school_year),
+        'grades': Grade.objects.filter(sequence__term__school_year=school_year),
+    }
+
+
+def _archive_bulletins(school_year, ids):
+    bulletins = list(Bulletin.objects.filter(id__in=ids).select_related('student', 'classroom', 'sequence__term'))
+    # Résultats enregistrés à la génération, recalculés pour les bulletins plus anciens
+    results = bulletin_term_results([b for b in bulletins if not b.appreciation])
+    results.update({b.id: {
+        'term_average': b.term_average, 'mention': b.mention, 'appreciation': b.appreciation,
+    } for b in bulletins if b.appreciation})
+    # Remplace les éventuelles fiches d'archive qui ne faisaient que pointer vers la ligne vivante
+    ArchivedBulletin.objects.filter(bulletin_id__in=ids).delete()
+    ArchivedBulletin.objects.bulk_create([ArchivedBulletin(
+        bulletin_id=b.id, school_year=school_year,
+        matricule=b.student.matricule, student_name=_name(b.student), classroom_name=b.classroom.name,
+        term_name=b.sequence.term.name, sequence_name=b.sequence.name,
+        is_trimester=b.is_trimester, is_annual=b.is_annual, average=b.average, rank=b.rank,
+        term_average=results[b.id]['term_average'], mention=results[b.id]['mention'],
+        appreciation=results[b.id]['appreciation'], comment=b.comment or '',
+        pdf_path=b.pdf_path.name or '', checksum=b.checksum, generated_at=b.generated_at,
+    ) for b in bulletins])
+    Bulletin.objects.filter(id__in=ids).delete()
+
+
+def _archive_disciplines(school_year, ids):
+    disciplines = Discipline.objects.filter(id__in=ids).select_related(
+        'student__classroom', 'term', 'sequence', 'sanction',
+    )
+    # La classe est celle de l'élève au moment de la clôture
+    ArchivedDiscipline.objects.bulk_create([ArchivedDiscipline(
+        school_year=school_year, matricule=d.student.matricule, student_name=_name(d.student),
+        classroom_name=d.student.classroom.name, term_name=d.term.name,
+        sequence_name=d.sequence.name if d.sequence else '',
+        absences=d.absences, lates=d.lates, sanction=d.sanction.texte if d.sanction else '',
+    ) for d in disciplines])
+    Discipline.objects.filter(id__in=ids).delete()
+
+
+def _archive_grades(school_year, ids):
+    # Volume principal (élèves x matières x séquences) : copie par INSERT ... SELECT,
+    # sans instancier de modèles. Colonnes d'archive -> expression sur Grade.
+    columns = {
+        'grade_id': F('id'),
+        'school_year_id': Value(school_year.id),
+        'matricule': F('student__matricule'),
+        'student_name': Concat('student__last_name', Value(' '), 'student__first_name'),
+        'classroom_name': F('class_subject__classroom__name'),
+        'subject_code': F('class_subject__subject__code'),
+        'subject_name': F('class_subject__subject__name'),
+        'coefficient': F('class_subject__coefficient'),
+        'term_name': F('sequence__term__name'),
+        'sequence_name': F('sequence__name'),
+        'sequence_order': F('sequence__order'),
+        'value': F('value'),
+        'status': F('status'),
+        'comment': Coalesce('comment', Value(''), output_field=TextField()),
+        'archived_at': Value(timezone.now(), output_field=DateTimeField()),
+    }
+    aliases = {f'_archive_{name}': expression for name, expression in columns.items()}
+    select, params = (
+        Grade.objects.filter(id__in=ids).order_by().annotate(**aliases).values_list(*aliases).query.sql_with_params()
+    )
+    quote = connection.ops.quote_name
+    ArchivedGrade.objects.filter(grade_id__in=ids).delete()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(ArchivedGrade._meta.db_table)} ({', '.join(quote(c) for c in columns)}) {select}",
+            params,
+        )
+    Grade.objects.filter(id__in=ids).delete()
+
+
+ARCHIVERS = {
+    'bulletins': _archive_bulletins,
+    'disciplines': _archive_disciplines,
+    'grades': _archive_grades,
+}
+
+
+def close_school_year(school_year, batch_size=BATCH_SIZE, log=None):
+    """Clôture ``school_year`` et déplace ses lignes chaudes vers les archives, par lots.
+
+    Retourne {table: lignes archivées}. L'année active ne peut pas être clôturée.
+    """
+    if school_year.is_active:
+        raise ValueError(f"L'année {school_year} est l'année active : activez-en une autre avant de la clôturer.")
+    if not school_year.is_closed:
+        # Marquée d'abord : plus aucune note n'est créée pour ses séquences pendant l'archivage
+        SchoolYear.objects.filter(pk=school_year.pk).update(is_closed=True, closed_at=timezone.now())
+        school_year.refresh_from_db()
+        versions.bump(SchoolYear)
+
+    counts = {}
+    for table, queryset in hot_rows(school_year).items():
+        counts[table] = 0
+        while True:
+            # Les lots déjà traités ont quitté la table : on relit toujours le début
+            ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                ARCHIVERS[table](school_year, ids)
+            counts[table] += len(ids)
+            if log:
+                log(f"  {table} : {counts[table]} archivés")
+    invalidate_overview()
+    return counts
@@ -0,0 +1,176 @@
+# ---------------------------
+# Moyennes trimestrielles, mentions et appréciations par lot
+# ---------------------------
+# Même calcul que Grade.calculate_term_average / Bulletin.assign_mention, mais
+# pour toute une page de bulletins : une requête groupée sur les notes validées,
+# une sur les séquences. Les règles de mention d'une année sont transformées une
+# fois en table d'intervalles triée (gardée en cache jusqu'à la prochaine
+# modification d'une règle) : chaque moyenne est résolue par dichotomie.
+# La génération enregistre le résultat sur le bulletin (term_average, mention,
+# appreciation) ; la lecture ne recalcule que les bulletins plus anciens.
+# Les valeurs enregistrées ne suivent pas seules les changements : modifier une
+# règle de mention réattribue les mentions de l'année (à partir des moyennes
+# enregistrées, sans relire les notes) ; après la correction d'une note déjà
+# utilisée, la commande reapply_mentions recalcule les moyennes enregistrées.
+from bisect import bisect_left
+
+from django.db.models import F, Sum
+from django.db.models.signals import post_delete, post_save
+
+from Bull.models import Bulletin, Grade, MentionRule, Sequence
+from Bull.services import versions
+
+BATCH_SIZE = 2000
+
+
+def term_averages(pairs):
+    """Retourne {(student_id, term_id): moyenne ou None} pour les couples demandés."""
+    pairs = set(pairs)
+    if not pairs:
+        return {}
+    student_ids = {student_id for student_id, _ in pairs}
+    term_ids = {term_id for _, term_id in pairs}
+
+    # Moyenne de séquence par élève : somme(note * coef) / somme(coef)
+    rows = Grade.objects.filter(
+        student_id__in=student_ids,
+        sequence__term_id__in=term_ids,
+        status__in=Grade.COUNTED_STATUSES,
+    ).values('student_id', 'sequence_id').annotate(
+        total=Sum(F('value') * F('class_subject__coefficient')),
+        coef=Sum('class_subject__coefficient'),
+    )
+    sequence_avgs = {}
+    for row in rows:
+        if row['coef']:
+            sequence_avgs[(row['student_id'], row['sequence_id'])] = round(row['total'] / row['coef'], 2)
+
+    sequences = Sequence.objects.filter(term_id__in=term_ids).values_list('id', 'term_id', 'weight')
+    averages = {}
+    for student_id, term_id in pairs:
+        weighted_total = 0
+        total_weight = 0
+        for seq_id, seq_term_id, weight in sequences:
+            avg = sequence_avgs.get((student_id, seq_id))
+            if seq_term_id == term_id and avg is not None:
+                weighted_total += avg * weight
+                total_weight += weight
+        averages[(student_id, term_id)] = round(weighted_total / total_weight, 2) if total_weight else None
+    return averages
+
+
+def _build_scale(school_year_id):
+    rules = list(MentionRule.objects.filter(school_year_id=school_year_id).order_by('id').values_list(
+        'min_avg', 'max_avg', 'label'))
+
+    def label_at(value):
+        # Règles qui se chevauchent : la première créée l'emporte, comme MentionRule...first()
+        return next((label for low, high, label in rules if low <= value <= high), None)
+
+    # Bornes de toutes les règles ; entre deux bornes consécutives, la mention est constante
+    bounds = sorted({value for rule in rules for value in rule[:2]})
+    at_bounds = [label_at(value) for value in bounds]
+    between = [None] + [label_at((low + high) / 2) for low, high in zip(bounds, bounds[1:])] + [None]
+    return bounds, at_bounds, between
+
+
+def mention_scale(school_year_id):
+    """(bornes triées, mention sur chaque borne, mention entre deux bornes) des règles de l'année."""
+    return versions.cached(f'mention_scale:{school_year_id}', (MentionRule,), lambda: _build_scale(school_year_id))
+
+
+def mentions_for(school_year_id, averages, scale=None):
+    """Mentions de ``averages`` (None sans moyenne ou hors barème), avec une seule lecture des règles."""
+    bounds, at_bounds, between = scale or mention_scale(school_year_id)
+    labels = []
+    for avg in averages:
+        if avg is None:
+            labels.append(None)
+            continue
+        position = bisect_left(bounds, avg)
+        on_bound = position < len(bounds) and bounds[position] == avg
+        labels.append(at_bounds[position] if on_bound else between[position])
+    return labels
+
+
+def bulletin_term_results(bulletins):
+    """Retourne {bulletin_id: {'term_average', 'mention', 'appreciation'}}.
+
+    Les bulletins doivent être chargés avec ``select_related('sequence__term')``.
+    """
+    bulletins = [b for b in bulletins if b is not None]
+    averages = term_averages((b.student_id, b.sequence.term_id) for b in bulletins)
+    by_year = {}
+    for b in bulletins:
+        by_year.setdefault(b.sequence.term.school_year_id, []).append(b)
+
+    results = {}
+    for school_year_id, year_bulletins in by_year.items():
+        year_averages = [averages.get((b.student_id, b.sequence.term_id)) for b in year_bulletins]
+        for b, avg, mention in zip(year_bulletins, year_averages, mentions_for(school_year_id, year_averages)):
+            results[b.id] = {
+                'term_average': avg,
+                'mention': mention,
+                'appreciation': Bulletin.appreciation_for(avg),
+            }
+    return results
+
+
+def store_term_results(bulletins):
+    """Calcule et enregistre moyenne trimestrielle, mention et appréciation des bulletins (un bulk_update)."""
+    bulletins = list(bulletins)
+    results = bulletin_term_results(bulletins)
+    for b in bulletins:
+        b.term_average, b.mention, b.appreciation = (
+            results[b.id]['term_average'], results[b.id]['mention'], results[b.id]['appreciation'],
+        )
+    Bulletin.objects.bulk_update(bulletins, ['term_average', 'mention', 'appreciation'])
+    return results
+
+
+def refresh_mentions(school_year_id):
+    """Réattribue les mentions enregistrées de l'année d'après leur moyenne ; retourne le nombre modifié."""
+    # Table relue directement : le cache peut ne pas encore avoir vu la modification
+    scale = _build_scale(school_year_id)
+    bulletins = list(Bulletin.objects.filter(
+        sequence__term__school_year_id=school_year_id,
+    ).exclude(appreciation='').only('id', 'term_average', 'mention'))
+    labels = mentions_for(school_year_id, [b.term_average for b in bulletins], scale)
+    changed = []
+    for b, label in zip(bulletins, labels):
+        if b.mention != label:
+            b.mention = label
+            changed.append(b)
+    Bulletin.objects.bulk_update(changed, ['mention'], batch_size=BATCH_SIZE)
+    return len(changed)
+
+
+def reapply_term_results(school_year_id=None, batch_size=BATCH_SIZE):
+    """Recalcule les résultats enregistrés (ou manquants) des bulletins, par lots ; retourne le nombre modifié."""
+    queryset = Bulletin.objects.select_related('sequence__term').order_by('id')
+    if school_year_id is not None:
+        queryset = queryset.filter(sequence__term__school_year_id=school_year_id)
+    fields = ('term_average', 'mention', 'appreciation')
+    changed, last_id = 0, 0
+    while True:
+        bulletins = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not bulletins:
+            return changed
+        last_id = bulletins[-1].id
+        results = bulletin_term_results(bulletins)
+        updates = []
+        for b in bulletins:
+            if any(getattr(b, field) != results[b.id][field] for field in fields):
+                for field in fields:
+                    setattr(b, field, results[b.id][field])
+                updates.append(b)
+        Bulletin.objects.bulk_update(updates, fields)
+        changed += len(updates)
+
+
+def _mention_rule_changed(sender, instance, **kwargs):
+    refresh_mentions(instance.school_year_id)
+
+
+post_save.connect(_mention_rule_changed, sender=MentionRule, dispatch_uid='averages:mentionrule:save')
+post_delete.connect(_mention_rule_changed, sender=MentionRule, dispatch_uid='averages:mentionrule:delete')
@@ -0,0 +1,125 @@
+# ---------------------------
+# Benchmarks : saisie des notes, bulletins, exports
+# ---------------------------
+# Chaque scénario rejoue une requête HTTP (client de test Django, connecté en
+# administrateur) sur un jeu de données généré par loadgen et mesure la durée,
+# le nombre de requêtes SQL et le pic mémoire Python (tracemalloc). Les
+# résultats sont un dict sérialisable en JSON, comparé à une référence
+# enregistrée et à des budgets par la commande ``benchmark``.
+import statistics
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+
+from Bull.models import ClassSubject, Classroom, Grade, Sequence, User
+from Bull.services import loadgen
+from Bull.services.campaign import QueryCounter
+
+DATASETS = {
+    'small': {'classes': 5, 'students': 150, 'subjects': 8},
+    'medium': {'classes': 20, 'students': 1000, 'subjects': 12},
+    'large': {'classes': 100, 'students': 5000, 'subjects': 15},
+}
+METRICS = ('ms', 'queries', 'peak_kb')
+
+
+def _targets():
+    """Ids utilisés par les scénarios : première classe, séquence complète et séquence en cours."""
+    classroom = Classroom.objects.filter(name__startswith=loadgen.DEFAULTS['prefix']).order_by('id').first()
+    sequences = list(Sequence.objects.filter(term__school_year__is_active=True).order_by('term__order', 'order'))
+    class_subject = ClassSubject.objects.filter(classroom=classroom).order_by('id').first()
+    current = Sequence.objects.get(active=True)
+    return {
+        'classroom': classroom.id,
+        'cs': class_subject.id,
+        'done': sequences[0],
+        'current': current,
+        'grades': list(Grade.objects.filter(class_subject=class_subject, sequence=current).values_list('id', flat=True)),
+    }
+
+
+def scenarios(t):
+    """Liste ordonnée (nom, méthode, url, données) : les écritures précèdent les lectures qui en dépendent."""
+    done, current, cs = t['done'], t['current'], t['cs']
+    period = {'classroom': t['classroom'], 'sequence': done.id}
+    return [
+        ('classsubject_students', 'get', f'/classsubject/{cs}/students/', {'term': current.term_id, 'sequence': current.id}),
+        ('save_grades', 'post', f'/classsubject/{cs}/save-grades/',
+         {'term': current.term_id, 'sequence': current.id, **{f'grade_{gid}': 12.5 for gid in t['grades']}}),
+        ('validate_grades', 'get', f'/classsubject/{cs}/validate/', {'term': current.term_id, 'sequence': current.id}),
+        ('calculate_bulletins', 'post', '/bulletins/calculate/', period),
+        ('bulletin_stats', 'get', '/bulletins/stats/', period),
+        ('export_bulletins_excel', 'get', '/bulletins/export/excel/', period),
+        ('export_bulletins_pdf', 'get', '/bulletins/export/pdf/', period),
+        ('dashboard', 'get', '/dashboard/', {}),
+        ('api_students', 'get', '/api/students/', {}),
+        ('api_grades', 'get', '/api/grades/', {}),
+        ('api_classsubjects', 'get', '/api/classsubjects/', {}),
+        ('api_bulletins', 'get', '/api/bulletins/', {}),
+    ]
+
+
+def measure(call, repeat=1):
+    """Durée médiane (ms), requêtes SQL et pic mémoire (Ko) maximaux de ``call()`` sur ``repeat`` exécutions."""
+    durations, queries, peaks, status = [], 0, 0, None
+    for _ in range(repeat):
+        counter = QueryCounter()
+        tracemalloc.start()
+        # Compteur plutôt que connection.queries, plafonné à 9000 entrées
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            response = call()
+            # Les réponses en flux (FileResponse) ne sont produites qu'à la lecture
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+            durations.append((time.perf_counter() - started) * 1000)
+        peaks = max(peaks, tracemalloc.get_traced_memory()[1] // 1024)
+        tracemalloc.stop()
+        queries = max(queries, counter.count)
+        status = response.status_code
+    return {'ms': round(statistics.median(durations), 1), 'queries': queries, 'peak_kb': peaks, 'status': status}
+
+
+def run_dataset(name, only=None, repeat=1, seed=loadgen.DEFAULTS['seed'], log=None):
+    """Génère le jeu ``name`` dans la base courante (à vider au préalable) et mesure chaque scénario."""
+    cache.clear()
+    loadgen.generate_dataset(seed=seed, schools=1, **DATASETS[name])
+    admin = User.objects.create_user(username='bench-admin', password='bench', role='admin')
+    client = Client()
+    client.force_login(admin)
+    targets = _targets()
+    # Échauffement non mesuré (imports, gabarits, session) : un scénario lancé seul reste comparable
+    client.get(f"/classsubject/{targets['cs']}/students/")
+    client.get('/api/classsubjects/')
+    results = {}
+    for scenario, method, url, data in scenarios(targets):
+        if only and scenario not in only:
+            continue
+        results[scenario] = measure(lambda: getattr(client, method)(url, data), repeat)
+        if log:
+            log(f"  {name:<7} {scenario:<24} {results[scenario]['ms']:>9.1f} ms "
+                f"{results[scenario]['queries']:>7} req. {results[scenario]['peak_kb']:>8} Ko")
+    return results
+
+
+def compare(results, reference, tolerance=0.0):
+    """Écarts de ``results`` au-delà de ``reference`` (budgets ou référence x (1 + tolérance)).
+
+    ``reference`` a la forme {jeu: {scénario: {métrique: valeur}}} ; une clé
+    ``*`` au niveau du jeu s'applique à tous les jeux. Retourne une liste de messages.
+    """
+    failures = []
+    for dataset, scenarios_results in results.items():
+        limits = {**reference.get('*', {}), **reference.get(dataset, {})}
+        for scenario, measured in scenarios_results.items():
+            for metric in METRICS:
+                limit = limits.get(scenario, {}).get(metric)
+                if limit is None:
+                    continue
+                allowed = limit * (1 + tolerance)
+                if measured[metric] > allowed:
+                    failures.append(f"{dataset}/{scenario} : {metric} = {measured[metric]} > {allowed:g}")
+    return failures
@@ -0,0 +1,237 @@
+# ---------------------------
+# Stockage des PDF de bulletins : arborescence et archives annuelles
+# ---------------------------
+# Les PDF sont rangés sous bulletins/<année>/<classe>/<période>/<élève>.pdf
+# (generation.bulletin_pdf_path). ``shard_legacy_files`` déplace les fichiers
+# de l'ancien dossier plat (bulletin_<élève>_<séquence>.pdf...) dans cette
+# arborescence et met à jour les chemins enregistrés.
+#
+# Une année clôturée est regroupée dans une archive ZIP (membres compressés,
+# lisible par les outils habituels) : bulletins/archives/<année>.zip. Un index
+# à côté (<année>.idx) liste, triés, des enregistrements de taille fixe
+# (type, période, élève) -> position et taille du membre dans le ZIP : une
+# recherche dichotomique lit quelques dizaines d'octets, sans charger le
+# répertoire central du ZIP, puis le membre est lu directement à sa position.
+# L'index est écrit avant l'échange des fichiers ; pendant l'instant où un
+# ancien index côtoie la nouvelle archive, le CRC enregistré refuse un membre
+# lu au mauvais endroit (read_bundled retourne alors None, jamais une erreur).
+import os
+import re
+import struct
+import zipfile
+import zlib
+
+from django.conf import settings
+
+from Bull.services.generation import ANNUAL, PERIOD_DIRS, SEQUENCE, TRIMESTER, bulletin_pdf_path
+
+KINDS = {SEQUENCE: 1, TRIMESTER: 2, ANNUAL: 3}
+INDEX_MAGIC = b'BULLIDX2'
+# type, période, élève, position des données, taille compressée, taille, méthode, CRC-32
+RECORD = struct.Struct('>BIIQIIBI')
+# Index écrits avant l'ajout du CRC, toujours lisibles
+LEGACY_INDEX = (b'BULLIDX1', struct.Struct('>BIIQIIB'))
+ZIP_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+
+SHARDED = re.compile(r'^(?P<classroom>\d+)/(?P<period>[a-z]+)-(?P<ref>\d+)/(?P<student>\d+)\.pdf$')
+LEGACY = re.compile(r'^bulletin_(?:(?P<kind>trim|annuel)_)?(?P<student>\d+)_(?P<ref>\d+)\.pdf$')
+LEGACY_KINDS = {None: SEQUENCE, 'trim': TRIMESTER, 'annuel': ANNUAL}
+PERIOD_KINDS = {prefix: kind for kind, prefix in PERIOD_DIRS.items()}
+
+
+def _media(*parts):
+    return os.path.join(settings.MEDIA_ROOT, *parts)
+
+
+def bundle_paths(school_year_id):
+    """Chemins absolus (archive ZIP, index) d'une année."""
+    base = _media('bulletins', 'archives', str(school_year_id))
+    return base + '.zip', base + '.idx'
+
+
+# ---------------------------
+# Migration de l'ancien dossier plat
+# ---------------------------
+def plan_legacy_moves():
+    """[(ancien chemin relatif, nouveau chemin relatif)] des PDF du dossier plat bulletins/."""
+    from Bull.models import Bulletin, Sequence, Student, Term
+
+    directory = _media('bulletins')
+    if not os.path.isdir(directory):
+        return []
+    sequence_years = dict(Sequence.objects.values_list('id', 'term__school_year_id'))
+    term_years = dict(Term.objects.values_list('id', 'school_year_id'))
+    # Classe du bulletin enregistré, à défaut classe actuelle de l'élève
+    bulletin_classes = dict(Bulletin.objects.values_list('pdf_path', 'classroom_id'))
+    student_classes = dict(Student.objects.values_list('id', 'classroom_id'))
+    moves = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            match = LEGACY.match(entry.name) if entry.is_file() else None
+            if not match:
+                continue
+            kind = LEGACY_KINDS[match['kind']]
+            student_id, ref_id = int(match['student']), int(match['ref'])
+            year_id = {SEQUENCE: sequence_years.get(ref_id), TRIMESTER: term_years.get(ref_id), ANNUAL: ref_id}[kind]
+            old = os.path.join('bulletins', entry.name)
+            classroom_id = bulletin_classes.get(old) or student_classes.get(student_id)
+            if year_id is None or classroom_id is None:
+                continue
+            moves.append((old, bulletin_pdf_path(kind, student_id, ref_id, year_id, classroom_id)))
+    return moves
+
+
+def shard_legacy_files(dry_run=False, batch_size=1000):
+    """Déplace les PDF du dossier plat et met à jour Bulletin/ArchivedBulletin ; retourne les déplacements."""
+    from django.db import transaction
+
+    from Bull.models import ArchivedBulletin, Bulletin
+
+    moves = plan_legacy_moves()
+    if dry_run:
+        return moves
+    for old, new in moves:
+        os.makedirs(os.path.dirname(_media(new)), exist_ok=True)
+        os.replace(_media(old), _media(new))
+    for start in range(0, len(moves), batch_size):
+        renamed = dict(moves[start:start + batch_size])
+        with transaction.atomic():
+            for model in (Bulletin, ArchivedBulletin):
+                rows = list(model.objects.filter(pdf_path__in=list(renamed)))
+                for row in rows:
+                    row.pdf_path = renamed[str(row.pdf_path)]
+                model.objects.bulk_update(rows, ['pdf_path'])
+    return moves
+
+
+# ---------------------------
+# Archives annuelles
+# ---------------------------
+def _key(kind, ref_id, student_id):
+    return (KINDS[kind], int(ref_id), int(student_id))
+
+
+def _data_offset(handle, info):
+    """Position des données d'un membre : après son en-tête local (dont l'extra peut différer du central)."""
+    handle.seek(info.header_offset)
+    header = ZIP_LOCAL_HEADER.unpack(handle.read(ZIP_LOCAL_HEADER.size))
+    return info.header_offset + ZIP_LOCAL_HEADER.size + header[-2] + header[-1]
+
+
+def _write_index(path, records):
+    """Écrit l'index dans un fichier temporaire et retourne son chemin (à échanger ensuite)."""
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as handle:
+        handle.write(INDEX_MAGIC)
+        for record in sorted(records):
+            handle.write(RECORD.pack(*record))
+    return tmp
+
+
+def pack_school_year(school_year_id, remove=True):
+    """Regroupe bulletins/<année>/ dans l'archive de l'année (ajoutée à l'existante) ; retourne le nombre de PDF."""
+    root = _media('bulletins', str(school_year_id))
+    zip_path, index_path = bundle_paths(school_year_id)
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            relative = os.path.relpath(os.path.join(directory, name), root).replace(os.sep, '/')
+            match = SHARDED.match(relative)
+            if match and match['period'] in PERIOD_KINDS:
+                files[relative] = os.path.join(directory, name)
+    if not files:
+        return 0
+
+    os.makedirs(os.path.dirname(zip_path), exist_ok=True)
+    tmp = zip_path + '.tmp'
+    with zipfile.ZipFile(tmp, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+        if os.path.exists(zip_path):
+            # Les PDF déjà archivés sont repris, sauf s'ils ont été régénérés depuis
+            with zipfile.ZipFile(zip_path) as previous:
+                for info in previous.infolist():
+                    if info.filename not in files:
+                        bundle.writestr(info, previous.read(info))
+        for relative, path in sorted(files.items()):
+            bundle.write(path, arcname=relative)
+    records = []
+    with zipfile.ZipFile(tmp) as bundle, open(tmp, 'rb') as handle:
+        for info in bundle.infolist():
+            match = SHARDED.match(info.filename)
+            key = _key(PERIOD_KINDS[match['period']], match['ref'], match['student'])
+            records.append(key + (
+                _data_offset(handle, info), info.compress_size, info.file_size, info.compress_type, info.CRC,
+            ))
+    index_tmp = _write_index(index_path, records)
+    os.replace(tmp, zip_path)
+    os.replace(index_tmp, index_path)
+    if remove:
+        for path in files.values():
+            os.remove(path)
+        # Dossiers de classe et de période devenus vides
+        for directory, _, _ in sorted(os.walk(root), key=lambda entry: len(entry[0]), reverse=True):
+            if not os.listdir(directory):
+                os.rmdir(directory)
+    return len(files)
+
+
+def _find(index_path, key):
+    try:
+        handle = open(index_path, 'rb')
+    except OSError:
+        return None
+    with handle:
+        magic = handle.read(len(INDEX_MAGIC))
+        if magic == INDEX_MAGIC:
+            layout = RECORD
+        elif magic == LEGACY_INDEX[0]:
+            layout = LEGACY_INDEX[1]
+        else:
+            return None
+        count = (os.fstat(handle.fileno()).st_size - len(magic)) // layout.size
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            handle.seek(len(magic) + middle * layout.size)
+            record = layout.unpack(handle.read(layout.size))
+            if record[:3] < key:
+                low = middle + 1
+            elif record[:3] > key:
+                high = middle
+            else:
+                # Ancien format : pas de CRC à vérifier
+                return record if layout is RECORD else record + (None,)
+    return None
+
+
+def read_bundled(school_year_id, kind, ref_id, student_id):
+    """Contenu du PDF archivé, ou None s'il n'est pas dans l'archive de l'année."""
+    zip_path, index_path = bundle_paths(school_year_id)
+    record = _find(index_path, _key(kind, ref_id, student_id))
+    if record is None:
+        return None
+    _, _, _, offset, compressed_size, size, method, crc = record
+    try:
+        with open(zip_path, 'rb') as handle:
+            handle.seek(offset)
+            data = handle.read(compressed_size)
+        if method == zipfile.ZIP_DEFLATED:
+            data = zlib.decompress(data, -zlib.MAX_WBITS)
+    except (OSError, zlib.error):
+        return None
+    if len(data) != size or (crc is not None and zlib.crc32(data) != crc):
+        return None
+    return data
+
+
+def bulletin_pdf(bulletin):
+    """Contenu du PDF d'un bulletin : fichier généré, à défaut archive de son année ; None si introuvable."""
+    from Bull.services.lookups import bulletin_kind
+
+    if bulletin.pdf_path and os.path.exists(bulletin.pdf_path.path):
+        with open(bulletin.pdf_path.path, 'rb') as handle:
+            return handle.read()
+    kind = bulletin_kind(bulletin)
+    sequence = bulletin.sequence
+    school_year_id = sequence.term.school_year_id
+    ref_id = {SEQUENCE: sequence.id, TRIMESTER: sequence.term_id, ANNUAL: school_year_id}[kind]
+    return read_bundled(school_year_id, kind, ref_id, bulletin.student_id)
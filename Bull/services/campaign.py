@@ -0,0 +1,162 @@
+# ---------------------------
+# Campagne de génération des bulletins (toutes les classes)
+# ---------------------------
+# Planifie le travail par classe, vérifie les prérequis en quelques requêtes
+# groupées, calcule classe par classe puis rend les PDF dans un pool de workers.
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.db import connection, transaction
+from django.db.models import Count, F
+
+from Bull.models import Bulletin, Classroom, Sequence
+from Bull.services import generation
+from Bull.services.pdf import render_bulletin_pdf
+from Bull.services.profiling import span
+from Bull.services.readiness import readiness_report
+
+SCOPES = (generation.SEQUENCE, generation.TRIMESTER, generation.ANNUAL)
+
+
+class QueryCounter:
+    """Compte les requêtes SQL exécutées (fonctionne aussi avec DEBUG = False)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def campaign_sequences(school_year, scope, period):
+    if scope == generation.SEQUENCE:
+        return [period]
+    if scope == generation.TRIMESTER:
+        return list(period.sequences.order_by('order'))
+    return list(Sequence.objects.filter(term__school_year=school_year).order_by('term__order', 'order'))
+
+
+def plan_campaign(school_year, scope, period, classroom_ids=None):
+    """Prépare une entrée par classe avec l'état de ses prérequis.
+
+    Pour une séquence, chaque couple (élève, matière) doit avoir une note validée
+    (voir readiness_report) ; pour un trimestre ou une année, chaque élève doit avoir ses bulletins de séquence.
+    """
+    classrooms = Classroom.objects.annotate(
+        nb_students=Count('students', distinct=True),
+        nb_subjects=Count('class_subjects', distinct=True),
+    ).order_by('name')
+    if classroom_ids:
+        classrooms = classrooms.filter(id__in=classroom_ids)
+    classrooms = list(classrooms)
+    sequences = campaign_sequences(school_year, scope, period)
+
+    done = {}
+    if scope == generation.SEQUENCE:
+        report = readiness_report(period, [c.id for c in classrooms])
+        expected = {c.id: c.nb_students * c.nb_subjects for c in classrooms}
+        done = {cid: entry['ready'] for cid, entry in report.items()}
+    else:
+        expected = {c.id: c.nb_students * len(sequences) for c in classrooms}
+        pairs = Bulletin.objects.filter(
+            sequence__in=sequences,
+            is_trimester=False,
+            is_annual=False,
+            student__classroom_id=F('classroom_id'),
+        ).values_list('classroom_id', 'student_id', 'sequence_id').distinct()
+        for cid, _, _ in pairs:
+            done[cid] = done.get(cid, 0) + 1
+
+    return [{
+        'classroom': c,
+        'students': c.nb_students,
+        'expected': expected[c.id],
+        'missing': expected[c.id] - done.get(c.id, 0),
+        'ready': c.nb_students > 0 and expected[c.id] > 0 and done.get(c.id, 0) >= expected[c.id],
+    } for c in classrooms]
+
+
+def run_campaign(school_year, scope, period, classroom_ids=None, workers=None, executor='process', log=None):
+    """Génère les bulletins de toutes les classes prêtes et retourne un rapport par classe."""
+    if scope not in SCOPES:
+        raise ValueError(f"Portée inconnue : {scope}")
+    log = log or (lambda message: None)
+    sequences = campaign_sequences(school_year, scope, period)
+    entete, pied = generation.load_canevas_text() if scope == generation.SEQUENCE else ('', '')
+    with span('préparation'):
+        plan = plan_campaign(school_year, scope, period, classroom_ids)
+    pool_class = ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor
+
+    reports = []
+    with pool_class(max_workers=workers) as pool:
+        for entry in plan:
+            classroom = entry['classroom']
+            report = {
+                'classroom': classroom.name,
+                'students': entry['students'],
+                'bulletins': 0,
+                'queries': 0,
+                'compute_ms': 0.0,
+                'render_ms': 0.0,
+                'bytes': 0,
+                'status': 'ok',
+            }
+            reports.append(report)
+            if not entry['ready']:
+                report['status'] = f"bloquée ({entry['missing']} manquant(s))" if entry['students'] else 'vide'
+                log(f"{classroom.name} : {report['status']}")
+                continue
+
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                start = time.perf_counter()
+                if scope == generation.SEQUENCE:
+                    recaps = generation.compute_sequence_results(classroom, period)
+                    tasks = generation.sequence_render_tasks(classroom, period, recaps, entete, pied)
+                else:
+                    recaps = generation.compute_consolidated_results(classroom, sequences)
+                    tasks = generation.consolidated_render_tasks(scope, classroom, period, recaps)
+                compute = time.perf_counter() - start
+
+                start = time.perf_counter()
+                # Rendu dans le pool : seuls les spans du processus courant sont mesurés
+                with span('rendu'):
+                    report['bytes'] = sum(pool.map(render_bulletin_pdf, tasks, chunksize=8))
+                report['render_ms'] = round((time.perf_counter() - start) * 1000, 1)
+
+                start = time.perf_counter()
+                with transaction.atomic():
+                    if scope == generation.SEQUENCE:
+                        generation.save_sequence_bulletins(classroom, period, recaps)
+                    else:
+                        generation.save_consolidated_bulletins(scope, classroom, period, sequences, recaps)
+                compute += time.perf_counter() - start
+            report['compute_ms'] = round(compute * 1000, 1)
+            report['queries'] = counter.count
+            report['bulletins'] = len(tasks)
+            log(f"{classroom.name} : {len(tasks)} bulletin(s) générés")
+    return reports
+
+
+def format_report(reports):
+    """Tableau texte des temps et débits par classe."""
+    header = f"{'Classe':<20} {'Élèves':>6} {'Bull.':>6} {'Req.':>5} {'Calcul ms':>10} {'Rendu ms':>10} {'Octets':>10} {'Bull./s':>8}  Statut"
+    lines = [header, '-' * len(header)]
+    totals = {'students': 0, 'bulletins': 0, 'queries': 0, 'compute_ms': 0.0, 'render_ms': 0.0, 'bytes': 0}
+    for r in reports:
+        for key in totals:
+            totals[key] += r[key]
+        lines.append(_report_line(r['classroom'], r, r['status']))
+    lines.append('-' * len(header))
+    lines.append(_report_line('TOTAL', totals, ''))
+    return "\n".join(lines)
+
+
+def _report_line(name, r, status):
+    elapsed = (r['compute_ms'] + r['render_ms']) / 1000
+    throughput = round(r['bulletins'] / elapsed, 1) if elapsed > 0 else 0
+    return (
+        f"{name[:20]:<20} {r['students']:>6} {r['bulletins']:>6} {r['queries']:>5} "
+        f"{r['compute_ms']:>10.1f} {r['render_ms']:>10.1f} {r['bytes']:>10} {throughput:>8}  {status}"
+    )
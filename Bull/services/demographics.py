@@ -0,0 +1,52 @@
+# ---------------------------
+# Effectifs des classes (total, filles, garçons, redoublants)
+# ---------------------------
+# Une seule requête avec agrégation conditionnelle pour n'importe quel ensemble
+# de classes, puis des cumuls par niveau et par série calculés en Python.
+from django.db.models import Count, Q
+
+from Bull.models import Classroom
+
+FIELDS = ('total', 'filles', 'garcons', 'redoublants')
+
+
+def _empty():
+    return dict.fromkeys(FIELDS, 0)
+
+
+def classroom_demographics(classroom_ids=None):
+    """Retourne {classroom_id: {name, level, series, total, filles, garcons, redoublants}}."""
+    classrooms = Classroom.objects.annotate(
+        total=Count('students'),
+        filles=Count('students', filter=Q(students__gender='F')),
+        garcons=Count('students', filter=Q(students__gender='M')),
+        redoublants=Count('students', filter=Q(students__repeater=True)),
+    ).order_by('name')
+    if classroom_ids is not None:
+        classrooms = classrooms.filter(id__in=classroom_ids)
+    return {row['id']: row for row in classrooms.values('id', 'name', 'level', 'series', *FIELDS)}
+
+
+def rollup(stats, key):
+    """Cumule les effectifs par valeur de ``key`` ('level' ou 'series')."""
+    groups = {}
+    for row in stats.values():
+        group = groups.setdefault(row[key] or '-', _empty())
+        for field in FIELDS:
+            group[field] += row[field]
+    return dict(sorted(groups.items()))
+
+
+def school_demographics(classroom_ids=None):
+    """Effectifs par classe, cumuls par niveau et série, et total général."""
+    stats = classroom_demographics(classroom_ids)
+    totals = _empty()
+    for row in stats.values():
+        for field in FIELDS:
+            totals[field] += row[field]
+    return {
+        'classes': stats,
+        'levels': rollup(stats, 'level'),
+        'series': rollup(stats, 'series'),
+        'totals': totals,
+    }
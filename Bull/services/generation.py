@@ -0,0 +1,328 @@
+# ---------------------------
+# Calcul et enregistrement des bulletins d'une classe
+# ---------------------------
+# Partagé par les vues de génération (calculate_bulletins, trimestre, annuel)
+# et par la commande generate_bulletins.
+import os
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from Bull.models import Bulletin, ClassSubject, Grade, Student
+from Bull.services.academic import academic_context
+from Bull.services.averages import store_term_results
+from Bull.services.overview import invalidate_overview
+from Bull.services.pdf import render_bulletin_pdf
+from Bull.services.profiling import span
+
+# Une note verrouillée provient d'une génération précédente : elle reste exploitable
+READY_STATUSES = ('validated', 'locked')
+
+SEQUENCE = 'sequence'
+TRIMESTER = 'trimester'
+ANNUAL = 'annual'
+
+
+def load_canevas_text():
+    """Retourne (entête, pied) extraits du canevas Word actif."""
+    canevas = academic_context()['template']
+    entete_text = ""
+    pied_text = ""
+    if not canevas:
+        return entete_text, pied_text
+    with span('canevas_docx'):
+        from docx import Document
+        if getattr(canevas, 'header_docx', None):
+            try:
+                doc = Document(canevas.header_docx.path)
+                entete_text = "\n".join([p.text for p in doc.paragraphs if p.text.strip()])
+            except Exception:
+                entete_text = ""
+        if getattr(canevas, 'footer_docx', None):
+            try:
+                doc = Document(canevas.footer_docx.path)
+                pied_text = "\n".join([p.text for p in doc.paragraphs if p.text.strip()])
+            except Exception:
+                pied_text = ""
+    return entete_text, pied_text
+
+
+# Préfixe du dossier de période : bulletins/<année>/<classe>/<période>/<élève>.pdf
+PERIOD_DIRS = {SEQUENCE: 'seq', TRIMESTER: 'trim', ANNUAL: 'annuel'}
+
+
+def bulletin_pdf_path(kind, student_id, ref_id, school_year_id, classroom_id):
+    """Chemin relatif à MEDIA_ROOT du PDF d'un bulletin.
+
+    Rangé par année, classe et période (quelques dizaines de fichiers par dossier) ;
+    ``ref_id`` est l'id de la séquence, du trimestre ou de l'année selon ``kind``.
+    """
+    return os.path.join(
+        'bulletins', str(school_year_id), str(classroom_id), f"{PERIOD_DIRS[kind]}-{ref_id}", f"{student_id}.pdf",
+    )
+
+
+def _school_year_id(kind, period):
+    if kind == SEQUENCE:
+        return period.term.school_year_id
+    if kind == TRIMESTER:
+        return period.school_year_id
+    return period.id
+
+
+def consolidated_appreciation(average):
+    if average >= 16:
+        return "Excellent"
+    if average >= 14:
+        return "Très bien"
+    if average >= 12:
+        return "Bien"
+    if average >= 10:
+        return "Passable"
+    return "Insuffisant"
+
+
+def _rank_by_average(recaps):
+    # Rang général : tri stable décroissant, l'ordre alphabétique départage les ex aequo
+    for idx, recap in enumerate(sorted(recaps, key=lambda r: r['average'], reverse=True), 1):
+        recap['rank'] = idx
+
+
+# ---------------------------
+# Bulletins de séquence
+# ---------------------------
+def compute_sequence_results(classroom, sequence):
+    """Calcule notes, moyennes et rangs de la classe pour une séquence (3 requêtes)."""
+    with span('calcul'), span('requêtes'):
+        students = list(Student.objects.filter(classroom=classroom).order_by('last_name', 'first_name'))
+        class_subjects = list(
+            ClassSubject.objects.filter(classroom=classroom).select_related('subject').order_by('subject_id')
+        )
+        # Une seule note par (élève, matière) : en cas de doublon, la note validée l'emporte
+        notes = {}
+        rows = Grade.objects.filter(
+            class_subject__classroom=classroom, sequence=sequence
+        ).values_list('student_id', 'class_subject_id', 'value', 'status')
+        for student_id, cs_id, value, status in rows:
+            key = (student_id, cs_id)
+            if key not in notes or (status in READY_STATUSES and notes[key][1] not in READY_STATUSES):
+                notes[key] = (value if value is not None else 0, status)
+
+    with span('calcul'), span('classement'):
+        digits = academic_context()['rounding']
+        # Rang par matière (les ex aequo partagent le meilleur rang)
+        rangs_matiere = {}
+        for cs in class_subjects:
+            ordered = sorted((notes.get((s.id, cs.id), (0, None))[0] for s in students), reverse=True)
+            for s in students:
+                note = notes.get((s.id, cs.id), (0, None))[0]
+                rangs_matiere[(cs.id, s.id)] = ordered.index(note) + 1
+
+        recaps = []
+        for student in students:
+            total = 0
+            total_coef = 0
+            recap_notes = []
+            for cs in class_subjects:
+                note = notes.get((student.id, cs.id), (0, None))[0]
+                coef = cs.coefficient
+                total += note * coef
+                total_coef += coef
+                recap_notes.append({
+                    'matiere': cs.subject.name,
+                    'note': note,
+                    'coef': coef,
+                    'som_coef': total_coef,
+                    'rang_matiere': rangs_matiere[(cs.id, student.id)],
+                    'rang_general': None,  # rempli après le classement
+                })
+            avg = round(total / total_coef, digits) if total_coef > 0 else 0
+            recaps.append({
+                'student': student,
+                'recap_notes': recap_notes,
+                'average': avg,
+                'total_coef': total_coef,
+            })
+        _rank_by_average(recaps)
+        for recap in recaps:
+            for note in recap['recap_notes']:
+                note['rang_general'] = recap['rank']
+    return recaps
+
+
+def sequence_render_tasks(classroom, sequence, recaps, entete='', pied=''):
+    tasks = []
+    for recap in recaps:
+        student = recap['student']
+        path = os.path.join(settings.MEDIA_ROOT, bulletin_pdf_path(
+            SEQUENCE, student.id, sequence.id, _school_year_id(SEQUENCE, sequence), classroom.id,
+        ))
+        tasks.append((SEQUENCE, path, {
+            'entete': entete,
+            'pied': pied,
+            'student_name': f"{student.last_name} {student.first_name}",
+            'classroom_name': classroom.name,
+            'sequence_name': sequence.name,
+            'average': recap['average'],
+            'rank': recap['rank'],
+            'recap_notes': recap['recap_notes'],
+        }))
+    return tasks
+
+
+def save_sequence_bulletins(classroom, sequence, recaps):
+    """Enregistre les bulletins de séquence puis verrouille les notes de la classe."""
+    _save_bulletins(
+        classroom, sequence, recaps,
+        lookup=Q(sequence=sequence, is_trimester=False, is_annual=False),
+        path_for=lambda student: bulletin_pdf_path(
+            SEQUENCE, student.id, sequence.id, _school_year_id(SEQUENCE, sequence), classroom.id,
+        ),
+    )
+    # La moyenne du trimestre change à chaque séquence : résultats de tous les bulletins du trimestre
+    with span('enregistrement'), span('mentions'):
+        store_term_results(Bulletin.objects.filter(
+            classroom=classroom, sequence__term_id=sequence.term_id,
+        ).select_related('sequence__term'))
+    # updated_at est mis à jour explicitement (update() ignore auto_now) pour les feuilles synchronisées
+    with span('enregistrement'), span('verrouillage'):
+        Grade.objects.filter(class_subject__classroom=classroom, sequence=sequence).exclude(status='locked').update(
+            status='locked', updated_at=timezone.now()
+        )
+
+
+# ---------------------------
+# Bulletins trimestriels et annuels
+# ---------------------------
+def missing_sequence_bulletins(classroom, sequences):
+    """Liste des (élève, séquence) sans bulletin de séquence."""
+    students = Student.objects.filter(classroom=classroom).order_by('last_name', 'first_name')
+    existing = set(Bulletin.objects.filter(
+        student__classroom=classroom, sequence__in=sequences, is_trimester=False, is_annual=False
+    ).values_list('student_id', 'sequence_id'))
+    return [
+        f"{student.last_name} {student.first_name} - {seq.name}"
+        for student in students for seq in sequences
+        if (student.id, seq.id) not in existing
+    ]
+
+
+def compute_consolidated_results(classroom, sequences):
+    """Moyenne et rang de chaque élève à partir de ses bulletins de séquence."""
+    with span('calcul'), span('requêtes'):
+        students = list(Student.objects.filter(classroom=classroom).order_by('last_name', 'first_name'))
+        digits = academic_context()['rounding']
+        by_student = {}
+        seq_bulletins = Bulletin.objects.filter(
+            student__classroom=classroom, sequence__in=sequences, is_trimester=False, is_annual=False
+        ).select_related('sequence').order_by('sequence__term__order', 'sequence__order')
+        for b in seq_bulletins:
+            by_student.setdefault(b.student_id, []).append(b)
+
+    with span('calcul'), span('classement'):
+        recaps = []
+        for student in students:
+            bulletins = by_student.get(student.id, [])
+            moyennes = [b.average for b in bulletins if b.average is not None]
+            average = round(sum(moyennes) / len(moyennes), digits) if moyennes else 0
+            recaps.append({
+                'student': student,
+                'average': average,
+                'appreciation': consolidated_appreciation(average),
+                'sequence_lines': [
+                    f"Séquence {b.sequence.name} : Moyenne {b.average} | Rang {b.rank}" for b in bulletins
+                ],
+            })
+        _rank_by_average(recaps)
+    return recaps
+
+
+def consolidated_render_tasks(kind, classroom, period, recaps):
+    if kind == TRIMESTER:
+        labels = ("Bulletin Trimestriel", f"Trimestre : {period.name}", "Moyenne trimestre", "Rang trimestre")
+    else:
+        labels = ("Bulletin Annuel", f"Année : {period.name}", "Moyenne annuelle", "Rang annuel")
+    tasks = []
+    for recap in recaps:
+        student = recap['student']
+        path = os.path.join(settings.MEDIA_ROOT, bulletin_pdf_path(
+            kind, student.id, period.id, _school_year_id(kind, period), classroom.id,
+        ))
+        tasks.append((kind, path, {
+            'title': labels[0],
+            'student_name': f"{student.last_name} {student.first_name}",
+            'classroom_name': classroom.name,
+            'period_label': labels[1],
+            'average_label': labels[2],
+            'rank_label': labels[3],
+            'average': recap['average'],
+            'rank': recap['rank'],
+            'appreciation': recap['appreciation'],
+            'sequence_lines': recap['sequence_lines'],
+        }))
+    return tasks
+
+
+def save_consolidated_bulletins(kind, classroom, period, sequences, recaps):
+    first_sequence = sequences[0] if sequences else None
+    lookup = Q(is_trimester=(kind == TRIMESTER), is_annual=(kind == ANNUAL), sequence=first_sequence)
+    _save_bulletins(
+        classroom, first_sequence, recaps,
+        lookup=lookup,
+        path_for=lambda student: bulletin_pdf_path(
+            kind, student.id, period.id, _school_year_id(kind, period), classroom.id,
+        ),
+        extra=lambda recap: {
+            'comment': recap['appreciation'],
+            'is_trimester': kind == TRIMESTER,
+            'is_annual': kind == ANNUAL,
+        },
+    )
+    with span('enregistrement'), span('mentions'):
+        store_term_results(Bulletin.objects.filter(lookup, classroom=classroom).select_related('sequence__term'))
+
+
+def render_tasks(tasks):
+    """Rendu séquentiel ; retourne le nombre d'octets écrits."""
+    with span('rendu'):
+        return sum(render_bulletin_pdf(task) for task in tasks)
+
+
+def _save_bulletins(classroom, sequence, recaps, lookup, path_for, extra=None):
+    with span('enregistrement'), span('bulletins'):
+        _upsert_bulletins(classroom, sequence, recaps, lookup, path_for, extra)
+
+
+def _upsert_bulletins(classroom, sequence, recaps, lookup, path_for, extra):
+    # Mise à jour groupée : un SELECT, un bulk_update et un bulk_create
+    existing = {
+        b.student_id: b
+        for b in Bulletin.objects.filter(lookup, classroom=classroom, student__in=[r['student'] for r in recaps])
+    }
+    to_create = []
+    to_update = []
+    fields = set()
+    for recap in recaps:
+        student = recap['student']
+        values = {
+            'pdf_path': path_for(student),
+            'average': recap['average'],
+            'rank': recap['rank'],
+        }
+        if extra:
+            values.update(extra(recap))
+        fields.update(values)
+        bulletin = existing.get(student.id)
+        if bulletin is None:
+            to_create.append(Bulletin(student=student, classroom=classroom, sequence=sequence, **values))
+        else:
+            for field, value in values.items():
+                setattr(bulletin, field, value)
+            to_update.append(bulletin)
+    if to_update:
+        Bulletin.objects.bulk_update(to_update, sorted(fields))
+    if to_create:
+        Bulletin.objects.bulk_create(to_create)
+        # bulk_create n'envoie pas post_save
+        invalidate_overview()
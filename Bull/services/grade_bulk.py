@@ -0,0 +1,257 @@
+# ---------------------------
+# Écritures groupées de notes (API)
+# ---------------------------
+# Toutes les vérifications se font sur des dictionnaires préchargés (droits par
+# ClassSubject, notes existantes, classes des élèves, trimestre des séquences),
+# puis les changements sont appliqués par un bulk_update et un bulk_create dans
+# une transaction. Chaque élément reçoit son propre résultat.
+import hashlib
+import json
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from Bull.models import ClassSubject, Grade, IdempotentRequest, Sequence, Student
+from Bull.services.academic import academic_context
+from Bull.services.permissions import MANAGER_ROLES, managed_class_subject_ids
+
+STATUS_ACTIONS = {'validate': 'validated', 'lock': 'locked'}
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _error(index, code, message, grade_id=None):
+    return {'index': index, 'id': grade_id, 'status': 'error', 'code': code, 'error': message}
+
+
+def upsert_grades(user, items):
+    """Crée ou met à jour une liste de notes.
+
+    Chaque élément contient ``id`` ou le triplet ``student``/``class_subject``/``sequence``,
+    plus ``value`` et éventuellement ``comment``. Retourne la liste des résultats.
+    """
+    parsed = []
+    for item in items:
+        item = item if isinstance(item, dict) else {}
+        parsed.append({
+            'id': _as_int(item.get('id')),
+            'student': _as_int(item.get('student')),
+            'class_subject': _as_int(item.get('class_subject')),
+            'sequence': _as_int(item.get('sequence')),
+            'value': item.get('value'),
+            'has_value': 'value' in item,
+            'comment': item.get('comment'),
+            'has_comment': 'comment' in item,
+        })
+
+    # Préchargement : notes existantes (par id et par triplet), élèves, séquences, droits
+    ids = {p['id'] for p in parsed if p['id']}
+    triples = [p for p in parsed if not p['id']]
+    existing_filter = Q(id__in=ids)
+    if triples:
+        existing_filter |= Q(
+            student_id__in={p['student'] for p in triples},
+            class_subject_id__in={p['class_subject'] for p in triples},
+            sequence_id__in={p['sequence'] for p in triples},
+        )
+    by_id = {}
+    by_triple = {}
+    for grade in Grade.objects.filter(existing_filter).order_by('id'):
+        by_id[grade.id] = grade
+        by_triple.setdefault((grade.student_id, grade.class_subject_id, grade.sequence_id), grade)
+    for p in parsed:
+        grade = by_id.get(p['id'])
+        if grade is not None:
+            p['student'], p['class_subject'], p['sequence'] = grade.student_id, grade.class_subject_id, grade.sequence_id
+
+    cs_classrooms = dict(ClassSubject.objects.filter(
+        id__in={p['class_subject'] for p in parsed}
+    ).values_list('id', 'classroom_id'))
+    student_classrooms = dict(Student.objects.filter(
+        id__in={p['student'] for p in parsed}
+    ).values_list('id', 'classroom_id'))
+    sequence_terms = dict(Sequence.objects.filter(
+        id__in={p['sequence'] for p in parsed}
+    ).values_list('id', 'term_id'))
+    allowed = managed_class_subject_ids(user, cs_classrooms)
+    scale_max = academic_context()['scale_max']
+    can_edit_validated = getattr(user, 'role', None) in MANAGER_ROLES
+
+    now = timezone.now()
+    results = []
+    to_update = {}
+    to_create = {}
+    for index, p in enumerate(parsed):
+        if p['id'] and p['id'] not in by_id:
+            results.append(_error(index, 'not_found', "Note introuvable.", p['id']))
+            continue
+        if p['class_subject'] not in cs_classrooms or p['student'] not in student_classrooms or p['sequence'] not in sequence_terms:
+            results.append(_error(index, 'invalid', "Élève, matière ou séquence inconnue."))
+            continue
+        if student_classrooms[p['student']] != cs_classrooms[p['class_subject']]:
+            results.append(_error(index, 'invalid', "L'élève n'est pas dans la classe de cette matière."))
+            continue
+        if p['class_subject'] not in allowed:
+            results.append(_error(index, 'forbidden', "Vous ne gérez pas cette matière.", p['id']))
+            continue
+        triple = (p['student'], p['class_subject'], p['sequence'])
+        grade = by_id.get(p['id']) or by_triple.get(triple) or to_create.get(triple)
+        value = grade.value if grade is not None else None
+        if p['has_value']:
+            # Une valeur vide vaut 0, comme dans la saisie web
+            try:
+                value = 0.0 if p['value'] in (None, '') else float(p['value'])
+            except (TypeError, ValueError):
+                value = -1
+        if value is None or value < 0 or value > scale_max:
+            results.append(_error(index, 'invalid_value', f"La note doit être comprise entre 0 et {scale_max:g}.", p['id']))
+            continue
+        if grade is not None and grade.status == 'locked':
+            results.append(_error(index, 'locked', "Note verrouillée.", grade.id))
+            continue
+        if grade is not None and grade.status == 'validated' and not can_edit_validated:
+            results.append(_error(index, 'validated', "Note validée : modifiable seulement par l'administration.", grade.id))
+            continue
+
+        if grade is None:
+            grade = Grade(
+                student_id=p['student'], class_subject_id=p['class_subject'], sequence_id=p['sequence'],
+                term_id=sequence_terms[p['sequence']], status='draft', created_by=user,
+            )
+            to_create[triple] = grade
+        elif grade.pk:
+            to_update[grade.pk] = grade
+        grade.value = value
+        if p['has_comment']:
+            grade.comment = p['comment']
+        grade.updated_by = user
+        grade.updated_at = now
+        results.append({'index': index, 'grade': grade, 'status': 'updated' if grade.pk else 'created'})
+
+    with transaction.atomic():
+        if to_update:
+            Grade.objects.bulk_update(list(to_update.values()), ['value', 'comment', 'updated_by', 'updated_at'])
+        if to_create:
+            Grade.objects.bulk_create(list(to_create.values()))
+    return [_finalize(r) for r in results]
+
+
+def change_status(user, action, ids=None, class_subject=None, sequence=None):
+    """Valide ou verrouille des notes (liste d'ids ou couple matière/séquence)."""
+    if action not in STATUS_ACTIONS:
+        raise ValueError(f"Action inconnue : {action}")
+    if getattr(user, 'role', None) not in MANAGER_ROLES:
+        raise PermissionError("Seuls l'administration et le secrétariat peuvent valider ou verrouiller des notes.")
+    target = STATUS_ACTIONS[action]
+    if ids is not None:
+        grades = Grade.objects.filter(id__in=ids)
+    else:
+        grades = Grade.objects.filter(class_subject_id=class_subject, sequence_id=sequence)
+
+    now = timezone.now()
+    results = []
+    changed = []
+    for grade in grades.order_by('id'):
+        if grade.status == target or grade.status == 'locked':
+            results.append({'id': grade.id, 'status': 'unchanged'})
+            continue
+        if action == 'validate' and (grade.value is None or grade.value <= 0):
+            results.append({'id': grade.id, 'status': 'error', 'code': 'zero', 'error': "Note nulle ou ≤ 0."})
+            continue
+        if action == 'lock' and grade.status != 'validated':
+            results.append({'id': grade.id, 'status': 'error', 'code': 'not_validated', 'error': "Seule une note validée peut être verrouillée."})
+            continue
+        grade.status = target
+        grade.updated_by = user
+        grade.updated_at = now
+        if action == 'validate':
+            grade.validated_by = user
+        changed.append(grade)
+        results.append({'id': grade.id, 'status': target})
+    if ids is not None:
+        found = {r['id'] for r in results}
+        results.extend({'id': i, 'status': 'error', 'code': 'not_found', 'error': "Note introuvable."} for i in ids if i not in found)
+
+    with transaction.atomic():
+        if changed:
+            Grade.objects.bulk_update(changed, ['status', 'updated_by', 'validated_by', 'updated_at'])
+    return results
+
+
+def sync_grades(user, changes):
+    """Rejoue une file de modifications saisies hors ligne, en une transaction.
+
+    Chaque modification porte ``id``, ``value`` et ``base_updated_at`` (le ``updated_at``
+    connu du client). Si la note a changé côté serveur depuis, elle n'est pas écrasée :
+    le résultat ``conflict`` renvoie l'état serveur pour que le client tranche.
+    """
+    with transaction.atomic():
+        ids = {_as_int(c.get('id')) for c in changes if isinstance(c, dict)}
+        current = {g.id: g for g in Grade.objects.filter(id__in=ids)}
+        results = {}
+        applicable = []
+        positions = []
+        for index, change in enumerate(changes):
+            change = change if isinstance(change, dict) else {}
+            grade = current.get(_as_int(change.get('id')))
+            base = parse_datetime(str(change.get('base_updated_at') or ''))
+            if grade is not None and base is not None and grade.updated_at > base:
+                results[index] = {
+                    'index': index, 'id': grade.id, 'status': 'conflict',
+                    'value': grade.value, 'grade_status': grade.status, 'updated_at': grade.updated_at.isoformat(),
+                }
+                continue
+            applicable.append({key: change[key] for key in ('id', 'value', 'comment') if key in change})
+            positions.append(index)
+        for index, result in zip(positions, upsert_grades(user, applicable)):
+            result['index'] = index
+            results[index] = result
+    return [results[i] for i in range(len(changes))]
+
+
+def _finalize(result):
+    grade = result.pop('grade', None)
+    if grade is not None:
+        result['id'] = grade.pk
+        result['value'] = grade.value
+        result['updated_at'] = grade.updated_at.isoformat()
+    return result
+
+
+# ---------------------------
+# Idempotence
+# ---------------------------
+def run_idempotent(user, endpoint, key, payload, func):
+    """Exécute ``func() -> (status_code, data)`` une seule fois par (utilisateur, endpoint, clé).
+
+    Une nouvelle tentative avec la même clé rejoue la réponse mémorisée ; la même
+    clé avec un contenu différent renvoie 409.
+    """
+    if not key:
+        return func()
+    request_hash = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    stored = IdempotentRequest.objects.filter(user=user, endpoint=endpoint, key=key).first()
+    if stored is None:
+        try:
+            with transaction.atomic():
+                status_code, data = func()
+                IdempotentRequest.objects.create(
+                    user=user, endpoint=endpoint, key=key, request_hash=request_hash,
+                    status_code=status_code, response=data,
+                )
+            return status_code, data
+        except IntegrityError:
+            # Requête concurrente avec la même clé : sa réponse fait foi
+            stored = IdempotentRequest.objects.filter(user=user, endpoint=endpoint, key=key).first()
+            if stored is None:
+                raise
+    if stored.request_hash != request_hash:
+        return 409, {'error': "Clé d'idempotence déjà utilisée pour une autre requête."}
+    return stored.status_code, stored.response
@@ -0,0 +1,96 @@
+# ---------------------------
+# Feuille de notes compacte (format colonnes) pour les clients hors ligne
+# ---------------------------
+# Élèves et matières ne sont envoyés qu'une fois ; les notes forment des matrices
+# [élève][matière] alignées sur ces deux listes. La version (ETag) se calcule
+# sans charger les notes (une agrégation) : élèves et matières, peu nombreux,
+# sont relus colonne par colonne, ce qui permet de répondre 304 sans construire
+# la feuille.
+import hashlib
+
+from django.db.models import Count, Max
+
+from Bull.models import ClassSubject, Grade, Student
+
+STATUS_CODES = {'draft': 0, 'validated': 1, 'locked': 2}
+MISSING = -1
+
+
+def _grades(classroom, sequence):
+    return Grade.objects.filter(
+        sequence=sequence,
+        class_subject__classroom=classroom,
+        student__classroom=classroom,
+    )
+
+
+def _students(classroom):
+    return list(Student.objects.filter(classroom=classroom).order_by('last_name', 'first_name', 'id').values_list(
+        'id', 'matricule', 'last_name', 'first_name'))
+
+
+def _subjects(classroom):
+    return list(ClassSubject.objects.filter(classroom=classroom).order_by('subject__name', 'id').values_list(
+        'id', 'subject_id', 'subject__code', 'subject__name', 'coefficient'))
+
+
+def sheet_version(classroom, sequence):
+    """Empreinte de la feuille : change dès qu'une note change, ou une colonne élève ou matière renvoyée."""
+    grades = _grades(classroom, sequence).aggregate(nb=Count('id'), last_id=Max('id'), last_update=Max('updated_at'))
+    raw = f"{classroom.pk}:{sequence.pk}:{grades}:{_students(classroom)}:{_subjects(classroom)}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:20], grades['last_update']
+
+
+def build_sheet(classroom, sequence):
+    students = _students(classroom)
+    subjects = _subjects(classroom)
+    row_of = {s[0]: i for i, s in enumerate(students)}
+    col_of = {s[0]: j for j, s in enumerate(subjects)}
+
+    values = [[None] * len(subjects) for _ in students]
+    statuses = [[MISSING] * len(subjects) for _ in students]
+    ids = [[None] * len(subjects) for _ in students]
+    rows = _grades(classroom, sequence).order_by('id').values_list('id', 'student_id', 'class_subject_id', 'value', 'status')
+    for grade_id, student_id, cs_id, value, status in rows:
+        i, j = row_of.get(student_id), col_of.get(cs_id)
+        # En cas de doublon, la première note (id le plus petit) fait foi
+        if i is None or j is None or ids[i][j] is not None:
+            continue
+        ids[i][j] = grade_id
+        values[i][j] = value
+        statuses[i][j] = STATUS_CODES.get(status, MISSING)
+
+    return {
+        'classroom': classroom.pk,
+        'sequence': sequence.pk,
+        'status_codes': STATUS_CODES,
+        'students': {
+            'id': [s[0] for s in students],
+            'matricule': [s[1] for s in students],
+            'name': [f"{s[2]} {s[3]}" for s in students],
+        },
+        'subjects': {
+            'id': [s[0] for s in subjects],
+            'subject': [s[1] for s in subjects],
+            'code': [s[2] for s in subjects],
+            'name': [s[3] for s in subjects],
+            'coefficient': [s[4] for s in subjects],
+        },
+        'ids': ids,
+        'values': values,
+        'statuses': statuses,
+    }
+
+
+def sheet_changes(classroom, sequence, since):
+    """Notes modifiées après ``since`` (les suppressions ne sont pas suivies)."""
+    rows = _grades(classroom, sequence).filter(updated_at__gt=since).order_by('id').values_list(
+        'id', 'student_id', 'class_subject_id', 'value', 'status')
+    changes = {'id': [], 'student': [], 'class_subject': [], 'value': [], 'status': []}
+    for grade_id, student_id, cs_id, value, status in rows:
+        changes['id'].append(grade_id)
+        changes['student'].append(student_id)
+        changes['class_subject'].append(cs_id)
+        changes['value'].append(value)
+        changes['status'].append(STATUS_CODES.get(status, MISSING))
+    return {'classroom': classroom.pk, 'sequence': sequence.pk, 'changes': changes}
@@ -0,0 +1,226 @@
+# ---------------------------
+# Jeu de données de charge (benchmarks)
+# ---------------------------
+# Construit un jeu de données à l'échelle d'établissements réels (classes,
+# élèves, matières, trimestres/séquences, notes) entièrement par bulk_create en
+# gros lots : le signal post_save de Student (une requête par note) est ainsi
+# évité. Les notes, seules à se compter en millions, sont insérées par
+# executemany : la compilation ORM de bulk_create (plafonnée à ~90 lignes par
+# requête sous SQLite) en coûterait les trois quarts du temps. Un million de
+# notes se crée ainsi en moins d'une minute. Tout est tiré
+# d'un random.Random(seed) : un même seed donne exactement les mêmes données.
+# Le modèle n'ayant pas d'établissement, chaque « école » est un préfixe des
+# noms de classes, matricules et comptes enseignants ; l'année, les séquences
+# et les matières sont partagées.
+import random
+from datetime import date, timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from Bull.models import (
+    ClassSubject, Classroom, Grade, SchoolYear, Sequence, Student, StudentSubject, Subject, Teacher, Term, User,
+)
+from Bull.services import versions
+from Bull.services.overview import invalidate_overview
+
+DEFAULTS = {
+    'schools': 1,
+    'classes': 100,
+    'students': 5000,
+    'subjects': 15,
+    'terms': 3,
+    'sequences': 2,
+    'filled': None,  # séquences déjà saisies (défaut : toutes)
+    'prefix': 'LD',
+    'seed': 42,
+    'batch_size': 5000,
+}
+
+SUBJECTS = [
+    ('MAT', 'Mathématiques', 4), ('FRA', 'Français', 4), ('ANG', 'Anglais', 3), ('HG', 'Histoire-Géographie', 2),
+    ('PCT', 'Physique-Chimie-Technologie', 3), ('SVT', 'Sciences de la vie et de la Terre', 2),
+    ('ECM', 'Éducation civique et morale', 1), ('EPS', 'Éducation physique et sportive', 1),
+    ('INF', 'Informatique', 2), ('ESP', 'Espagnol', 2), ('ALL', 'Allemand', 2), ('PHI', 'Philosophie', 2),
+    ('LCN', 'Langues et cultures nationales', 1), ('TM', 'Travail manuel', 1), ('MUS', 'Musique', 1),
+]
+LEVELS = ['6ème', '5ème', '4ème', '3ème', '2nde', '1ère', 'Tle']
+SERIES = ['A', 'C', 'D']
+FIRST_NAMES = [
+    'Aïcha', 'Alain', 'Armelle', 'Boris', 'Brice', 'Carine', 'Cédric', 'Christelle', 'Daniel', 'Divine',
+    'Emmanuel', 'Estelle', 'Fabrice', 'Florence', 'Franck', 'Gaëlle', 'Hervé', 'Ines', 'Jean', 'Joëlle',
+    'Junior', 'Laure', 'Linda', 'Marc', 'Marie', 'Michel', 'Nadège', 'Olivier', 'Patricia', 'Paul',
+    'Rita', 'Samuel', 'Sandrine', 'Serge', 'Sylvie', 'Thierry', 'Ulrich', 'Vanessa', 'Yannick', 'Yvonne',
+]
+LAST_NAMES = [
+    'Abena', 'Atangana', 'Bello', 'Biya', 'Djomo', 'Ebogo', 'Essomba', 'Fotso', 'Kamga', 'Kengne',
+    'Mbarga', 'Mballa', 'Mbida', 'Moussa', 'Ndongo', 'Ngono', 'Njoya', 'Nkoulou', 'Onana', 'Owona',
+    'Tagne', 'Tchakounté', 'Tchoupo', 'Wamba', 'Yombi', 'Zambo',
+]
+CITIES = ['Yaoundé', 'Douala', 'Bafoussam', 'Garoua', 'Bamenda', 'Ngaoundéré', 'Bertoua', 'Ebolowa']
+
+
+def _bulk(model, objects, batch_size):
+    """bulk_create par lots sans matérialiser toute la séquence ; retourne le nombre créé."""
+    objects = iter(objects)
+    created = 0
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return created
+        model.objects.bulk_create(batch, batch_size=batch_size)
+        created += len(batch)
+
+
+GRADE_FIELDS = (
+    'student', 'class_subject', 'term', 'sequence', 'value', 'status',
+    'created_by', 'updated_by', 'validated_by', 'created_at', 'updated_at',
+)
+
+
+def _insert_rows(model, fields, rows, batch_size):
+    """INSERT par executemany de tuples déjà prêts pour la base ; retourne le nombre inséré."""
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(name).column) for name in fields)
+    sql = f"INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({', '.join(['%s'] * len(fields))})"
+    rows = iter(rows)
+    inserted = 0
+    with connection.cursor() as cursor:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return inserted
+            cursor.executemany(sql, batch)
+            inserted += len(batch)
+
+
+def _note(rng, ability, difficulty):
+    """Note sur 20 au quart de point : niveau de l'élève + difficulté de la matière + aléa."""
+    value = rng.gauss(ability + difficulty, 2.5)
+    return min(20.0, max(0.0, round(value * 4) / 4))
+
+
+def _periods(year, count_terms, count_sequences):
+    school_year = SchoolYear.objects.filter(name=year).first()
+    if school_year is None:
+        start = date(int(year[:4]), 9, 1)
+        SchoolYear.objects.update(is_active=False)
+        school_year = SchoolYear.objects.create(
+            name=year, start_date=start, end_date=start + timedelta(days=300), is_active=True,
+        )
+    sequences = []
+    for t in range(1, count_terms + 1):
+        term, _ = Term.objects.get_or_create(school_year=school_year, order=t, defaults={'name': f'T{t}'})
+        for s in range(1, count_sequences + 1):
+            sequence, _ = Sequence.objects.get_or_create(
+                term=term, order=s, defaults={'name': f'S{(t - 1) * count_sequences + s}'},
+            )
+            sequences.append(sequence)
+    return school_year, sequences
+
+
+def generate_dataset(**options):
+    """Crée le jeu de données ; ``options`` reprend les clés de DEFAULTS. Retourne les effectifs créés."""
+    opts = {**DEFAULTS, **{k: v for k, v in options.items() if v is not None}}
+    rng = random.Random(opts['seed'])
+    batch_size = opts['batch_size']
+    subjects_spec = [SUBJECTS[i % len(SUBJECTS)] for i in range(opts['subjects'])]
+    password = make_password(None)
+    counts = dict.fromkeys(('classrooms', 'teachers', 'students', 'student_subjects', 'grades'), 0)
+
+    with transaction.atomic():
+        school_year, sequences = _periods('2024-2025', opts['terms'], opts['sequences'])
+        filled = len(sequences) if opts['filled'] is None else min(opts['filled'], len(sequences))
+        # La dernière séquence saisie devient la séquence active
+        Sequence.objects.filter(active=True).update(active=False)
+        if filled:
+            Sequence.objects.filter(pk=sequences[filled - 1].pk).update(active=True)
+
+        subjects = []
+        for i, (code, name, _) in enumerate(subjects_spec):
+            code = code if i < len(SUBJECTS) else f'{code}{i // len(SUBJECTS)}'
+            subject, _ = Subject.objects.get_or_create(code=code, defaults={'name': name})
+            subjects.append(subject)
+        difficulty = [rng.gauss(0, 1.5) for _ in subjects]
+
+        for school in range(1, opts['schools'] + 1):
+            tag = f"{opts['prefix']}{school:02d}"
+            users = User.objects.bulk_create([
+                User(username=f'{tag}-prof{i:02d}', password=password, role='teacher',
+                     first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES))
+                for i in range(len(subjects))
+            ], batch_size=batch_size)
+            teachers = Teacher.objects.bulk_create([Teacher(user=user) for user in users], batch_size=batch_size)
+
+            classrooms = Classroom.objects.bulk_create([
+                Classroom(
+                    name=f'{tag} {LEVELS[i % len(LEVELS)]} {i // len(LEVELS) + 1}',
+                    level=LEVELS[i % len(LEVELS)], series=SERIES[i % len(SERIES)],
+                    head_teacher=teachers[i % len(teachers)],
+                )
+                for i in range(opts['classes'])
+            ], batch_size=batch_size)
+            class_subjects = ClassSubject.objects.bulk_create([
+                ClassSubject(classroom=c, subject=s, teacher=t, coefficient=spec[2])
+                for c in classrooms for s, t, spec in zip(subjects, teachers, subjects_spec)
+            ], batch_size=batch_size)
+
+            students = Student.objects.bulk_create([
+                Student(
+                    matricule=f'{tag}{i:06d}', first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                    gender=rng.choice('MF'), birth_date=date(2008, 1, 1) + timedelta(days=rng.randrange(6 * 365)),
+                    birth_place=rng.choice(CITIES), classroom=classrooms[i % len(classrooms)],
+                    repeater=rng.random() < 0.12,
+                )
+                for i in range(opts['students'])
+            ], batch_size=batch_size)
+            counts['student_subjects'] += _bulk(StudentSubject, (
+                StudentSubject(student_id=st.id, subject_id=s.id) for st in students for s in subjects
+            ), batch_size)
+
+            by_class = {}
+            for cs in class_subjects:
+                by_class.setdefault(cs.classroom_id, []).append((cs.id, cs.teacher.user_id))
+            ability = [rng.gauss(11, 2.5) for _ in students]
+            now = connection.ops.adapt_datetimefield_value(timezone.now())
+
+            def grades():
+                for index, student in enumerate(students):
+                    for s, (cs_id, user_id) in enumerate(by_class[student.classroom_id]):
+                        for n, sequence in enumerate(sequences):
+                            if n >= filled:
+                                # Séquence à venir : note vide en brouillon, comme le crée le signal
+                                value, status = 0, 'draft'
+                            elif n < filled - 1:
+                                value, status = _note(rng, ability[index], difficulty[s]), rng.choice(('validated', 'locked'))
+                            else:
+                                # Séquence en cours : saisie partielle, en partie validée
+                                roll = rng.random()
+                                value = _note(rng, ability[index], difficulty[s]) if roll < 0.85 else 0
+                                status = 'validated' if roll < 0.55 else 'draft'
+                            yield (
+                                student.id, cs_id, sequence.term_id, sequence.id, value, status,
+                                user_id, user_id, user_id if status != 'draft' else None, now, now,
+                            )
+
+            counts['grades'] += _insert_rows(Grade, GRADE_FIELDS, grades(), batch_size)
+            counts['classrooms'] += len(classrooms)
+            counts['teachers'] += len(teachers)
+            counts['students'] += len(students)
+
+    # bulk_create et executemany n'envoient pas de signaux : on invalide nous-mêmes les caches
+    versions.bump(SchoolYear, Term, Sequence, Subject, Classroom, ClassSubject, Teacher)
+    invalidate_overview()
+    counts['school_year'] = school_year
+    return counts
+
+
+def delete_dataset(prefix=DEFAULTS['prefix']):
+    """Supprime les classes (et donc élèves et notes) et enseignants d'un jeu généré."""
+    with transaction.atomic():
+        Classroom.objects.filter(name__startswith=prefix).delete()
+        User.objects.filter(username__startswith=prefix, role='teacher').delete()
+    versions.bump(Classroom, ClassSubject, Teacher)
+    invalidate_overview()
@@ -0,0 +1,76 @@
+# ---------------------------
+# Index de notes et de bulletins pour les templates
+# ---------------------------
+# Construits une fois dans la vue, ils remplacent les parcours de liste
+# des filtres de bulletin_tags par des accès en temps constant.
+from Bull.services.generation import ANNUAL, SEQUENCE, TRIMESTER
+
+
+class SubjectGrades(dict):
+    """Notes d'un élève indexées par subject_id."""
+
+
+class GradeIndex:
+    """Notes indexées par (student_id, subject_id).
+
+    Reste itérable comme la liste d'origine ; ``class_subject`` doit être chargé
+    (select_related) pour éviter une requête par note.
+    """
+
+    def __init__(self, grades):
+        self._grades = list(grades)
+        self._by_student = {}
+        for g in self._grades:
+            self._by_student.setdefault(g.student_id, SubjectGrades()).setdefault(g.class_subject.subject_id, g)
+
+    def get(self, student_id, subject_id):
+        return self._by_student.get(student_id, {}).get(subject_id)
+
+    def for_student(self, student_id):
+        return self._by_student.get(student_id, SubjectGrades())
+
+    def all_ok(self, student_id):
+        return all(g.value is not None for g in self.for_student(student_id).values())
+
+    def __iter__(self):
+        return iter(self._grades)
+
+    def __len__(self):
+        return len(self._grades)
+
+
+class BulletinIndex:
+    """Bulletins indexés par student_id et regroupés par type (séquence, trimestre, annuel)."""
+
+    def __init__(self, bulletins):
+        self._bulletins = list(bulletins)
+        self._by_student = {}
+        self._by_type = {}
+        for b in self._bulletins:
+            self._by_student.setdefault(b.student_id, b)
+            self._by_type.setdefault((bulletin_kind(b), b.student_id), []).append(b)
+
+    def for_student(self, student_id):
+        return self._by_student.get(student_id)
+
+    def of_type(self, kind, student_id):
+        return self._by_type.get((kind, student_id), [])
+
+    def get(self, student_id, default=None):
+        # Compatibilité avec l'ancien dictionnaire {student_id: bulletins}
+        found = [b for kind in (SEQUENCE, TRIMESTER, ANNUAL) for b in self.of_type(kind, student_id)]
+        return found or default
+
+    def __iter__(self):
+        return iter(self._bulletins)
+
+    def __len__(self):
+        return len(self._bulletins)
+
+
+def bulletin_kind(bulletin):
+    if bulletin.is_annual:
+        return ANNUAL
+    if bulletin.is_trimester:
+        return TRIMESTER
+    return SEQUENCE
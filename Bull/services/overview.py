@@ -0,0 +1,62 @@
+# ---------------------------
+# Vue d'ensemble des classes (effectifs et bulletins générés)
+# ---------------------------
+# Deux requêtes groupées pour toutes les classes, au lieu de deux COUNT par classe.
+# Le résultat est gardé brièvement en cache ; toute écriture sur les classes,
+# les élèves ou les bulletins change la version et invalide les entrées.
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from Bull.models import Bulletin, Classroom, Student
+
+CACHE_TIMEOUT = 60
+VERSION_KEY = 'classroom_overview:version'
+
+
+def classroom_overview(school_year=None, sequence=None):
+    """Liste de dicts {id, name, level, series, total_students, bulletins_count} triée par nom.
+
+    ``school_year`` et ``sequence`` (objets ou ids) restreignent le comptage des bulletins.
+    """
+    school_year_id = getattr(school_year, 'pk', school_year) or None
+    sequence_id = getattr(sequence, 'pk', sequence) or None
+    key = f"classroom_overview:{cache.get(VERSION_KEY, 0)}:{school_year_id}:{sequence_id}"
+    overview = cache.get(key)
+    if overview is not None:
+        return overview
+
+    bulletins = Bulletin.objects.all()
+    if school_year_id:
+        bulletins = bulletins.filter(sequence__term__school_year_id=school_year_id)
+    if sequence_id:
+        # Les bulletins consolidés référencent aussi la première séquence de leur période
+        bulletins = bulletins.filter(sequence_id=sequence_id, is_trimester=False, is_annual=False)
+    counts = dict(bulletins.order_by().values('classroom_id').annotate(nb=Count('id')).values_list('classroom_id', 'nb'))
+
+    classrooms = Classroom.objects.annotate(nb_students=Count('students')).order_by('name')
+    overview = [{
+        'id': c.id,
+        'name': c.name,
+        'level': c.level,
+        'series': c.series,
+        'total_students': c.nb_students,
+        'bulletins_count': counts.get(c.id, 0),
+    } for c in classrooms]
+    cache.set(key, overview, CACHE_TIMEOUT)
+    return overview
+
+
+def invalidate_overview():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+@receiver([post_save, post_delete], sender=Classroom)
+@receiver([post_save, post_delete], sender=Student)
+@receiver([post_save, post_delete], sender=Bulletin)
+def _overview_changed(sender, **kwargs):
+    invalidate_overview()
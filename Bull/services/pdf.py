@@ -0,0 +1,91 @@
+# ---------------------------
+# Rendu PDF des bulletins (ReportLab)
+# ---------------------------
+# Ce module ne dépend pas de Django : il reçoit des données déjà calculées
+# (dictionnaires simples) afin de pouvoir être exécuté dans un pool de processus.
+# Le PDF est construit en mémoire puis écrit d'un bloc : le dessin ReportLab et
+# l'écriture disque sont ainsi mesurés séparément (spans « dessin », « écriture »).
+import os
+from io import BytesIO
+
+from Bull.services.profiling import span
+
+
+def render_bulletin_pdf(task):
+    """Rend un bulletin à partir d'un tuple (kind, path, payload) et retourne la taille écrite."""
+    kind, path, payload = task
+    buffer = BytesIO()
+    with span('dessin'):
+        if kind == 'sequence':
+            render_sequence_pdf(buffer, payload)
+        else:
+            render_consolidated_pdf(buffer, payload)
+    with span('écriture'):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as handle:
+            handle.write(buffer.getbuffer())
+    return buffer.getbuffer().nbytes
+
+
+def render_sequence_pdf(target, payload):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(target, pagesize=A4)
+    width, height = A4
+    # Header (entête Word)
+    c.setFont("Helvetica-Bold", 12)
+    y_header = height - 40
+    for line in payload.get('entete', '').split("\n"):
+        c.drawString(50, y_header, line)
+        y_header -= 16
+    # Titre bulletin
+    y_title = y_header - 20
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(100, y_title, f"Bulletin de {payload['student_name']}")
+    c.setFont("Helvetica", 12)
+    c.drawString(100, y_title-20, f"Classe : {payload['classroom_name']} | Séquence : {payload['sequence_name']}")
+    c.drawString(100, y_title-40, f"Moyenne : {payload['average']} | Rang : {payload['rank']}")
+    # Tableau de notes (centré)
+    y_table = y_title-70
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(100, y_table, "Matière")
+    c.drawString(200, y_table, "Note")
+    c.drawString(260, y_table, "Coef")
+    c.drawString(320, y_table, "Somme Coef")
+    c.drawString(420, y_table, "Rang matière")
+    c.drawString(520, y_table, "Rang général")
+    y_table -= 20
+    c.setFont("Helvetica", 12)
+    for note in payload['recap_notes']:
+        c.drawString(100, y_table, str(note['matiere']))
+        c.drawString(200, y_table, str(note['note']))
+        c.drawString(260, y_table, str(note['coef']))
+        c.drawString(320, y_table, str(note['som_coef']))
+        c.drawString(420, y_table, str(note['rang_matiere']))
+        c.drawString(520, y_table, str(note['rang_general']))
+        y_table -= 20
+    # Footer (pied Word)
+    c.setFont("Helvetica-Oblique", 11)
+    y_footer = 40
+    for line in payload.get('pied', '').split("\n"):
+        c.drawString(50, y_footer, line)
+        y_footer += 16
+    c.save()
+
+
+def render_consolidated_pdf(target, payload):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(target, pagesize=A4)
+    c.drawString(100, 800, f"{payload['title']} de {payload['student_name']}")
+    c.drawString(100, 780, f"Classe : {payload['classroom_name']} | {payload['period_label']}")
+    c.drawString(100, 760, f"{payload['average_label']} : {payload['average']}")
+    c.drawString(100, 740, f"{payload['rank_label']} : {payload['rank']}")
+    c.drawString(100, 720, f"Appréciation : {payload['appreciation']}")
+    y = 700
+    for line in payload['sequence_lines']:
+        c.drawString(100, y, line)
+        y -= 20
+    c.save()
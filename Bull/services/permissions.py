@@ -0,0 +1,72 @@
+# ---------------------------
+# Droits de saisie des notes
+# ---------------------------
+# Un enseignant gère les ClassSubject dont il est le titulaire et ceux des
+# classes dont il est professeur principal ; l'administration et le secrétariat
+# gèrent tout. L'ensemble des ids gérés est calculé en une requête puis gardé
+# sur l'objet utilisateur, c'est-à-dire le temps d'une requête HTTP : c'est un
+# contrôle d'accès, il ne passe pas par le cache partagé (LocMemCache par
+# défaut : une réaffectation faite par un autre worker n'y serait pas vue).
+# Dans la requête, les versions de ClassSubject, Classroom et Teacher
+# l'invalident après une réaffectation. Les vues, les templates (filtre
+# ``can_manage``) et l'API (permission DRF) partagent ce même index.
+from django.db.models import Q
+
+from Bull.models import ClassSubject, Classroom, Teacher
+from Bull.services import versions
+
+MANAGER_ROLES = ('admin', 'secretary')
+# Personnel de l'établissement : seuls rôles ayant accès à l'API de gestion
+STAFF_ROLES = MANAGER_ROLES + ('teacher',)
+MODELS = (ClassSubject, Classroom, Teacher)
+
+
+def is_admin_or_secretary(user):
+    return user.is_authenticated and getattr(user, 'role', None) in MANAGER_ROLES
+
+
+def is_school_staff(user):
+    return user.is_authenticated and getattr(user, 'role', None) in STAFF_ROLES
+
+
+def _all_ids():
+    return frozenset(ClassSubject.objects.values_list('id', flat=True))
+
+
+def _teacher_ids(user):
+    return frozenset(ClassSubject.objects.filter(
+        Q(teacher__user=user) | Q(classroom__head_teacher__user=user)
+    ).values_list('id', flat=True))
+
+
+def _memoized(user, build):
+    key = tuple(versions.model_version(model) for model in MODELS)
+    memo = getattr(user, '_managed_cs', None)
+    if memo is None or memo[0] != key:
+        memo = (key, build())
+        user._managed_cs = memo
+    return memo[1]
+
+
+def managed_class_subject_ids(user, class_subject_ids=None):
+    """Ids des ClassSubject que ``user`` peut saisir (restreints à ``class_subject_ids`` si donné)."""
+    if not getattr(user, 'is_authenticated', False):
+        managed = frozenset()
+    elif is_admin_or_secretary(user):
+        managed = _memoized(user, _all_ids)
+    else:
+        managed = _memoized(user, lambda: _teacher_ids(user))
+    if class_subject_ids is None:
+        return managed
+    return managed & set(class_subject_ids)
+
+
+def can_manage_class_subject(user, class_subject):
+    """``class_subject`` : instance ou id."""
+    return getattr(class_subject, 'pk', class_subject) in managed_class_subject_ids(user)
+
+
+def managed_class_subjects(user, queryset=None):
+    """Filtre un queryset de ClassSubject sur ceux que ``user`` gère."""
+    queryset = ClassSubject.objects.all() if queryset is None else queryset
+    return queryset.filter(id__in=managed_class_subject_ids(user))
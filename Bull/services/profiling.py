@@ -0,0 +1,179 @@
+# ---------------------------
+# Profilage de la génération des bulletins
+# ---------------------------
+# ``span(nom)`` délimite une étape (requêtes, classement, canevas Word, dessin
+# ReportLab, écriture disque...). Les étapes s'imbriquent : leur chemin
+# (« calcul/requêtes ») identifie l'étape dans le résumé. Hors d'un
+# ``profile_run`` actif, un span ne coûte qu'une lecture de ContextVar.
+#
+# ``profile_run`` collecte les spans d'une génération (durée, appels, requêtes
+# SQL) et, sur demande, profile toute l'exécution :
+#   - 'cprofile' : fichier .prof (pstats, snakeviz, flameprof) ;
+#   - 'sample'   : échantillonnage de la pile toutes les quelques ms, écrit au
+#                  format « folded » (flamegraph.pl, speedscope).
+# Les vues de génération s'en servent via ``profiled`` (réglage BULLETIN_PROFILE,
+# résumé dans le journal Bull.profiling), la commande generate_bulletins via
+# --profile (résumé affiché). Django n'est importé qu'à l'usage : les spans
+# servent aussi dans services/pdf.py (rendu hors Django).
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+MODES = ('cprofile', 'sample')
+SAMPLE_INTERVAL = 0.005
+
+logger = logging.getLogger('Bull.profiling')
+
+_current = ContextVar('bulletin_profile', default=None)
+
+
+class Profile:
+    """Spans d'une exécution : {chemin: {'calls', 'seconds', 'queries'}} dans l'ordre d'apparition."""
+
+    def __init__(self, label):
+        self.label = label
+        self.spans = {}
+        self.stack = []
+        self.queries = 0
+        self.seconds = 0.0
+        self.output = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def summary(self):
+        """Lignes du résumé dans l'ordre d'entrée (les sous-étapes suivent leur parent)."""
+        total = self.seconds or 1
+        return [{
+            'stage': path,
+            'depth': path.count('/'),
+            'calls': stats['calls'],
+            'ms': round(stats['seconds'] * 1000, 1),
+            'share': round(100 * stats['seconds'] / total, 1),
+            'queries': stats['queries'],
+        } for path, stats in self.spans.items()]
+
+
+@contextmanager
+def span(name):
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    profile.stack.append(name)
+    # Enregistrée à l'entrée : une étape apparaît avant ses sous-étapes
+    stats = profile.spans.setdefault('/'.join(profile.stack), {'calls': 0, 'seconds': 0.0, 'queries': 0})
+    queries = profile.queries
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats['calls'] += 1
+        stats['seconds'] += time.perf_counter() - started
+        stats['queries'] += profile.queries - queries
+        profile.stack.pop()
+
+
+class _Sampler(threading.Thread):
+    """Relève la pile du thread profilé à intervalle fixe (format folded de flamegraph)."""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as handle:
+            for stack, count in self.stacks.most_common():
+                handle.write(f"{stack} {count}\n")
+
+
+def _output_path(directory, label, suffix):
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{label}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.{suffix}")
+
+
+@contextmanager
+def profile_run(label, mode=None, directory=None):
+    """Active la collecte des spans (et le profileur ``mode``) ; produit le Profile.
+
+    Le fichier de profil est écrit dans ``directory`` ; son chemin est dans ``profile.output``.
+    """
+    if mode not in (None,) + MODES:
+        raise ValueError(f"Mode de profilage inconnu : {mode}")
+    from django.db import connection
+
+    profile = Profile(label)
+    token = _current.set(profile)
+    profiler = cProfile.Profile() if mode == 'cprofile' else None
+    sampler = _Sampler(threading.get_ident()) if mode == 'sample' else None
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(profile):
+            if sampler:
+                sampler.start()
+            with profiler or nullcontext():
+                yield profile
+    finally:
+        profile.seconds = time.perf_counter() - started
+        _current.reset(token)
+        if profiler:
+            profile.output = _output_path(directory or '.', label, 'prof')
+            profiler.dump_stats(profile.output)
+        if sampler:
+            sampler.stopped.set()
+            sampler.join()
+            profile.output = _output_path(directory or '.', label, 'folded')
+            sampler.dump(profile.output)
+
+
+@contextmanager
+def profiled(label):
+    """profile_run selon le réglage BULLETIN_PROFILE ('spans', 'cprofile' ou 'sample'), résumé journalisé.
+
+    Sans réglage, ne fait rien (produit None).
+    """
+    from django.conf import settings
+
+    setting = getattr(settings, 'BULLETIN_PROFILE', None)
+    if not setting:
+        yield None
+        return
+    directory = getattr(settings, 'BULLETIN_PROFILE_DIR', None) or os.path.join(settings.MEDIA_ROOT, 'profiles')
+    with profile_run(label, setting if setting in MODES else None, directory) as profile:
+        yield profile
+    logger.info("Génération %s\n%s", label, format_summary(profile))
+
+
+def format_summary(profile):
+    """Tableau texte des étapes : appels, durée, part du total et requêtes SQL."""
+    header = f"{'Étape':<40} {'Appels':>7} {'ms':>10} {'%':>6} {'Req.':>6}"
+    lines = [header, '-' * len(header)]
+    for row in profile.summary():
+        name = '  ' * row['depth'] + row['stage'].rsplit('/', 1)[-1]
+        lines.append(f"{name[:40]:<40} {row['calls']:>7} {row['ms']:>10.1f} {row['share']:>6.1f} {row['queries']:>6}")
+    lines.append('-' * len(header))
+    lines.append(f"{'TOTAL ' + profile.label:<40} {'':>7} {profile.seconds * 1000:>10.1f} {100.0:>6.1f} {profile.queries:>6}")
+    if profile.output:
+        lines.append(f"Profil : {profile.output}")
+    return "\n".join(lines)
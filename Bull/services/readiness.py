@@ -0,0 +1,109 @@
+# ---------------------------
+# Rapport de complétude des notes ("la classe peut-elle être calculée ?")
+# ---------------------------
+# Une requête groupée sur Grade donne, pour chaque couple (élève, matière de la classe),
+# l'état de ses notes ; les compteurs sont ensuite agrégés par classe, matière et élève.
+from django.db.models import Count, F, Q
+
+from Bull.models import ClassSubject, Grade, Student
+from Bull.services.generation import READY_STATUSES
+
+COUNTERS = ('expected', 'provisioned', 'validated', 'locked', 'zero', 'ready')
+
+
+def _counters(expected=0):
+    return {'expected': expected, 'provisioned': 0, 'validated': 0, 'locked': 0, 'zero': 0, 'ready': 0}
+
+
+def readiness_report(sequence, classroom_ids=None):
+    """Retourne {classroom_id: rapport} pour la séquence donnée.
+
+    Chaque rapport contient les compteurs de la classe (expected, provisioned,
+    validated, locked, zero, ready), un booléen ``can_calculate`` et le détail
+    par matière (``subjects``) et par élève (``students``).
+    """
+    class_subjects = ClassSubject.objects.select_related('subject', 'classroom')
+    students = Student.objects.order_by('last_name', 'first_name')
+    grades = Grade.objects.filter(sequence=sequence, student__classroom_id=F('class_subject__classroom_id'))
+    if classroom_ids is not None:
+        class_subjects = class_subjects.filter(classroom_id__in=classroom_ids)
+        students = students.filter(classroom_id__in=classroom_ids)
+        grades = grades.filter(class_subject__classroom_id__in=classroom_ids)
+
+    report = {}
+    for cs in class_subjects.order_by('subject_id'):
+        entry = report.setdefault(cs.classroom_id, _class_entry(cs.classroom_id, cs.classroom.name))
+        entry['subjects'][cs.id] = dict(_counters(), subject_id=cs.subject_id, name=cs.subject.name)
+    for s in students.values('id', 'classroom_id', 'classroom__name', 'last_name', 'first_name'):
+        entry = report.setdefault(s['classroom_id'], _class_entry(s['classroom_id'], s['classroom__name']))
+        entry['students'][s['id']] = dict(_counters(), name=f"{s['last_name']} {s['first_name']}")
+    for entry in report.values():
+        nb_students = len(entry['students'])
+        nb_subjects = len(entry['subjects'])
+        entry['expected'] = nb_students * nb_subjects
+        for subject in entry['subjects'].values():
+            subject['expected'] = nb_students
+        for student in entry['students'].values():
+            student['expected'] = nb_subjects
+
+    # Une ligne par couple (élève, matière) ; les doublons de notes sont regroupés
+    pairs = grades.values('class_subject__classroom_id', 'class_subject_id', 'student_id').annotate(
+        nb=Count('id'),
+        nb_validated=Count('id', filter=Q(status='validated')),
+        nb_locked=Count('id', filter=Q(status='locked')),
+        nb_zero=Count('id', filter=Q(value__lte=0) | Q(value__isnull=True)),
+        nb_ready=Count('id', filter=Q(status__in=READY_STATUSES)),
+    )
+    for row in pairs:
+        entry = report.get(row['class_subject__classroom_id'])
+        if entry is None:
+            continue
+        flags = {
+            'provisioned': row['nb'] > 0,
+            'validated': row['nb_validated'] > 0,
+            'locked': row['nb_locked'] > 0,
+            'zero': row['nb_zero'] > 0,
+            'ready': row['nb_ready'] > 0,
+        }
+        targets = (entry, entry['subjects'].get(row['class_subject_id']), entry['students'].get(row['student_id']))
+        for target in targets:
+            if target is None:
+                continue
+            for key, flag in flags.items():
+                target[key] += flag
+
+    for entry in report.values():
+        entry['blocking'] = entry['expected'] - entry['ready']
+        entry['can_calculate'] = entry['expected'] > 0 and entry['blocking'] == 0
+    return report
+
+
+def _class_entry(classroom_id, name):
+    return dict(_counters(), classroom_id=classroom_id, name=name, subjects={}, students={})
+
+
+def blocking_students(entry):
+    """Élèves auxquels il manque au moins une note validée."""
+    return [dict(s, student_id=sid) for sid, s in entry['students'].items() if s['ready'] < s['expected']]
+
+
+def blocking_subjects(entry):
+    """Matières dont au moins une note n'est pas validée."""
+    return [dict(s, class_subject_id=cid) for cid, s in entry['subjects'].items() if s['ready'] < s['expected']]
+
+
+def serialize_report(report):
+    """Forme JSON du rapport (listes plutôt que dictionnaires indexés)."""
+    data = []
+    for cid, entry in report.items():
+        item = {key: entry[key] for key in COUNTERS}
+        item.update({
+            'classroom_id': cid,
+            'name': entry['name'],
+            'blocking': entry['blocking'],
+            'can_calculate': entry['can_calculate'],
+            'subjects': [dict(s, class_subject_id=k) for k, s in entry['subjects'].items()],
+            'students': [dict(s, student_id=k) for k, s in entry['students'].items()],
+        })
+        data.append(item)
+    return data
@@ -0,0 +1,134 @@
+# ---------------------------
+# Attribution des sanctions d'absence
+# ---------------------------
+# Les seuils (Sanction.min_heures_absence) forment une table d'intervalles :
+# la sanction d'un élève est celle du plus grand seuil <= ses heures
+# d'absence. La table triée est gardée en mémoire par processus et relue
+# quand la version de Sanction change (ajout, modification ou suppression,
+# cf. services.versions) : une recherche dichotomique remplace la requête
+# faite à chaque Discipline.save, et la saisie groupée n'en fait aucune.
+from bisect import bisect_right
+
+from django.db import transaction
+
+from Bull.models import Discipline, Sanction, Sequence, Student, Term
+from Bull.services import versions
+
+BATCH_SIZE = 2000
+
+_table = {'version': None, 'thresholds': [], 'ids': []}
+
+
+def thresholds(refresh=False):
+    """(seuils croissants, ids des sanctions correspondantes), relus si les sanctions ont changé."""
+    version = versions.model_version(Sanction)
+    if refresh or _table['version'] != version:
+        rows = list(Sanction.objects.order_by('min_heures_absence', 'id').values_list('min_heures_absence', 'id'))
+        _table.update(version=version, thresholds=[row[0] for row in rows], ids=[row[1] for row in rows])
+    return _table['thresholds'], _table['ids']
+
+
+def sanction_id_for(absences, table=None):
+    """Id de la sanction applicable à ``absences`` heures, ou None sous le premier seuil."""
+    limits, ids = table or thresholds()
+    position = bisect_right(limits, absences)
+    return ids[position - 1] if position else None
+
+
+def _as_count(value):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value >= 0 else None
+
+
+def _error(index, message):
+    return {'index': index, 'id': None, 'status': 'error', 'error': message}
+
+
+def record_absences(items):
+    """Crée ou met à jour les fiches de discipline (élève, trimestre, séquence facultative).
+
+    Chaque élément contient ``student``, ``term``, éventuellement ``sequence``,
+    ``absences`` et ``lates``. Retourne un résultat par élément.
+    """
+    parsed = []
+    for item in items:
+        item = item if isinstance(item, dict) else {}
+        parsed.append({
+            'student': _as_count(item.get('student')),
+            'term': _as_count(item.get('term')),
+            'sequence': _as_count(item.get('sequence')) if item.get('sequence') not in (None, '') else None,
+            'absences': _as_count(item.get('absences', 0)),
+            'lates': _as_count(item.get('lates', 0)),
+        })
+
+    # Préchargement : élèves, trimestres, trimestre de chaque séquence, fiches existantes
+    students = set(Student.objects.filter(id__in={p['student'] for p in parsed}).values_list('id', flat=True))
+    terms = set(Term.objects.filter(id__in={p['term'] for p in parsed}).values_list('id', flat=True))
+    sequence_terms = dict(Sequence.objects.filter(
+        id__in={p['sequence'] for p in parsed if p['sequence']}
+    ).values_list('id', 'term_id'))
+    existing = {}
+    for discipline in Discipline.objects.filter(
+        student_id__in=students, term_id__in=terms,
+    ).order_by('id'):
+        existing.setdefault((discipline.student_id, discipline.term_id, discipline.sequence_id), discipline)
+
+    table = thresholds()
+    results, to_create, to_update, seen = [], [], [], {}
+    for index, p in enumerate(parsed):
+        if p['student'] not in students:
+            results.append(_error(index, "Élève introuvable."))
+            continue
+        if p['term'] not in terms:
+            results.append(_error(index, "Trimestre introuvable."))
+            continue
+        if p['sequence'] and sequence_terms.get(p['sequence']) != p['term']:
+            results.append(_error(index, "La séquence n'appartient pas à ce trimestre."))
+            continue
+        if p['absences'] is None or p['lates'] is None:
+            results.append(_error(index, "Absences et retards doivent être des entiers positifs."))
+            continue
+        key = (p['student'], p['term'], p['sequence'])
+        discipline = seen.get(key) or existing.get(key)
+        created = discipline is None
+        if created:
+            discipline = Discipline(student_id=p['student'], term_id=p['term'], sequence_id=p['sequence'])
+            to_create.append(discipline)
+        elif key not in seen:
+            to_update.append(discipline)
+        seen[key] = discipline
+        discipline.absences, discipline.lates = p['absences'], p['lates']
+        discipline.sanction_id = sanction_id_for(discipline.absences, table)
+        results.append({'index': index, 'discipline': discipline, 'status': 'created' if created else 'updated'})
+
+    with transaction.atomic():
+        Discipline.objects.bulk_create(to_create)
+        Discipline.objects.bulk_update(to_update, ['absences', 'lates', 'sanction'])
+    for result in results:
+        discipline = result.pop('discipline', None)
+        if discipline is not None:
+            result.update(id=discipline.pk, sanction=discipline.sanction_id)
+    return results
+
+
+def reapply(batch_size=BATCH_SIZE):
+    """Recalcule la sanction de toutes les fiches (après un changement de seuils) ; retourne le nombre modifié."""
+    # Relue sans condition : les seuils ont pu changer sans signal (update, shell)
+    table = thresholds(refresh=True)
+    changed, last_id = 0, 0
+    while True:
+        rows = list(Discipline.objects.filter(id__gt=last_id).order_by('id').values_list(
+            'id', 'absences', 'sanction_id')[:batch_size])
+        if not rows:
+            return changed
+        last_id = rows[-1][0]
+        updates = []
+        for discipline_id, absences, sanction_id in rows:
+            expected = sanction_id_for(absences, table)
+            if expected != sanction_id:
+                updates.append(Discipline(id=discipline_id, sanction_id=expected))
+        Discipline.objects.bulk_update(updates, ['sanction'])
+        changed += len(updates)
@@ -0,0 +1,166 @@
+# ---------------------------
+# Recherche des élèves (index plein texte)
+# ---------------------------
+# Sous SQLite, une table virtuelle FTS5 (« Bull_student_fts », contenu externe
+# adossé à Bull_student) indexe matricule, nom et prénom. Des triggers SQL la
+# tiennent à jour : save/delete, bulk_create, import Excel et écritures brutes
+# sont couverts sans code applicatif. Le tokenizer unicode61 retire les accents
+# et l'index de préfixes (2 et 3 caractères) sert la recherche à la frappe ;
+# les résultats sont classés par bm25.
+# Sans FTS5 (autre base, SQLite compilé sans), repli sur une recherche par
+# préfixe de chaque mot (istartswith), sans classement ni insensibilité aux accents.
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.utils import OperationalError
+
+from Bull.models import Student
+
+TABLE = 'Bull_student_fts'
+TOKEN = re.compile(r'\w+', re.UNICODE)
+
+CREATE_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS "{TABLE}" USING fts5(
+        matricule, last_name, first_name,
+        content='Bull_student', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS "{TABLE}_ai" AFTER INSERT ON "Bull_student" BEGIN
+        INSERT INTO "{TABLE}"(rowid, matricule, last_name, first_name)
+        VALUES (new.id, new.matricule, new.last_name, new.first_name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS "{TABLE}_ad" AFTER DELETE ON "Bull_student" BEGIN
+        INSERT INTO "{TABLE}"("{TABLE}", rowid, matricule, last_name, first_name)
+        VALUES ('delete', old.id, old.matricule, old.last_name, old.first_name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS "{TABLE}_au" AFTER UPDATE OF matricule, last_name, first_name ON "Bull_student" BEGIN
+        INSERT INTO "{TABLE}"("{TABLE}", rowid, matricule, last_name, first_name)
+        VALUES ('delete', old.id, old.matricule, old.last_name, old.first_name);
+        INSERT INTO "{TABLE}"(rowid, matricule, last_name, first_name)
+        VALUES (new.id, new.matricule, new.last_name, new.first_name);
+    END""",
+]
+DROP_SQL = [
+    f'DROP TRIGGER IF EXISTS "{TABLE}_ai"',
+    f'DROP TRIGGER IF EXISTS "{TABLE}_ad"',
+    f'DROP TRIGGER IF EXISTS "{TABLE}_au"',
+    f'DROP TABLE IF EXISTS "{TABLE}"',
+]
+
+
+def install(schema_editor):
+    """Crée l'index et ses triggers puis l'alimente (migration) ; sans effet hors SQLite ou sans FTS5."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        for sql in CREATE_SQL:
+            schema_editor.execute(sql)
+    except OperationalError:
+        return
+    schema_editor.execute(f"""INSERT INTO "{TABLE}"("{TABLE}") VALUES ('rebuild')""")
+
+
+def uninstall(schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in DROP_SQL:
+            schema_editor.execute(sql)
+
+
+def ensure_triggers(using='default', **kwargs):
+    """post_migrate : SQLite reconstruit une table modifiée par une migration et perd ses triggers.
+
+    Les recrée au besoin et réaligne alors l'index sur Bull_student.
+    """
+    from django.db import connections
+
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return
+    with db.cursor() as cursor:
+        if TABLE not in db.introspection.table_names(cursor):
+            return
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s", [f'{TABLE}_%'])
+        if cursor.fetchone()[0] == 3:
+            return
+        for sql in CREATE_SQL[1:]:
+            cursor.execute(sql)
+        cursor.execute(f"""INSERT INTO "{TABLE}"("{TABLE}") VALUES ('rebuild')""")
+
+
+def fts_available():
+    if connection.vendor != 'sqlite':
+        return False
+    if not hasattr(connection, '_bull_student_fts'):
+        with connection.cursor() as cursor:
+            connection._bull_student_fts = TABLE in connection.introspection.table_names(cursor)
+    return connection._bull_student_fts
+
+
+def match_expression(text):
+    """Requête FTS5 : chaque mot devient un préfixe (« ngo* »), tous requis."""
+    return ' '.join(f'"{token}"*' for token in TOKEN.findall(text))
+
+
+class RankedStudents:
+    """Résultats FTS5 classés, découpables par Paginator (COUNT puis LIMIT/OFFSET à la demande)."""
+
+    def __init__(self, text, classroom_id=None):
+        self.match = match_expression(text)
+        self.classroom_id = classroom_id
+        self._count = None
+
+    def _query(self, select, tail='', params=()):
+        sql = (f'SELECT {select} FROM "{TABLE}" JOIN "Bull_student" s ON s.id = "{TABLE}".rowid '
+               f'WHERE "{TABLE}" MATCH %s')
+        args = [self.match]
+        if self.classroom_id:
+            sql += ' AND s.classroom_id = %s'
+            args.append(self.classroom_id)
+        with connection.cursor() as cursor:
+            cursor.execute(sql + tail, args + list(params))
+            return cursor.fetchall()
+
+    def count(self):
+        if self._count is None:
+            self._count = self._query('COUNT(*)')[0][0] if self.match else 0
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = self.count() if index.stop is None else index.stop
+        if not self.match or stop <= start:
+            return []
+        ids = [row[0] for row in self._query(
+            's.id', f' ORDER BY "{TABLE}".rank LIMIT %s OFFSET %s', (stop - start, start),
+        )]
+        students = Student.objects.select_related('classroom').in_bulk(ids)
+        return [students[i] for i in ids if i in students]
+
+
+def search_students(text, classroom_id=None):
+    """Élèves correspondant à ``text`` (préfixes de mots), classés ; compatible avec Paginator."""
+    if fts_available():
+        return RankedStudents(text, classroom_id)
+    students = Student.objects.select_related('classroom').order_by('last_name', 'first_name', 'id')
+    if classroom_id:
+        students = students.filter(classroom_id=classroom_id)
+    for token in TOKEN.findall(text):
+        students = students.filter(
+            Q(matricule__istartswith=token) | Q(last_name__istartswith=token) | Q(first_name__istartswith=token)
+        )
+    return students
+
+
+def autocomplete(text, limit=10):
+    return [{
+        'id': student.id,
+        'matricule': student.matricule,
+        'name': f"{student.last_name} {student.first_name}",
+        'classroom': student.classroom.name,
+    } for student in search_students(text)[:limit]]
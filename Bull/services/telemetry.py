@@ -0,0 +1,188 @@
+# ---------------------------
+# Mesures par requête (temps, SQL, N+1)
+# ---------------------------
+# Le middleware RequestStatsMiddleware enveloppe chaque requête d'un
+# execute_wrapper qui compte les requêtes SQL, cumule leur durée et regroupe
+# les requêtes par gabarit SQL (les paramètres sont séparés par Django : la
+# chaîne SQL sert d'empreinte). Un gabarit exécuté plusieurs fois dans la même
+# requête HTTP signale un N+1. Chaque mesure est un petit dict gardé dans un
+# tampon circulaire du processus et, si REQUEST_STATS_LOG est défini, écrit en
+# JSON dans un journal que la page d'administration relit.
+#
+# Le journal est partagé par tous les workers : chacun y ajoute ses lignes en
+# mode append (WatchedFileHandler rouvre le fichier s'il a été déplacé). La
+# rotation ne se fait pas dans les processus, où plusieurs workers renommeraient
+# le même fichier, mais à l'extérieur (logrotate : requests.log.1, .2...) ; la
+# page relit aussi ces sauvegardes. « Réinitialiser » écrit une ligne de remise
+# à zéro dans le journal : les mesures antérieures sont ignorées par tous.
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from logging.handlers import WatchedFileHandler
+
+from django.conf import settings
+
+# Un gabarit répété au moins autant de fois dans une requête est compté comme N+1
+DUPLICATE_THRESHOLD = 3
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+_lock = threading.Lock()
+_buffer = None
+_logger = None
+
+
+def buffer_size():
+    return getattr(settings, 'REQUEST_STATS_SIZE', 5000)
+
+
+def _records():
+    global _buffer
+    if _buffer is None or _buffer.maxlen != buffer_size():
+        _buffer = deque(maxlen=buffer_size())
+    return _buffer
+
+
+def _log():
+    """Logger du journal partagé, créé au premier enregistrement (None si non configuré)."""
+    global _logger
+    path = getattr(settings, 'REQUEST_STATS_LOG', None)
+    if not path:
+        return None
+    if _logger is None or _logger.handlers[0].baseFilename != str(path):
+        logger = logging.getLogger('Bull.request_stats')
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        for handler in logger.handlers:
+            handler.close()
+        logger.handlers = [WatchedFileHandler(path, encoding='utf-8')]
+        _logger = logger
+    return _logger
+
+
+def fingerprint(sql):
+    """Gabarit SQL sans la longueur des listes IN, pour regrouper les requêtes répétées."""
+    return IN_LIST.sub('IN (...)', sql)
+
+
+class QueryRecorder:
+    """execute_wrapper : nombre de requêtes, durée SQL cumulée et occurrences par gabarit."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.templates = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            self.templates[sql] = self.templates.get(sql, 0) + 1
+
+    def duplicates(self, limit=3):
+        """Gabarits les plus répétés au-delà du seuil : [(gabarit, nombre), ...]."""
+        grouped = {}
+        for sql, count in self.templates.items():
+            key = fingerprint(sql)
+            grouped[key] = grouped.get(key, 0) + count
+        worst = sorted(grouped.items(), key=lambda item: item[1], reverse=True)
+        return [(sql[:300], count) for sql, count in worst[:limit] if count >= DUPLICATE_THRESHOLD]
+
+
+def record(entry):
+    with _lock:
+        _records().append(entry)
+    logger = _log()
+    if logger is not None:
+        logger.info(json.dumps(entry, ensure_ascii=False))
+
+
+def _log_files(path):
+    """Journal courant puis sauvegardes de la rotation externe, du plus récent au plus ancien."""
+    files = [path]
+    while os.path.exists(f"{path}.{len(files)}"):
+        files.append(f"{path}.{len(files)}")
+    return files
+
+
+def _read_log(path):
+    """Mesures du journal postérieures à la dernière remise à zéro, dans l'ordre chronologique."""
+    newest_first = []
+    for name in _log_files(path):
+        remaining = buffer_size() - len(newest_first)
+        try:
+            with open(name, encoding='utf-8') as handle:
+                lines = deque(handle, maxlen=remaining)
+        except OSError:
+            continue
+        for line in reversed(lines):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if 'reset' in entry:
+                return newest_first[::-1]
+            newest_first.append(entry)
+        if len(newest_first) >= buffer_size():
+            break
+    return newest_first[::-1]
+
+
+def recent():
+    """Dernières mesures : le journal s'il est configuré (tous les workers), sinon le tampon du processus."""
+    path = getattr(settings, 'REQUEST_STATS_LOG', None)
+    if path:
+        return _read_log(path)
+    with _lock:
+        return list(_records())
+
+
+def clear():
+    """Vide le tampon du processus et marque le journal : les mesures précédentes ne sont plus relues."""
+    with _lock:
+        _records().clear()
+    logger = _log()
+    if logger is not None:
+        logger.info(json.dumps({'reset': time.time()}))
+
+
+def summarize(entries, limit=20):
+    """Agrégats par nom d'URL, triés par durée moyenne, et pires N+1 (gabarit, endpoint, max, occurrences)."""
+    endpoints = {}
+    offenders = {}
+    for entry in entries:
+        stats = endpoints.setdefault(entry['endpoint'], {
+            'endpoint': entry['endpoint'], 'hits': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            'db_ms': 0.0, 'queries': 0, 'max_queries': 0, 'bytes': 0,
+        })
+        stats['hits'] += 1
+        stats['total_ms'] += entry['ms']
+        stats['max_ms'] = max(stats['max_ms'], entry['ms'])
+        stats['db_ms'] += entry['db_ms']
+        stats['queries'] += entry['queries']
+        stats['max_queries'] = max(stats['max_queries'], entry['queries'])
+        stats['bytes'] += entry['bytes'] or 0
+        for sql, count in entry['duplicates']:
+            offender = offenders.setdefault((sql, entry['endpoint']), {
+                'sql': sql, 'endpoint': entry['endpoint'], 'max_repeats': 0, 'requests': 0,
+            })
+            offender['max_repeats'] = max(offender['max_repeats'], count)
+            offender['requests'] += 1
+    rows = []
+    for stats in endpoints.values():
+        hits = stats['hits']
+        rows.append({
+            'endpoint': stats['endpoint'], 'hits': hits, 'max_ms': round(stats['max_ms'], 1),
+            'avg_ms': round(stats['total_ms'] / hits, 1), 'avg_db_ms': round(stats['db_ms'] / hits, 1),
+            'avg_queries': round(stats['queries'] / hits, 1), 'max_queries': stats['max_queries'],
+            'avg_kb': round(stats['bytes'] / hits / 1024, 1),
+        })
+    rows.sort(key=lambda row: row['avg_ms'], reverse=True)
+    worst = sorted(offenders.values(), key=lambda o: (o['max_repeats'], o['requests']), reverse=True)
+    return {'endpoints': rows[:limit], 'offenders': worst[:limit], 'requests': len(entries)}
@@ -0,0 +1,65 @@
+# ---------------------------
+# Versions des modèles de paramétrage
+# ---------------------------
+# Années, trimestres, séquences, sanctions, mentions, liens classe–matière et barèmes changent
+# quelques fois par an. Chaque modèle suivi a une version en cache (horodatage
+# de la dernière écriture) changée à chaque save/delete : les données et
+# réponses mises en cache sont indexées par ces versions, une écriture les
+# invalide donc toutes sans avoir à connaître leurs clés.
+import time
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+from Bull.models import (
+    BulletinTemplate, Classroom, ClassSubject, MentionRule, Sanction, SchoolYear, Sequence, Settings, Subject,
+    Teacher, Term,
+)
+
+TRACKED = (
+    SchoolYear, Term, Sequence, Sanction, Subject, Classroom, ClassSubject, BulletinTemplate, Settings, Teacher,
+    MentionRule,
+)
+# Les entrées sont invalidées par les versions ; la durée ne sert qu'à libérer la place
+CACHE_TIMEOUT = 24 * 3600
+
+
+def _key(model):
+    return f"model_version:{model._meta.label_lower}"
+
+
+def model_version(model):
+    """Version courante de ``model`` (horodatage en nanosecondes de la dernière écriture connue)."""
+    version = cache.get(_key(model))
+    if version is None:
+        # Cache vidé ou redémarré : on repart d'une version neuve, les anciennes entrées sont ignorées
+        cache.add(_key(model), time.time_ns(), None)
+        version = cache.get(_key(model), time.time_ns())
+    return version
+
+
+def bump(*models):
+    """À appeler après une écriture qui n'envoie pas de signal (update, bulk_create)."""
+    now = time.time_ns()
+    for model in models:
+        # Toujours croissante, même pour deux écritures dans la même nanoseconde
+        cache.set(_key(model), max(now, (cache.get(_key(model)) or 0) + 1), None)
+
+
+def cached(name, models, build, timeout=CACHE_TIMEOUT):
+    """Résultat de ``build()`` gardé en cache tant qu'aucun des ``models`` n'a changé."""
+    key = f"{name}:{':'.join(str(model_version(m)) for m in models)}"
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, timeout)
+    return value
+
+
+def _model_changed(sender, **kwargs):
+    bump(sender)
+
+
+for _model in TRACKED:
+    post_save.connect(_model_changed, sender=_model, dispatch_uid=f"versions:{_model.__name__}:save")
+    post_delete.connect(_model_changed, sender=_model, dispatch_uid=f"versions:{_model.__name__}:delete")
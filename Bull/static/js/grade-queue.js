@@ -0,0 +1,97 @@
+// File d'attente hors ligne des notes (IndexedDB).
+// Chargé par la page de saisie et par le service worker (importScripts) :
+// les modifications faites sans réseau sont rejouées par lots vers /api/grades/sync/.
+(function (scope) {
+  const DB_NAME = 'smartbull-offline';
+  const STORE = 'grade-queue';
+  const SYNC_URL = '/api/grades/sync/';
+
+  function openDb() {
+    return new Promise((resolve, reject) => {
+      const req = indexedDB.open(DB_NAME, 1);
+      req.onupgradeneeded = () => {
+        req.result.createObjectStore(STORE, { keyPath: 'id' });
+      };
+      req.onsuccess = () => resolve(req.result);
+      req.onerror = () => reject(req.error);
+    });
+  }
+
+  function withStore(mode, fn) {
+    return openDb().then(db => new Promise((resolve, reject) => {
+      const tx = db.transaction(STORE, mode);
+      const result = fn(tx.objectStore(STORE));
+      tx.oncomplete = () => resolve(result && result.result !== undefined ? result.result : result);
+      tx.onerror = () => reject(tx.error);
+    }));
+  }
+
+  // Une entrée par note : une nouvelle saisie remplace la précédente, mais garde
+  // le updated_at d'origine pour que le serveur détecte les conflits.
+  function add(change) {
+    return withStore('readwrite', store => {
+      const req = store.get(change.id);
+      req.onsuccess = () => {
+        const previous = req.result;
+        store.put(Object.assign({}, change, {
+          base_updated_at: previous ? previous.base_updated_at : change.base_updated_at,
+          queued_at: Date.now(),
+        }));
+      };
+    });
+  }
+
+  function all() {
+    return withStore('readonly', store => store.getAll());
+  }
+
+  function remove(ids) {
+    return withStore('readwrite', store => ids.forEach(id => store.delete(id)));
+  }
+
+  // Retire les entrées envoyées, sauf celles ressaisies pendant l'envoi (queued_at différent) :
+  // la nouvelle saisie reste en file, rebasée sur le updated_at de l'écriture qui vient d'aboutir.
+  function settle(sent, results) {
+    const written = {};
+    results.forEach(r => {
+      if (r.status !== 'conflict' && r.status !== 'error' && r.updated_at) written[r.id] = r.updated_at;
+    });
+    return withStore('readwrite', store => sent.forEach(change => {
+      const req = store.get(change.id);
+      req.onsuccess = () => {
+        const current = req.result;
+        if (!current) return;
+        if (current.queued_at === change.queued_at) {
+          store.delete(change.id);
+        } else if (written[change.id]) {
+          store.put(Object.assign({}, current, { base_updated_at: written[change.id] }));
+        }
+      };
+    }));
+  }
+
+  // Envoie toute la file en un lot ; les entrées sont retirées dès que le serveur a répondu
+  // (y compris en conflit : le résultat porte alors la valeur serveur).
+  function flush() {
+    return all().then(changes => {
+      if (!changes.length) return { results: [], conflicts: 0, errors: 0 };
+      const csrf = changes[changes.length - 1].csrf;
+      // Identifiant stable tant que la file ne change pas : une nouvelle tentative est rejouée, pas réappliquée
+      const batch = `${changes.length}-${Math.max(...changes.map(c => c.queued_at))}`;
+      return fetch(SYNC_URL, {
+        method: 'POST',
+        credentials: 'same-origin',
+        headers: { 'Content-Type': 'application/json', 'X-CSRFToken': csrf },
+        body: JSON.stringify({
+          batch: batch,
+          changes: changes.map(c => ({ id: c.id, value: c.value, base_updated_at: c.base_updated_at })),
+        }),
+      }).then(response => {
+        if (!response.ok) throw new Error(`Synchronisation refusée (${response.status})`);
+        return response.json();
+      }).then(data => settle(changes, data.results || []).then(() => data));
+    });
+  }
+
+  scope.GradeQueue = { add, all, remove, flush, SYNC_TAG: 'grade-sync' };
+})(self);
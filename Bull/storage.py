@@ -0,0 +1,116 @@
+# ---------------------------
+# Fichiers statiques versionnés
+# ---------------------------
+# collectstatic copie chaque fichier sous un nom haché (bootstrap.3f2a….css) et
+# écrit staticfiles.json ; {% static %} renvoie alors ces noms, que l'on peut
+# mettre en cache un an. Les CSS/JS hachés sont minifiés (si rjsmin/rcssmin sont
+# installés) puis précompressés en .gz et .br pour être servis tels quels.
+import gzip
+import hashlib
+import json
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.templatetags.static import static
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle
+    brotli = None
+try:
+    import rcssmin
+except ImportError:  # dépendance optionnelle
+    rcssmin = None
+try:
+    import rjsmin
+except ImportError:  # dépendance optionnelle
+    rjsmin = None
+
+COMPRESSIBLE = ('.css', '.js', '.json', '.svg', '.txt', '.html', '.map')
+# En dessous de cette taille, la version compressée n'apporte rien
+MIN_COMPRESS_SIZE = 512
+
+# Coquille de l'application préchargée par le service worker
+SHELL_ASSETS = (
+    'manifest.json',
+    'css/bootstrap.css',
+    'css/all.css',
+    'js/bootstrap.js',
+    'js/chart.js',
+    'js/all.js',
+    'js/grade-queue.js',
+)
+
+
+def _minifier(name):
+    if '.min.' in name:
+        return None
+    if name.endswith('.css') and rcssmin is not None:
+        return rcssmin.cssmin
+    if name.endswith('.js') and rjsmin is not None:
+        return rjsmin.jsmin
+    return None
+
+
+def precompress(path):
+    """Écrit ``path.gz`` (et ``path.br`` si brotli est installé) à côté du fichier."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+
+
+class VersionedStaticStorage(ManifestStaticFilesStorage):
+    # Sans build (développement, tests), {% static %} retombe sur les noms d'origine
+    manifest_strict = False
+
+    def hashed_name(self, name, content=None, filename=None):
+        # Références vers des fichiers absents du dépôt (polices FontAwesome, sourcemaps) :
+        # laissées telles quelles au lieu de faire échouer collectstatic
+        if content is None:
+            path = (filename or name).split('?')[0].split('#')[0]
+            if not self.exists(path):
+                return name
+        return super().hashed_name(name, content, filename)
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        # Le hachage porte sur la source : le nom change dès que la source change,
+        # la minification peut donc se faire après coup sur la copie hachée.
+        for name in sorted(hashed):
+            if name.endswith(COMPRESSIBLE):
+                self._optimize(name)
+
+    def _optimize(self, name):
+        path = self.path(name)
+        minify = _minifier(name)
+        if minify is not None:
+            with open(path, encoding='utf-8') as f:
+                source = f.read()
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(minify(source))
+        precompress(path)
+
+
+def service_worker_context():
+    """Liste de préchargement et version du cache, tirées des URL (hachées) des fichiers."""
+    precache = ['/'] + [static(name) for name in SHELL_ASSETS]
+    version = hashlib.sha1('\n'.join(precache).encode()).hexdigest()[:12]
+    return {
+        'precache': precache,
+        'precache_json': json.dumps(precache),
+        'cache_name': f'smartecole-static-{version}',
+        'grade_queue_url': static('js/grade-queue.js'),
+    }
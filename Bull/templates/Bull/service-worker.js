@@ -0,0 +1,69 @@
+{% autoescape off %}// Servi à la racine (/service-worker.js) pour contrôler toutes les pages de l'application.
+// Généré à partir du manifeste des fichiers statiques : les URL hachées changent à chaque
+// build, et avec elles le nom du cache, ce qui purge l'ancien à l'activation.
+importScripts('{{ grade_queue_url }}');
+
+const CACHE_NAME = '{{ cache_name }}';
+const DATA_CACHE = 'smartecole-data-v1';
+const urlsToCache = {{ precache_json }};
+
+// Page de saisie des notes et feuille de notes compacte : réseau d'abord, cache en secours
+const GRADE_PAGE = /^\/classsubject\/\d+\/students\/$/;
+const GRADE_SHEET = /^\/api\/grade-sheet\/$/;
+
+self.addEventListener('install', event => {
+  event.waitUntil(
+    caches.open(CACHE_NAME)
+      .then(cache => cache.addAll(urlsToCache))
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener('activate', event => {
+  event.waitUntil(
+    caches.keys().then(keys => Promise.all(
+      keys.filter(k => k !== CACHE_NAME && k !== DATA_CACHE).map(k => caches.delete(k))
+    )).then(() => self.clients.claim())
+  );
+});
+
+function networkFirst(request, cacheName) {
+  return fetch(request).then(response => {
+    if (response.ok) {
+      const copy = response.clone();
+      caches.open(cacheName).then(cache => cache.put(request, copy));
+    }
+    return response;
+  }).catch(() => caches.match(request).then(cached => cached || Response.error()));
+}
+
+self.addEventListener('fetch', event => {
+  const request = event.request;
+  const url = new URL(request.url);
+  if (request.method !== 'GET' || url.origin !== self.location.origin) {
+    return;
+  }
+  if (GRADE_PAGE.test(url.pathname) || GRADE_SHEET.test(url.pathname)) {
+    event.respondWith(networkFirst(request, DATA_CACHE));
+    return;
+  }
+  // Fichiers statiques hachés : immuables, le cache suffit
+  if (url.pathname.startsWith('/static/')) {
+    event.respondWith(
+      caches.match(request).then(response => response || fetch(request))
+    );
+  }
+  // Les autres pages et l'API restent servies par le réseau
+});
+
+// Rejeu de la file hors ligne dès que la connexion revient (Background Sync)
+self.addEventListener('sync', event => {
+  if (event.tag === GradeQueue.SYNC_TAG) {
+    event.waitUntil(
+      GradeQueue.flush().then(data => self.clients.matchAll().then(clients => {
+        clients.forEach(client => client.postMessage({ type: 'grade-sync', data: data }));
+      }))
+    );
+  }
+});
+{% endautoescape %}
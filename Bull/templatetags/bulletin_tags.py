@@ -1,12 +1,20 @@
 from django import template
+from Bull.services.lookups import BulletinIndex, GradeIndex, SubjectGrades
+from Bull.services.generation import ANNUAL, SEQUENCE, TRIMESTER
+from Bull.services.permissions import managed_class_subject_ids
 register = template.Library()
 
+# Les filtres acceptent une liste (parcours complet) ou un index construit
+# dans la vue (GradeIndex / BulletinIndex) pour un accès en temps constant.
+
 @register.filter
 def get_grade(grades, key):
     try:
         student_id, subject_id = [int(x) for x in key.split(',')]
     except Exception:
         return None
+    if isinstance(grades, GradeIndex):
+        return grades.get(student_id, subject_id)
     for g in grades:
         if g.student_id == student_id and g.class_subject.subject_id == subject_id:
             return g
@@ -14,11 +22,15 @@ def get_grade(grades, key):
 
 @register.filter
 def get_all_ok(grades, student_id):
+    if isinstance(grades, GradeIndex):
+        return grades.all_ok(student_id)
     student_grades = [g for g in grades if g.student_id == student_id]
     return all(g.value is not None for g in student_grades)
 
 @register.filter
 def get_bulletin(bulletins, student_id):
+    if isinstance(bulletins, BulletinIndex):
+        return bulletins.for_student(student_id)
     for b in bulletins:
         if b.student_id == student_id:
             return b
@@ -30,6 +42,8 @@ def get_bulletin_for_student(bulletins, student):
     """
     Returns the bulletin object for the given student from a queryset or list of bulletins.
     """
+    if isinstance(bulletins, BulletinIndex):
+        return bulletins.for_student(student.id)
     for bulletin in bulletins:
         if hasattr(bulletin, 'student_id') and bulletin.student_id == student.id:
             return bulletin
@@ -40,6 +54,8 @@ def get_bulletin_for_student(bulletins, student):
 
 @register.filter
 def get_grade_for_subject(grades, subject_id):
+    if isinstance(grades, SubjectGrades):
+        return grades.get(subject_id)
     for g in grades:
         if hasattr(g, 'class_subject') and getattr(g.class_subject, 'subject_id', None) == subject_id:
             return g
@@ -48,15 +64,48 @@ def get_grade_for_subject(grades, subject_id):
 
 @register.filter
 def get_sequence_bulletins(bulletins_by_student, student):
+    if isinstance(bulletins_by_student, BulletinIndex):
+        return bulletins_by_student.of_type(SEQUENCE, student.id)
     bulletins = bulletins_by_student.get(student.id, [])
-    return [b for b in bulletins if hasattr(b, 'sequence') and b.sequence is not None and not hasattr(b, 'is_trimester') and not hasattr(b, 'is_annual')]
+    return [b for b in bulletins if b.sequence_id is not None and not b.is_trimester and not b.is_annual]
 
 @register.filter
 def get_trimester_bulletins(bulletins_by_student, student):
+    if isinstance(bulletins_by_student, BulletinIndex):
+        return bulletins_by_student.of_type(TRIMESTER, student.id)
     bulletins = bulletins_by_student.get(student.id, [])
-    return [b for b in bulletins if hasattr(b, 'is_trimester') and b.is_trimester]
+    return [b for b in bulletins if b.is_trimester]
 
 @register.filter
 def get_annual_bulletins(bulletins_by_student, student):
+    if isinstance(bulletins_by_student, BulletinIndex):
+        return bulletins_by_student.of_type(ANNUAL, student.id)
     bulletins = bulletins_by_student.get(student.id, [])
-    return [b for b in bulletins if hasattr(b, 'is_annual') and b.is_annual]
+    return [b for b in bulletins if b.is_annual]
+
+
+# ---------------------------
+# Accès direct aux index (temps constant)
+# ---------------------------
+@register.simple_tag
+def grade_for(grades, student, subject):
+    """{% grade_for grades student subject as grade %}"""
+    return grades.get(student.id, subject.id)
+
+
+@register.filter
+def grades_of(grades, student):
+    """Notes d'un élève indexées par matière, à combiner avec get_grade_for_subject."""
+    return grades.for_student(student.id)
+
+
+@register.simple_tag
+def bulletins_for(bulletins, student, kind=SEQUENCE):
+    """{% bulletins_for bulletins student 'trimester' as items %}"""
+    return bulletins.of_type(kind, student.id)
+
+
+@register.filter
+def can_manage(class_subject, user):
+    """{% if cs|can_manage:request.user %} : lu dans l'index des droits, sans requête par ligne."""
+    return getattr(class_subject, 'pk', class_subject) in managed_class_subject_ids(user)
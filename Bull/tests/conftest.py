@@ -0,0 +1,52 @@
+import pytest
+from datetime import date
+from django.core.cache import cache
+from Bull.models import SchoolYear, Term, Sequence, Classroom, Subject, ClassSubject, Student, Grade, User
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def school(db):
+    """Petite école : 2 classes de 3 élèves, 2 matières, 1 trimestre à 2 séquences."""
+    admin = User.objects.create_user(username='admin', password='pass', role='admin')
+    sy = SchoolYear.objects.create(name='2024-2025', start_date=date(2024, 9, 1), end_date=date(2025, 6, 30), is_active=True)
+    term = Term.objects.create(school_year=sy, name='T1', order=1)
+    seq1 = Sequence.objects.create(term=term, name='S1', order=1, active=True)
+    seq2 = Sequence.objects.create(term=term, name='S2', order=2)
+    maths = Subject.objects.create(code='MAT', name='Maths')
+    fr = Subject.objects.create(code='FR', name='Français')
+    classrooms = []
+    for cname in ('6A', '6B'):
+        classroom = Classroom.objects.create(name=cname, level='6', series='A')
+        ClassSubject.objects.create(classroom=classroom, subject=maths, coefficient=2)
+        ClassSubject.objects.create(classroom=classroom, subject=fr, coefficient=1)
+        for i in range(3):
+            # Le signal post_save crée les notes (brouillon, 0) pour chaque séquence
+            Student.objects.create(
+                matricule=f'{cname}-{i}', first_name=f'P{i}', last_name=f'N{i}',
+                gender='F' if i % 2 else 'M', birth_date=date(2012, 1, 1), birth_place='Yaoundé',
+                classroom=classroom, repeater=(i == 0),
+            )
+        classrooms.append(classroom)
+    Grade.objects.update(term=term)
+    return {
+        'admin': admin, 'school_year': sy, 'term': term, 'sequences': [seq1, seq2],
+        'subjects': [maths, fr], 'classrooms': classrooms,
+    }
+
+
+@pytest.fixture
+def validate_all(db):
+    """Valide toutes les notes d'une séquence avec des valeurs distinctes."""
+    def _validate(sequence, value=12):
+        for i, grade in enumerate(Grade.objects.filter(sequence=sequence).order_by('id')):
+            grade.value = value + (i % 5)
+            grade.status = 'validated'
+            grade.save()
+    return _validate
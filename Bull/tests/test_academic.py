@@ -0,0 +1,50 @@
+import pytest
+from Bull.models import Grade, Sequence, Settings
+from Bull.services.academic import academic_context
+from Bull.services.grade_bulk import upsert_grades
+
+
+@pytest.mark.django_db
+def test_context_resolved_once_then_cached(school, django_assert_num_queries):
+    context = academic_context()
+    assert context['school_year'] == school['school_year']
+    assert context['sequence'] == school['sequences'][0]
+    assert context['term'] == school['term']
+    assert (context['scale_max'], context['pass_mark'], context['rounding']) == (20, 10, 2)
+    with django_assert_num_queries(0):
+        assert academic_context()['sequence'] == school['sequences'][0]
+
+
+@pytest.mark.django_db
+def test_context_follows_writes(school):
+    academic_context()
+    seq1, seq2 = school['sequences']
+    seq1.active = False
+    seq1.save()
+    seq2.active = True
+    seq2.save()
+    assert academic_context()['sequence'] == seq2
+    Settings.objects.create(school_year=school['school_year'], scale_max=10, min_pass_avg=5, rounding=1)
+    context = academic_context()
+    assert (context['scale_max'], context['pass_mark'], context['rounding']) == (10, 5, 1)
+
+
+@pytest.mark.django_db
+def test_grade_scale_comes_from_settings(school):
+    Settings.objects.create(school_year=school['school_year'], scale_max=10)
+    grade = Grade.objects.filter(sequence=school['sequences'][0]).first()
+    result = upsert_grades(school['admin'], [{'id': grade.id, 'value': 15}])[0]
+    assert result['code'] == 'invalid_value'
+    assert 'entre 0 et 10' in result['error']
+    assert upsert_grades(school['admin'], [{'id': grade.id, 'value': 9.5}])[0]['status'] == 'updated'
+
+
+@pytest.mark.django_db
+def test_templates_receive_the_context(client, school):
+    client.force_login(school['admin'])
+    Settings.objects.create(school_year=school['school_year'], scale_max=10)
+    cs = school['classrooms'][0].class_subjects.first()
+    response = client.get(f'/classsubject/{cs.id}/students/')
+    assert response.context['academic']['scale_max'] == 10
+    assert 'max="10"' in response.content.decode()
+    assert not Sequence.objects.filter(active=True).exclude(id=school['sequences'][0].id).exists()
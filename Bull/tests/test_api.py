@@ -0,0 +1,162 @@
+import pytest
+from datetime import date
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from Bull.models import (
+    ArchivedBulletin, ArchivedGrade, Bulletin, ClassSubject, Classroom, Discipline,
+    Grade, MentionRule, Student, Teacher, User,
+)
+
+ENDPOINTS = [
+    'users', 'schoolyears', 'terms', 'sequences', 'classrooms', 'teachers', 'students',
+    'subjects', 'classsubjects', 'grades', 'disciplines', 'mentionrules', 'settings',
+    'bulletins', 'archivedgrades', 'archivedbulletins',
+]
+
+
+def _add_class(school, name):
+    """Ajoute une classe complète : élèves, notes validées, bulletins, discipline et archives."""
+    sy, term = school['school_year'], school['term']
+    classroom = Classroom.objects.create(name=name, level='5', series='A')
+    user = User.objects.create_user(username=f'prof-{name}', password='pass', role='teacher')
+    teacher = Teacher.objects.create(user=user)
+    for subject in school['subjects']:
+        ClassSubject.objects.create(classroom=classroom, subject=subject, coefficient=1, teacher=teacher)
+    for i in range(3):
+        Student.objects.create(
+            matricule=f'{name}-{i}', first_name=f'P{i}', last_name=f'N{i}', gender='M',
+            birth_date=date(2012, 1, 1), birth_place='Douala', classroom=classroom,
+        )
+    grades = Grade.objects.filter(student__classroom=classroom)
+    grades.update(term=term, value=14, status='validated', updated_by=school['admin'], created_by=school['admin'])
+    for student in classroom.students.all():
+        bulletin = Bulletin.objects.create(student=student, classroom=classroom, sequence=school['sequences'][0], average=14, rank=1)
+        ArchivedBulletin.objects.create(bulletin=bulletin)
+        Discipline.objects.create(student=student, term=term, absences=2)
+    for grade in grades[:3]:
+        ArchivedGrade.objects.create(grade=grade, school_year=sy)
+    MentionRule.objects.create(school_year=sy, label=f'M-{name}', min_avg=0, max_avg=20)
+
+
+def _count_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200, url
+    return len(ctx), response.json()
+
+
+@pytest.mark.django_db
+def test_list_endpoints_run_a_constant_number_of_queries(school):
+    client = APIClient()
+    client.force_authenticate(school['admin'])
+    _add_class(school, '5A')
+    before = {name: _count_queries(client, f'/api/{name}/')[0] for name in ENDPOINTS}
+    _add_class(school, '5B')
+    _add_class(school, '5C')
+    after = {name: _count_queries(client, f'/api/{name}/')[0] for name in ENDPOINTS}
+    assert after == before
+    assert max(after.values()) <= 6
+
+
+@pytest.mark.django_db
+def test_bulletin_mention_and_appreciation_match_model(school):
+    _add_class(school, '5A')
+    client = APIClient()
+    client.force_authenticate(school['admin'])
+    _, data = _count_queries(client, '/api/bulletins/')
+    data = data['results']
+    bulletin = Bulletin.objects.get(id=data[0]['id'])
+    assert data[0]['term'] == school['term'].id
+    assert data[0]['mention'] == bulletin.assign_mention() == 'M-5A'
+    assert data[0]['appreciation'] == bulletin.generate_appreciation()
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_walks_every_grade_once(school):
+    client = APIClient()
+    client.force_authenticate(school['admin'])
+    seen = []
+    url = '/api/grades/?page_size=5&fields=id'
+    while url:
+        data = client.get(url).json()
+        assert len(data['results']) <= 5
+        seen.extend(row['id'] for row in data['results'])
+        url = data['next']
+    assert seen == list(Grade.objects.order_by('id').values_list('id', flat=True))
+
+
+@pytest.mark.django_db
+def test_sparse_fields_and_nested_ids(school):
+    client = APIClient()
+    client.force_authenticate(school['admin'])
+    row = client.get('/api/grades/', {'fields': 'id,value,student'}).json()['results'][0]
+    assert set(row) == {'id', 'value', 'student'}
+    assert isinstance(row['student'], dict)
+    row = client.get('/api/grades/', {'nested': 'ids'}).json()['results'][0]
+    assert isinstance(row['student'], int) and isinstance(row['class_subject'], int)
+    year = client.get('/api/schoolyears/', {'nested': 'ids'}).json()['results'][0]
+    assert year['terms'] == [school['term'].id]
+
+
+@pytest.mark.django_db
+def test_roles_restrict_api(school):
+    client = APIClient()
+    parent = User.objects.create_user(username='parent', password='x', role='parent')
+    client.force_authenticate(parent)
+    assert client.patch(f'/api/users/{parent.id}/', {'role': 'admin'}, format='json').status_code == 403
+    for name in ENDPOINTS:
+        assert client.get(f'/api/{name}/').status_code == 403, name
+    parent.refresh_from_db()
+    assert parent.role == 'parent'
+
+    # Un enseignant lit mais n'écrit pas ; utilisateurs, barèmes et mentions sont réservés à l'administration
+    teacher = User.objects.create_user(username='prof', password='x', role='teacher')
+    client.force_authenticate(teacher)
+    assert client.get('/api/students/').status_code == 200
+    assert client.patch(f"/api/settings/{school['school_year'].id}/", {'scale_max': 100}, format='json').status_code == 403
+    for name in ('users', 'mentionrules', 'settings'):
+        assert client.get(f'/api/{name}/').status_code == 403, name
+    assert client.post('/api/subjects/', {'code': 'X', 'name': 'X'}, format='json').status_code == 403
+
+    # L'administration ne change pas un rôle par l'API et ne rouvre pas une année clôturée
+    client.force_authenticate(school['admin'])
+    assert client.patch(f'/api/users/{teacher.id}/', {'role': 'admin'}, format='json').status_code == 200
+    teacher.refresh_from_db()
+    assert teacher.role == 'teacher'
+    year = school['school_year']
+    year.is_active, year.is_closed = False, True
+    year.save()
+    response = client.patch(f'/api/schoolyears/{year.id}/', {'is_active': True, 'is_closed': False}, format='json')
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_bulletin_generate_and_export_actions(school, validate_all, settings, tmp_path):
+    from Bull.services import bundles, campaign, generation
+    settings.MEDIA_ROOT = tmp_path
+    client = APIClient()
+    client.force_authenticate(school['admin'])
+    classroom, term = school['classrooms'][0], school['term']
+    payload = {'classroom_id': classroom.id, 'term_id': term.id}
+    assert client.post('/api/bulletins/generate/', payload, format='json').status_code == 400
+    assert client.post('/api/bulletins/generate/', {'classroom_id': 'x'}, format='json').status_code == 400
+    assert client.post('/api/bulletins/generate/', [1], format='json').status_code == 400
+
+    for seq in school['sequences']:
+        validate_all(seq)
+        campaign.run_campaign(school['school_year'], generation.SEQUENCE, seq, executor='thread')
+    rows = client.post('/api/bulletins/generate/', payload, format='json').json()
+    assert len(rows) == 3 and all(r['term'] == term.id for r in rows)
+    assert Bulletin.objects.filter(is_trimester=True).count() == 3
+
+    # Export : fichier généré, puis archive annuelle une fois l'année regroupée
+    bulletin = Bulletin.objects.get(id=rows[0]['id'])
+    content = open(bulletin.pdf_path.path, 'rb').read()
+    response = client.get(f'/api/bulletins/{bulletin.id}/export_pdf/')
+    assert response.status_code == 200 and response.content == content
+    bundles.pack_school_year(school['school_year'].id)
+    response = client.get(f'/api/bulletins/{bulletin.id}/export_pdf/')
+    assert response.status_code == 200 and response.content == content
+    Bulletin.objects.filter(id=bulletin.id).update(is_trimester=False, is_annual=True)
+    assert client.get(f'/api/bulletins/{bulletin.id}/export_pdf/').status_code == 404
@@ -0,0 +1,77 @@
+import pytest
+from datetime import date
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework.test import APIClient
+from Bull.models import (
+    ArchivedBulletin, ArchivedDiscipline, ArchivedGrade, Bulletin, Discipline, Grade, MentionRule,
+    SchoolYear, Sequence, Student, Term,
+)
+from Bull.services import archive
+
+
+@pytest.fixture
+def past_year(school, validate_all):
+    """L'année du fixture ``school`` devient une année passée, avec bulletins et discipline."""
+    old = school['school_year']
+    seq1 = school['sequences'][0]
+    validate_all(seq1)
+    MentionRule.objects.create(school_year=old, label='Bien', min_avg=0, max_avg=20)
+    for student in Student.objects.all():
+        Bulletin.objects.create(student=student, classroom=student.classroom, sequence=seq1, average=13, rank=1)
+        Discipline.objects.create(student=student, term=school['term'], sequence=seq1, absences=3)
+    SchoolYear.objects.update(is_active=False)
+    new = SchoolYear.objects.create(name='2025-2026', start_date=date(2025, 9, 1), end_date=date(2026, 6, 30), is_active=True)
+    Sequence.objects.create(term=Term.objects.create(school_year=new, name='T1', order=1), name='S1', order=1, active=True)
+    old.refresh_from_db()
+    return old
+
+
+@pytest.mark.django_db
+def test_close_moves_rows_to_archives(past_year, school):
+    grade = Grade.objects.select_related('student', 'class_subject__subject').filter(
+        sequence=school['sequences'][0]).order_by('id').first()
+    grades = Grade.objects.filter(sequence__term__school_year=past_year).count()
+    counts = archive.close_school_year(past_year, batch_size=5)
+    assert counts == {'bulletins': 6, 'disciplines': 6, 'grades': grades}
+    assert not any(qs.exists() for qs in archive.hot_rows(past_year).values())
+    past_year.refresh_from_db()
+    assert past_year.is_closed and past_year.closed_at
+
+    archived = ArchivedGrade.objects.get(grade_id=grade.id)
+    assert (archived.matricule, archived.subject_code, archived.value, archived.status) == (
+        grade.student.matricule, grade.class_subject.subject.code, grade.value, 'validated')
+    bulletin = ArchivedBulletin.objects.get(matricule='6A-0')
+    assert bulletin.average == 13 and bulletin.mention == 'Bien' and bulletin.term_average is not None
+    assert ArchivedDiscipline.objects.filter(school_year=past_year, absences=3).count() == 6
+
+    # Relancer ne fait rien ; un nouvel élève n'a pas de notes dans l'année clôturée
+    assert archive.close_school_year(past_year) == {'bulletins': 0, 'disciplines': 0, 'grades': 0}
+    Student.objects.create(matricule='NEW-1', first_name='A', last_name='B', gender='M', birth_date=date(2013, 1, 1),
+                           birth_place='Kribi', classroom=school['classrooms'][0])
+    assert not Grade.objects.filter(student__matricule='NEW-1', sequence__term__school_year=past_year).exists()
+
+
+@pytest.mark.django_db
+def test_archives_queryable_through_api(past_year, school):
+    archive.close_school_year(past_year)
+    client = APIClient()
+    client.force_authenticate(school['admin'])
+    rows = client.get('/api/archivedbulletins/', {'school_year': past_year.id, 'matricule': '6B-1'}).json()['results']
+    assert len(rows) == 1 and rows[0]['classroom_name'] == '6B' and rows[0]['mention'] == 'Bien'
+    rows = client.get('/api/archivedgrades/', {'matricule': '6B-1', 'fields': 'subject_code,value'}).json()['results']
+    assert {row['subject_code'] for row in rows} == {'MAT', 'FR'}
+    assert len(client.get('/api/archiveddisciplines/').json()['results']) == 6
+    assert client.delete(f"/api/archivedgrades/{ArchivedGrade.objects.first().id}/").status_code == 405
+    assert client.get('/api/archivedgrades/', {'school_year': 'abc'}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_command_refuses_active_year_and_dry_run(past_year, school, capsys):
+    with pytest.raises(CommandError):
+        call_command('archive_school_year', '2025-2026')
+    call_command('archive_school_year', str(past_year.id), '--dry-run')
+    assert 'bulletins : 6 à archiver' in capsys.readouterr().out
+    assert Bulletin.objects.count() == 6
+    call_command('archive_school_year', past_year.name, '--batch-size', '4')
+    assert Bulletin.objects.count() == 0 and ArchivedBulletin.objects.count() == 6
@@ -0,0 +1,21 @@
+import pytest
+from Bull.models import Grade
+from Bull.services import benchmark
+
+
+@pytest.mark.django_db
+def test_scenarios_measured_on_generated_dataset():
+    results = benchmark.run_dataset('small', only=['save_grades', 'validate_grades', 'api_grades'])
+    assert list(results) == ['save_grades', 'validate_grades', 'api_grades']
+    assert all(r['queries'] > 0 and r['ms'] > 0 and r['peak_kb'] > 0 for r in results.values())
+    assert results['api_grades']['status'] == 200
+    # La saisie puis la validation ont bien porté sur les notes de la séquence en cours
+    target = benchmark._targets()
+    assert set(Grade.objects.filter(id__in=target['grades']).values_list('status', flat=True)) == {'validated'}
+
+
+def test_compare_against_budgets_and_baseline():
+    results = {'small': {'api_grades': {'ms': 40, 'queries': 4, 'peak_kb': 100}}}
+    assert benchmark.compare(results, {'*': {'api_grades': {'queries': 4}}}) == []
+    assert benchmark.compare(results, {'small': {'api_grades': {'queries': 3}}}) == ['small/api_grades : queries = 4 > 3']
+    assert benchmark.compare(results, {'small': {'api_grades': {'ms': 35}}}, tolerance=0.25) == []
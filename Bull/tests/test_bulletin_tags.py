@@ -0,0 +1,63 @@
+import time
+from types import SimpleNamespace
+
+from django.template import Context, Template
+
+from Bull.services.lookups import BulletinIndex, GradeIndex
+from Bull.templatetags.bulletin_tags import (
+    get_all_ok, get_bulletin_for_student, get_grade, get_trimester_bulletins,
+)
+
+GRID = Template(
+    "{% load bulletin_tags %}"
+    "{% for student in students %}{{ bulletins|get_bulletin_for_student:student }}"
+    "{% for subject in subjects %}{% with key=student.key|add:subject.key %}"
+    "{{ grades|get_grade:key }}{% endwith %}{% endfor %}"
+    "{{ grades|get_all_ok:student.id }}{% endfor %}"
+)
+
+
+def _fake_class(nb_students=70, nb_subjects=15):
+    students = [SimpleNamespace(id=i, key=f"{i},") for i in range(1, nb_students + 1)]
+    subjects = [SimpleNamespace(id=j, key=str(j)) for j in range(1, nb_subjects + 1)]
+    grades = [
+        SimpleNamespace(student_id=s.id, class_subject=SimpleNamespace(subject_id=sub.id), value=10)
+        for s in students for sub in subjects
+    ]
+    bulletins = [SimpleNamespace(student_id=s.id, sequence_id=1, is_trimester=False, is_annual=False) for s in students]
+    return students, subjects, grades, bulletins
+
+
+def _lookup_grid(students, subjects, grades, bulletins):
+    start = time.perf_counter()
+    for student in students:
+        get_bulletin_for_student(bulletins, student)
+        for subject in subjects:
+            get_grade(grades, f"{student.id},{subject.id}")
+        get_all_ok(grades, student.id)
+    return time.perf_counter() - start
+
+
+def test_index_renders_same_grid():
+    students, subjects, grades, bulletins = _fake_class()
+    context = {'students': students, 'subjects': subjects}
+    list_html = GRID.render(Context(dict(context, grades=grades, bulletins=bulletins)))
+    index_html = GRID.render(Context(dict(context, grades=GradeIndex(grades), bulletins=BulletinIndex(bulletins))))
+    assert index_html == list_html
+
+
+def test_index_lookups_are_faster_than_list_scans():
+    students, subjects, grades, bulletins = _fake_class()
+    list_time = _lookup_grid(students, subjects, grades, bulletins)
+    index_time = _lookup_grid(students, subjects, GradeIndex(grades), BulletinIndex(bulletins))
+    assert list_time > 5 * index_time
+
+
+def test_bulletin_index_groups_by_kind():
+    student = SimpleNamespace(id=1)
+    seq = SimpleNamespace(student_id=1, sequence_id=1, is_trimester=False, is_annual=False)
+    trim = SimpleNamespace(student_id=1, sequence_id=1, is_trimester=True, is_annual=False)
+    index = BulletinIndex([seq, trim])
+    assert get_trimester_bulletins(index, student) == [trim]
+    assert get_trimester_bulletins({1: [seq, trim]}, student) == [trim]
+    assert index.for_student(1) is seq
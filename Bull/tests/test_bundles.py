@@ -0,0 +1,125 @@
+import os
+import zipfile
+import pytest
+from django.core.management import call_command
+from Bull.models import Bulletin, Student
+from Bull.services import bundles, campaign, generation
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def generated(school, media, validate_all):
+    seq = school['sequences'][0]
+    validate_all(seq)
+    campaign.run_campaign(school['school_year'], generation.SEQUENCE, seq, executor='thread')
+    return seq
+
+
+@pytest.mark.django_db
+def test_pdfs_sharded_by_year_class_and_period(school, generated, media):
+    bulletin = Bulletin.objects.get(student__matricule='6B-2')
+    year, classroom = school['school_year'].id, school['classrooms'][1].id
+    assert bulletin.pdf_path.name == f"bulletins/{year}/{classroom}/seq-{generated.id}/{bulletin.student_id}.pdf"
+    assert os.path.exists(bulletin.pdf_path.path)
+
+
+@pytest.mark.django_db
+def test_legacy_flat_files_moved(school, generated, media):
+    bulletin = Bulletin.objects.get(student__matricule='6A-1')
+    legacy = f"bulletins/bulletin_{bulletin.student_id}_{generated.id}.pdf"
+    os.replace(bulletin.pdf_path.path, media / legacy)
+    sharded = bulletin.pdf_path.name
+    Bulletin.objects.filter(pk=bulletin.pk).update(pdf_path=legacy)
+    # Sans bulletin enregistré, la classe actuelle de l'élève est utilisée
+    orphan = Student.objects.get(matricule='6B-0')
+    (media / f"bulletins/bulletin_trim_{orphan.id}_{school['term'].id}.pdf").write_bytes(b'%PDF')
+
+    call_command('shard_bulletins', '--dry-run')
+    assert (media / legacy).exists()
+    call_command('shard_bulletins')
+    bulletin.refresh_from_db()
+    assert bulletin.pdf_path.name == sharded and os.path.exists(bulletin.pdf_path.path)
+    year, classroom = school['school_year'].id, school['classrooms'][1].id
+    assert (media / f"bulletins/{year}/{classroom}/trim-{school['term'].id}/{orphan.id}.pdf").exists()
+    assert not list((media / 'bulletins').glob('bulletin_*.pdf'))
+
+
+@pytest.mark.django_db
+def test_pack_and_random_access(school, generated, media):
+    year = school['school_year'].id
+    contents = {b.student_id: open(b.pdf_path.path, 'rb').read() for b in Bulletin.objects.all()}
+    assert bundles.pack_school_year(year) == 6
+    assert not (media / 'bulletins' / str(year)).exists()
+    zip_path, index_path = bundles.bundle_paths(year)
+    with zipfile.ZipFile(zip_path) as bundle:
+        assert bundle.testzip() is None and len(bundle.namelist()) == 6
+    assert os.path.getsize(index_path) == len(bundles.INDEX_MAGIC) + 6 * bundles.RECORD.size
+    for student_id, content in contents.items():
+        assert bundles.read_bundled(year, generation.SEQUENCE, generated.id, student_id) == content
+    assert bundles.read_bundled(year, generation.TRIMESTER, generated.id, student_id) is None
+
+    # Un PDF régénéré remplace l'ancien membre, les autres sont conservés
+    path = media / Bulletin.objects.get(student_id=student_id).pdf_path.name
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b'%PDF-nouveau')
+    assert bundles.pack_school_year(year) == 1
+    assert bundles.read_bundled(year, generation.SEQUENCE, generated.id, student_id) == b'%PDF-nouveau'
+    assert sum(bundles.read_bundled(year, generation.SEQUENCE, generated.id, s) is not None for s in contents) == 6
+
+
+@pytest.mark.django_db
+def test_stale_index_never_reads_garbage(school, generated, media):
+    year = school['school_year'].id
+    bundles.pack_school_year(year)
+    zip_path, index_path = bundles.bundle_paths(year)
+    with open(index_path, 'rb') as handle:
+        stale = handle.read()
+    # Régénération puis reconditionnement : les membres changent de position
+    bulletin = Bulletin.objects.order_by('id').first()
+    path = media / bulletin.pdf_path.name
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b'%PDF-' + os.urandom(4000))
+    bundles.pack_school_year(year)
+    with open(index_path, 'rb') as handle:
+        handle.read(len(bundles.INDEX_MAGIC))
+        records = [bundles.RECORD.unpack(chunk) for chunk in iter(lambda: handle.read(bundles.RECORD.size), b'')]
+    # Instant entre l'échange de l'archive et celui de l'index
+    with open(index_path, 'wb') as handle:
+        handle.write(stale)
+    for b in Bulletin.objects.all():
+        content = bundles.read_bundled(year, generation.SEQUENCE, generated.id, b.student_id)
+        assert content is None or content.startswith(b'%PDF')
+    assert bundles.read_bundled(year, generation.SEQUENCE, generated.id, bulletin.student_id) is None
+
+    # Index de l'ancien format (sans CRC) toujours lu
+    magic, layout = bundles.LEGACY_INDEX
+    with open(index_path, 'wb') as handle:
+        handle.write(magic + b''.join(layout.pack(*record[:-1]) for record in records))
+    assert bundles.read_bundled(year, generation.SEQUENCE, generated.id, bulletin.student_id).startswith(b'%PDF-')
+    assert not os.path.exists(index_path + '.tmp') and os.path.exists(zip_path)
+
+
+@pytest.mark.django_db
+def test_download_falls_back_to_bundle_with_ranges(client, school, generated, media):
+    client.force_login(school['admin'])
+    bulletin = Bulletin.objects.first()
+    url = f"/bulletins/{bulletin.student_id}/{generated.id}/pdf/"
+    content = client.get(url).content
+    assert content.startswith(b'%PDF')
+    bundles.pack_school_year(school['school_year'].id)
+    # Le bulletin n'existe plus non plus dans la table (année archivée)
+    Bulletin.objects.all().delete()
+    response = client.get(url)
+    assert response.status_code == 200 and response.content == content
+    assert response['Accept-Ranges'] == 'bytes'
+    response = client.get(url, HTTP_RANGE='bytes=0-3')
+    assert response.status_code == 206 and response.content == b'%PDF'
+    assert response['Content-Range'] == f"bytes 0-3/{len(content)}"
+    assert client.get(url, HTTP_RANGE='bytes=-5').content == content[-5:]
+    assert client.get(url, HTTP_RANGE=f'bytes={len(content)}-').status_code == 416
+    assert client.get(f"/bulletins/{bulletin.student_id}/{school['sequences'][1].id}/pdf/").status_code == 404
@@ -0,0 +1,77 @@
+import pytest
+from django.core.management import call_command
+from Bull.models import Bulletin, Grade
+from Bull.services import campaign, generation
+from Bull.services.overview import classroom_overview
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_plan_detects_blocked_classes(school, validate_all):
+    seq = school['sequences'][0]
+    validate_all(seq)
+    # Une note en brouillon bloque uniquement la classe concernée
+    Grade.objects.filter(sequence=seq, student__classroom=school['classrooms'][1]).update(status='draft')
+    plan = campaign.plan_campaign(school['school_year'], generation.SEQUENCE, seq)
+    assert [(p['classroom'].name, p['ready'], p['missing']) for p in plan] == [('6A', True, 0), ('6B', False, 6)]
+
+
+@pytest.mark.django_db
+def test_sequence_then_trimester_campaign(school, media, validate_all):
+    for seq in school['sequences']:
+        validate_all(seq)
+        reports = campaign.run_campaign(school['school_year'], generation.SEQUENCE, seq, executor='thread', workers=2)
+        assert [r['bulletins'] for r in reports] == [3, 3]
+        assert all(r['bytes'] > 0 for r in reports)
+    assert Bulletin.objects.count() == 12
+    assert not Grade.objects.exclude(status='locked').exists()
+
+    reports = campaign.run_campaign(school['school_year'], generation.TRIMESTER, school['term'], executor='thread')
+    assert [r['status'] for r in reports] == ['ok', 'ok']
+    assert Bulletin.objects.filter(is_trimester=True).count() == 6
+    # Une seconde exécution met à jour au lieu de dupliquer
+    campaign.run_campaign(school['school_year'], generation.TRIMESTER, school['term'], executor='thread')
+    assert Bulletin.objects.filter(is_trimester=True).count() == 6
+    assert (media / 'bulletins').is_dir()
+
+
+@pytest.mark.django_db
+def test_sequence_pages_ignore_trimester_bulletins(client, school, media, validate_all):
+    seq1 = school['sequences'][0]
+    for seq in school['sequences']:
+        validate_all(seq)
+        campaign.run_campaign(school['school_year'], generation.SEQUENCE, seq, executor='thread')
+    campaign.run_campaign(school['school_year'], generation.TRIMESTER, school['term'], executor='thread')
+    # Les bulletins trimestriels référencent la première séquence du trimestre
+    assert Bulletin.objects.filter(sequence=seq1).count() == 12
+
+    client.force_login(school['admin'])
+    classroom = school['classrooms'][0]
+    response = client.get('/bulletins/', {
+        'schoolyear': school['school_year'].id, 'sequence': seq1.id, 'classroom': classroom.id,
+    })
+    assert len(response.context['bulletins']) == 3
+    assert all(not b.is_trimester for b in response.context['bulletins'])
+    assert [c['bulletins_count'] for c in classroom_overview(school['school_year'], seq1)] == [3, 3]
+
+    # Sans bulletin de séquence, le téléchargement ne sert pas le PDF trimestriel
+    sequence_bulletin = Bulletin.objects.filter(sequence=seq1, is_trimester=False, classroom=classroom).first()
+    student_id = sequence_bulletin.student_id
+    assert client.get(f'/bulletins/{student_id}/{seq1.id}/pdf/').status_code == 200
+    sequence_bulletin.delete()
+    assert client.get(f'/bulletins/{student_id}/{seq1.id}/pdf/').status_code == 404
+
+
+@pytest.mark.django_db
+def test_generate_bulletins_command_prints_report(school, media, validate_all, capsys):
+    seq = school['sequences'][0]
+    validate_all(seq)
+    call_command('generate_bulletins', sequence=seq.id, threads=True)
+    out = capsys.readouterr().out
+    assert '6 bulletins générés.' in out
+    assert 'TOTAL' in out
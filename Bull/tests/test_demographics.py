@@ -0,0 +1,31 @@
+import pytest
+from django.test import Client
+from Bull.models import Classroom
+from Bull.services.demographics import classroom_demographics, school_demographics
+
+
+@pytest.mark.django_db
+def test_counts_and_rollups_in_one_query(school, django_assert_num_queries):
+    Classroom.objects.create(name='Tle C', level='Tle', series='C')
+    with django_assert_num_queries(1):
+        data = school_demographics()
+    counts = {row['name']: (row['total'], row['filles'], row['garcons'], row['redoublants']) for row in data['classes'].values()}
+    assert counts == {'6A': (3, 1, 2, 1), '6B': (3, 1, 2, 1), 'Tle C': (0, 0, 0, 0)}
+    assert data['levels']['6'] == {'total': 6, 'filles': 2, 'garcons': 4, 'redoublants': 2}
+    assert list(data['series']) == ['A', 'C']
+    assert data['totals']['total'] == 6
+
+    class_a = school['classrooms'][0]
+    assert list(classroom_demographics([class_a.id])) == [class_a.id]
+
+
+@pytest.mark.django_db
+def test_subject_cards_query_count_is_flat(school, django_assert_max_num_queries):
+    client = Client()
+    client.force_login(school['admin'])
+    maths = school['subjects'][0]
+    with django_assert_max_num_queries(6):
+        response = client.get(f'/subjects/{maths.id}/class-cards/')
+    assert [card['stats']['total'] for card in response.context['class_cards']] == [3, 3]
+    response = client.get(f"/classes/{school['classrooms'][0].id}/")
+    assert response.context['stats']['filles'] == 1
@@ -0,0 +1,118 @@
+import pytest
+from rest_framework.test import APIClient
+from Bull.models import ClassSubject, Grade, IdempotentRequest, Teacher, User
+
+
+@pytest.fixture
+def api(school):
+    client = APIClient()
+    client.force_authenticate(school['admin'])
+    return client
+
+
+@pytest.mark.django_db
+def test_bulk_upsert_reports_each_item(school, api, django_assert_max_num_queries):
+    seq = school['sequences'][0]
+    grades = list(Grade.objects.filter(sequence=seq).order_by('id')[:3])
+    grades[1].status = 'locked'
+    grades[1].save()
+    cs = grades[0].class_subject
+    payload = {'grades': [
+        {'id': grades[0].id, 'value': 15.5, 'comment': 'Bien'},
+        {'id': grades[1].id, 'value': 10},
+        {'id': grades[2].id, 'value': 25},
+        {'id': 999999, 'value': 12},
+    ]}
+    with django_assert_max_num_queries(12):
+        data = api.post('/api/grades/bulk/', payload, format='json').json()
+    assert [r['status'] for r in data['results']] == ['updated', 'error', 'error', 'error']
+    assert [r.get('code') for r in data['results']][1:] == ['locked', 'invalid_value', 'not_found']
+    grades[0].refresh_from_db()
+    assert (grades[0].value, grades[0].comment, grades[0].updated_by_id) == (15.5, 'Bien', school['admin'].id)
+
+    # Création par triplet (la note n'existe pas encore)
+    Grade.objects.filter(id=grades[0].id).delete()
+    data = api.post('/api/grades/bulk/', [{
+        'student': grades[0].student_id, 'class_subject': cs.id, 'sequence': seq.id, 'value': 9,
+    }], format='json').json()
+    created = Grade.objects.get(id=data['results'][0]['id'])
+    assert data['results'][0]['status'] == 'created'
+    assert (created.value, created.term_id, created.status) == (9, school['term'].id, 'draft')
+
+
+@pytest.mark.django_db
+def test_teacher_limited_to_managed_subjects(school):
+    user = User.objects.create_user(username='prof', password='pass', role='teacher')
+    teacher = Teacher.objects.create(user=user)
+    managed = ClassSubject.objects.filter(classroom=school['classrooms'][0]).first()
+    managed.teacher = teacher
+    managed.save()
+    other = Grade.objects.exclude(class_subject=managed).first()
+    mine = Grade.objects.filter(class_subject=managed).first()
+    client = APIClient()
+    client.force_authenticate(user)
+    data = client.post('/api/grades/bulk/', [{'id': mine.id, 'value': 11}, {'id': other.id, 'value': 11}], format='json').json()
+    assert [r['status'] for r in data['results']] == ['updated', 'error']
+    assert client.post('/api/grades/bulk-status/', {'action': 'validate', 'ids': [mine.id]}, format='json').status_code == 403
+
+
+@pytest.mark.django_db
+def test_validate_then_lock_scope(school, api):
+    seq = school['sequences'][0]
+    cs = ClassSubject.objects.filter(classroom=school['classrooms'][0]).first()
+    scope = Grade.objects.filter(class_subject=cs, sequence=seq)
+    zero = scope.first()
+    scope.exclude(id=zero.id).update(value=12)
+    data = api.post('/api/grades/bulk-status/', {'action': 'validate', 'class_subject': cs.id, 'sequence': seq.id}, format='json').json()
+    assert data['errors'] == 1
+    assert scope.filter(status='validated').count() == scope.count() - 1
+    assert scope.get(id=zero.id).status == 'draft'
+    data = api.post('/api/grades/bulk-status/', {'action': 'lock', 'class_subject': cs.id, 'sequence': seq.id}, format='json').json()
+    assert [r['code'] for r in data['results'] if r['status'] == 'error'] == ['not_validated']
+    assert scope.filter(status='locked').count() == scope.count() - 1
+
+    # Corps mal formés : 400, jamais une lecture caractère par caractère
+    for body in ([cs.id], {'action': 'lock', 'ids': 5}, {'action': 'lock', 'ids': str(zero.id)},
+                 {'action': 'lock', 'class_subject': 'abc', 'sequence': seq.id}):
+        assert api.post('/api/grades/bulk-status/', body, format='json').status_code == 400
+
+
+@pytest.mark.django_db
+def test_retry_with_same_key_is_not_reapplied(school, api):
+    grade = Grade.objects.first()
+    headers = {'HTTP_IDEMPOTENCY_KEY': 'sheet-42'}
+    first = api.post('/api/grades/bulk/', [{'id': grade.id, 'value': 13}], format='json', **headers).json()
+    Grade.objects.filter(id=grade.id).update(value=4)
+    second = api.post('/api/grades/bulk/', [{'id': grade.id, 'value': 13}], format='json', **headers).json()
+    assert second == first
+    assert Grade.objects.get(id=grade.id).value == 4
+    assert IdempotentRequest.objects.count() == 1
+    conflict = api.post('/api/grades/bulk/', [{'id': grade.id, 'value': 14}], format='json', **headers)
+    assert conflict.status_code == 409
+
+
+@pytest.mark.django_db
+def test_offline_sync_detects_conflicts(school, api):
+    fresh, stale = Grade.objects.order_by('id')[:2]
+    stale_base = stale.updated_at.isoformat()
+    stale.value = 8
+    stale.save()  # modifiée sur le serveur après la saisie hors ligne
+    payload = {'batch': '2-1700000000', 'changes': [
+        {'id': fresh.id, 'value': 16, 'base_updated_at': fresh.updated_at.isoformat()},
+        {'id': stale.id, 'value': 3, 'base_updated_at': stale_base},
+    ]}
+    data = api.post('/api/grades/sync/', payload, format='json').json()
+    assert [r['status'] for r in data['results']] == ['updated', 'conflict']
+    assert data['results'][1]['value'] == 8
+    assert Grade.objects.get(id=fresh.id).value == 16
+    assert Grade.objects.get(id=stale.id).value == 8
+    # Le même lot renvoyé (réseau coupé pendant la réponse) n'est pas réappliqué
+    assert api.post('/api/grades/sync/', payload, format='json').json() == data
+
+
+@pytest.mark.django_db
+def test_service_worker_served_from_root(client):
+    response = client.get('/service-worker.js')
+    assert response['Content-Type'] == 'application/javascript'
+    assert response['Service-Worker-Allowed'] == '/'
+    assert b'grade-queue.js' in response.content
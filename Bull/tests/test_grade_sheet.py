@@ -0,0 +1,64 @@
+import gzip
+import json
+import pytest
+from rest_framework.test import APIClient
+from Bull.models import ClassSubject, Grade, Student
+
+
+@pytest.fixture
+def api(school):
+    client = APIClient()
+    client.force_authenticate(school['admin'])
+    return client
+
+
+def _params(school):
+    return {'classroom': school['classrooms'][0].id, 'sequence': school['sequences'][0].id}
+
+
+@pytest.mark.django_db
+def test_sheet_is_columnar_and_compressed(school, api, validate_all):
+    validate_all(school['sequences'][0])
+    response = api.get('/api/grade-sheet/', _params(school), HTTP_ACCEPT_ENCODING='gzip')
+    body = response.content
+    if response.get('Content-Encoding') == 'gzip':
+        body = gzip.decompress(body)
+    sheet = json.loads(body)
+    assert len(sheet['students']['id']) == 3
+    assert sheet['subjects']['code'] == ['FR', 'MAT'] and sheet['subjects']['coefficient'] == [1, 2]
+    assert len(sheet['values']) == 3 and all(len(row) == 2 for row in sheet['values'])
+    assert {code for row in sheet['statuses'] for code in row} == {sheet['status_codes']['validated']}
+    grade = Grade.objects.get(id=sheet['ids'][0][1])
+    assert grade.value == sheet['values'][0][1]
+
+
+@pytest.mark.django_db
+def test_etag_and_since_delta(school, api):
+    response = api.get('/api/grade-sheet/', _params(school))
+    etag, sheet = response['ETag'], json.loads(response.content)
+    assert api.get('/api/grade-sheet/', _params(school), HTTP_IF_NONE_MATCH=etag).status_code == 304
+    for bad in ({'classroom': 'abc'}, {'sequence': 'x'}, {'sequence': ''}):
+        assert api.get('/api/grade-sheet/', dict(_params(school), **bad)).status_code == 400
+    assert api.get('/api/grade-sheet/', {'classroom': 999999, 'sequence': 1}).status_code == 404
+
+    grade = Grade.objects.get(id=sheet['ids'][1][0])
+    grade.value = 17
+    grade.save()
+    response = api.get('/api/grade-sheet/', dict(_params(school), since=sheet['updated_at']), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200 and response['ETag'] != etag
+    delta = json.loads(response.content)
+    assert delta['changes']['id'] == [grade.id] and delta['changes']['value'] == [17]
+    assert len(response.content) < 400
+
+
+@pytest.mark.django_db
+def test_etag_follows_names_and_coefficients(school, api):
+    etag = api.get('/api/grade-sheet/', _params(school))['ETag']
+    ClassSubject.objects.filter(classroom=school['classrooms'][0], subject__code='MAT').update(coefficient=4)
+    response = api.get('/api/grade-sheet/', _params(school), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200 and json.loads(response.content)['subjects']['coefficient'] == [1, 4]
+
+    etag = response['ETag']
+    Student.objects.filter(matricule='6A-0').update(last_name='Renommé')
+    response = api.get('/api/grade-sheet/', _params(school), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200 and 'Renommé P0' in json.loads(response.content)['students']['name']
@@ -0,0 +1,86 @@
+import base64
+import json
+import pytest
+from datetime import date
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from Bull.models import BulletinTemplate, Student, Subject
+from Bull.pagination import KeysetPaginator
+
+
+def _walk(paginator):
+    pages, page = [], paginator.get_page()
+    while True:
+        pages.append([obj.pk for obj in page])
+        if not page.has_next():
+            return pages, page
+        page = paginator.get_page(page.next_cursor)
+
+
+@pytest.mark.django_db
+def test_forward_and_backward_with_ties(school):
+    classroom = school['classrooms'][0]
+    # Noms identiques : seul l'id départage les lignes
+    Student.objects.bulk_create([Student(
+        matricule=f'T-{i}', first_name='Awa', last_name='Ngono', gender='F',
+        birth_date=date(2012, 1, 1), birth_place='Yaoundé', classroom=classroom,
+    ) for i in range(7)])
+    paginator = KeysetPaginator(Student.objects.all(), ('last_name', 'first_name'), per_page=4)
+    pages, last = _walk(paginator)
+    expected = list(Student.objects.order_by('last_name', 'first_name', 'id').values_list('id', flat=True))
+    assert [pk for page in pages for pk in page] == expected
+    assert [len(p) for p in pages] == [4, 4, 4, 1]
+    assert not paginator.get_page().has_previous()
+    # Retour en arrière depuis la dernière page
+    back = [pages[-1]]
+    page = last
+    while page.has_previous():
+        page = paginator.get_page(page.previous_cursor)
+        back.insert(0, [obj.pk for obj in page])
+    assert back == pages
+
+
+@pytest.mark.django_db
+def test_descending_datetime_and_invalid_cursor(school):
+    for i in range(5):
+        BulletinTemplate.objects.create(school_year=school['school_year'], name=f'C{i}')
+    paginator = KeysetPaginator(BulletinTemplate.objects.all(), ('-created_at',), per_page=2)
+    pages, _ = _walk(paginator)
+    expected = list(BulletinTemplate.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+    assert [pk for page in pages for pk in page] == expected
+    assert [obj.pk for obj in paginator.get_page('pas-un-curseur')] == expected[:2]
+    # Curseurs bien formés mais aux valeurs d'un autre type : première page
+    for payload in (['n', {'a': 1}, 'b'], ['n', 'abc', 'x'], ['n', 'hier', 3], ['p', None, 1]):
+        cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+        paginator = KeysetPaginator(BulletinTemplate.objects.all(), ('-created_at',), per_page=2)
+        assert [obj.pk for obj in paginator.get_page(cursor)] == expected[:2]
+
+
+@pytest.mark.django_db
+def test_list_pages_constant_queries(client, school):
+    client.force_login(school['admin'])
+    for i in range(60):
+        Subject.objects.create(code=f'S{i:02d}', name=f'Matière {i:02d}')
+    response = client.get('/subjects/')
+    page = response.context['page']
+    assert len(page) == 50 and page.has_next() and not page.has_previous()
+    with CaptureQueriesContext(connection) as first:
+        client.get('/subjects/')
+    with CaptureQueriesContext(connection) as second:
+        response = client.get('/subjects/', {'cursor': page.next_cursor})
+    assert len(response.context['page']) == 12
+    assert len(second) == len(first)
+    for url in ('/students/', '/classes/', '/teachers/'):
+        assert client.get(url).status_code == 200
+        for payload in (['n', {'a': 1}, 'b'], ['n', 'abc', 'x'], ['n', 'a', 'b', 'c']):
+            cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+            assert client.get(url, {'cursor': cursor}).status_code == 200
+
+
+@pytest.mark.django_db
+def test_sort_keys_use_index(school):
+    queryset = Student.objects.filter(classroom=school['classrooms'][0]).order_by('last_name', 'first_name', 'id')
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + str(queryset[:51].query))
+        plan = ' '.join(str(row) for row in cursor.fetchall())
+    assert 'student_class_name_idx' in plan and 'TEMP B-TREE' not in plan
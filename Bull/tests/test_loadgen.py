@@ -0,0 +1,34 @@
+import pytest
+from django.core.management import call_command
+from Bull.models import Classroom, Grade, Sequence, Student
+from Bull.services.loadgen import delete_dataset, generate_dataset
+
+SMALL = {'schools': 2, 'classes': 3, 'students': 12, 'subjects': 4, 'terms': 2, 'sequences': 2, 'filled': 3}
+
+
+def snapshot():
+    return list(Grade.objects.order_by('student__matricule', 'class_subject__subject__code', 'sequence__term__order', 'sequence__order')
+                .values_list('student__matricule', 'value', 'status'))
+
+
+@pytest.mark.django_db
+def test_dataset_shape_and_states():
+    counts = generate_dataset(**SMALL)
+    assert (counts['classrooms'], counts['students']) == (6, 24)
+    assert counts['grades'] == Grade.objects.count() == 24 * 4 * 4
+    seq3 = Sequence.objects.get(active=True)
+    assert (seq3.term.order, seq3.order) == (2, 1)
+    future = Grade.objects.filter(sequence__term__order=2, sequence__order=2)
+    assert set(future.values_list('status', flat=True)) == {'draft'}
+    assert not Grade.objects.filter(term__isnull=True).exists()
+    assert Classroom.objects.get(name='LD02 6ème 1').students.count() == 4
+
+
+@pytest.mark.django_db
+def test_same_seed_same_data():
+    generate_dataset(seed=7, **SMALL)
+    first = snapshot()
+    delete_dataset()
+    assert not Student.objects.exists()
+    call_command('generate_load_data', seed=7, flush=True, **SMALL)
+    assert snapshot() == first
@@ -0,0 +1,92 @@
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from Bull.models import Bulletin, Grade, MentionRule
+from Bull.services import averages, campaign, generation
+
+
+@pytest.fixture
+def rules(school):
+    sy = school['school_year']
+    # Bornes partagées (12, 14) et trou entre 8 et 10, comme souvent dans les barèmes saisis
+    for label, low, high in (('Passable', 10, 12), ('AB', 12, 14), ('Bien', 14, 16), ('TB', 16, 20), ('Faible', 0, 8)):
+        MentionRule.objects.create(school_year=sy, label=label, min_avg=low, max_avg=high)
+    return sy
+
+
+@pytest.mark.django_db
+def test_interval_lookup_matches_first_rule(rules):
+    values = [None, -1, 0, 7.99, 8, 9, 10, 11.5, 12, 13, 14, 15.99, 16, 20, 20.5]
+    with CaptureQueriesContext(connection) as ctx:
+        labels = averages.mentions_for(rules.id, values)
+        averages.mentions_for(rules.id, values)
+    assert len(ctx) == 1
+    expected = [
+        MentionRule.objects.filter(school_year=rules, min_avg__lte=v, max_avg__gte=v).first() if v is not None else None
+        for v in values
+    ]
+    assert labels == [rule.label if rule else None for rule in expected]
+    assert labels[8] == 'Passable' and labels[5] is None
+
+    # Une règle modifiée invalide la table
+    MentionRule.objects.filter(label='Faible').first().delete()
+    assert averages.mentions_for(rules.id, [5]) == [None]
+
+
+@pytest.mark.django_db
+def test_generation_stores_results_read_without_recompute(school, rules, validate_all, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    seq1, seq2 = school['sequences']
+    validate_all(seq1)
+    campaign.run_campaign(school['school_year'], generation.SEQUENCE, seq1, executor='thread')
+    first = Bulletin.objects.order_by('id').first()
+    assert first.appreciation and first.term_average == first.average
+    assert first.mention == averages.mentions_for(rules.id, [first.term_average])[0]
+
+    # La séquence 2 met à jour les résultats trimestriels des bulletins de la séquence 1 (notes verrouillées comprises)
+    validate_all(seq2)
+    campaign.run_campaign(school['school_year'], generation.SEQUENCE, seq2, executor='thread')
+    first.refresh_from_db()
+    assert first.term_average == averages.term_averages([(first.student_id, school['term'].id)])[
+        (first.student_id, school['term'].id)]
+
+    client = APIClient()
+    client.force_authenticate(school['admin'])
+    with CaptureQueriesContext(connection) as ctx:
+        rows = client.get('/api/bulletins/').json()['results']
+    assert not any('Bull_grade' in q['sql'] or 'Bull_mentionrule' in q['sql'] for q in ctx.captured_queries)
+    row = next(r for r in rows if r['id'] == first.id)
+    assert (row['term_average'], row['mention'], row['appreciation']) == (
+        first.term_average, first.mention, first.appreciation)
+
+
+@pytest.mark.django_db
+def test_stored_results_follow_rules_and_grade_edits(school, rules, validate_all, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    seq1 = school['sequences'][0]
+    validate_all(seq1)
+    campaign.run_campaign(school['school_year'], generation.SEQUENCE, seq1, executor='thread')
+    first = Bulletin.objects.order_by('id').first()
+    old = first.mention
+    assert old
+
+    # Un libellé modifié est repris sur les bulletins déjà générés
+    rule = MentionRule.objects.get(school_year=rules, label=old)
+    rule.label = 'Renommée'
+    rule.save()
+    first.refresh_from_db()
+    assert first.mention == 'Renommée'
+    rule.delete()
+    first.refresh_from_db()
+    assert first.mention is None
+
+    # Note validée corrigée après génération : la commande recalcule la moyenne enregistrée
+    Grade.objects.filter(student=first.student, sequence=seq1).update(value=20)
+    call_command('reapply_mentions', str(rules.id), '--batch-size', '2')
+    first.refresh_from_db()
+    assert first.term_average == 20 and first.mention == 'TB'
+    call_command('reapply_mentions', rules.name)
+    with pytest.raises(CommandError, match='introuvable'):
+        call_command('reapply_mentions', 'inconnue')
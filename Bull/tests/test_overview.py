@@ -0,0 +1,34 @@
+import pytest
+from django.test import Client
+from Bull.models import Bulletin
+from Bull.services.overview import classroom_overview
+
+
+@pytest.mark.django_db
+def test_overview_counts_in_two_queries_then_cache(school, django_assert_num_queries):
+    class_a, class_b = school['classrooms']
+    seq1, seq2 = school['sequences']
+    student = class_a.students.first()
+    Bulletin.objects.create(student=student, classroom=class_a, sequence=seq1, average=12, rank=1)
+
+    with django_assert_num_queries(2):
+        overview = classroom_overview()
+    assert [(s['name'], s['total_students'], s['bulletins_count']) for s in overview] == [('6A', 3, 1), ('6B', 3, 0)]
+    with django_assert_num_queries(0):
+        classroom_overview()
+
+    assert classroom_overview(school_year=school['school_year'], sequence=seq2)[0]['bulletins_count'] == 0
+    # Une écriture invalide le cache
+    Bulletin.objects.create(student=student, classroom=class_a, sequence=seq2, average=11, rank=1)
+    assert classroom_overview(sequence=seq2)[0]['bulletins_count'] == 1
+
+
+@pytest.mark.django_db
+def test_bulletin_and_classes_pages_use_overview(school, django_assert_max_num_queries):
+    client = Client()
+    client.force_login(school['admin'])
+    with django_assert_max_num_queries(12):
+        response = client.get('/bulletins/')
+    assert [s['total_students'] for s in response.context['classroom_stats']] == [3, 3]
+    response = client.get('/classes/')
+    assert [c.stats['total_students'] for c in response.context['classes']] == [3, 3]
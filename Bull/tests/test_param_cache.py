@@ -0,0 +1,58 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from Bull.models import ClassSubject, Sanction, Sequence
+
+
+def _get(client, url, **headers):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url, **headers)
+    return response, len(ctx)
+
+
+@pytest.mark.django_db
+def test_subjects_for_class_cached_until_links_change(client, school):
+    classroom = school['classrooms'][0]
+    url = f'/ajax/get_subjects_for_class/?classroom_id={classroom.id}'
+    first, queries = _get(client, url)
+    assert queries == 1
+    assert {s['name'] for s in first.json()['subjects']} == {'Maths', 'Français'}
+
+    again, queries = _get(client, url)
+    assert queries == 0
+    assert again.content == first.content
+    assert again['ETag'] == first['ETag']
+
+    ClassSubject.objects.filter(classroom=classroom, subject__code='FR').delete()
+    changed, queries = _get(client, url)
+    assert queries == 1
+    assert [s['name'] for s in changed.json()['subjects']] == ['Maths']
+    assert changed['ETag'] != first['ETag']
+
+
+@pytest.mark.django_db
+def test_conditional_get_answers_304(client):
+    Sanction.objects.create(texte='Avertissement', min_heures_absence=4)
+    first = client.get('/parameters/sanctions-table/')
+    assert 'Avertissement' in first.json()['html']
+    response, queries = _get(client, '/parameters/sanctions-table/', HTTP_IF_NONE_MATCH=first['ETag'])
+    assert response.status_code == 304 and queries == 0
+    response, _ = _get(client, '/parameters/sanctions-table/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+    assert response.status_code == 304
+
+    Sanction.objects.create(texte='Exclusion', min_heures_absence=20)
+    response = client.get('/parameters/sanctions-table/', HTTP_IF_NONE_MATCH=first['ETag'])
+    assert response.status_code == 200
+    assert 'Exclusion' in response.json()['html']
+
+
+@pytest.mark.django_db
+def test_bulk_updates_bump_the_version(client, school):
+    client.force_login(school['admin'])
+    assert client.get('/parameters/').status_code == 200
+    seq2 = school['sequences'][1]
+    # update() n'envoie pas de signal : la vue change la version elle-même
+    client.post(f'/parameters/set-active-sequence/{seq2.id}/')
+    assert Sequence.objects.get(id=seq2.id).active
+    page = client.get('/parameters/').content.decode()
+    assert 'Séquence : S2 (Active)' in ' '.join(page.split())
@@ -0,0 +1,67 @@
+import pytest
+from django.template import Context, Template
+from rest_framework.test import APIClient
+from Bull.models import ClassSubject, Grade, Teacher, User
+from Bull.services.permissions import can_manage_class_subject, managed_class_subject_ids
+
+
+@pytest.fixture
+def teachers(school):
+    c6a, c6b = school['classrooms']
+    titular = Teacher.objects.create(user=User.objects.create_user(username='titulaire', password='pass', role='teacher'))
+    head = Teacher.objects.create(user=User.objects.create_user(username='principal', password='pass', role='teacher'))
+    maths_6a = ClassSubject.objects.get(classroom=c6a, subject__code='MAT')
+    maths_6a.teacher = titular
+    maths_6a.save()
+    c6b.head_teacher = head
+    c6b.save()
+    return {'titular': titular.user, 'head': head.user, 'maths_6a': maths_6a}
+
+
+@pytest.mark.django_db
+def test_index_covers_assigned_and_head_teacher(school, teachers, django_assert_num_queries):
+    c6b = school['classrooms'][1]
+    assert managed_class_subject_ids(teachers['titular']) == {teachers['maths_6a'].id}
+    assert managed_class_subject_ids(teachers['head']) == set(c6b.class_subjects.values_list('id', flat=True))
+    assert managed_class_subject_ids(school['admin']) == set(ClassSubject.objects.values_list('id', flat=True))
+    with django_assert_num_queries(0):
+        assert can_manage_class_subject(teachers['titular'], teachers['maths_6a'])
+        assert not can_manage_class_subject(teachers['head'], teachers['maths_6a'].id)
+
+
+@pytest.mark.django_db
+def test_index_invalidated_on_reassignment(school, teachers):
+    assert can_manage_class_subject(teachers['titular'], teachers['maths_6a'])
+    teachers['maths_6a'].teacher = None
+    teachers['maths_6a'].save()
+    assert not can_manage_class_subject(teachers['titular'], teachers['maths_6a'])
+
+
+@pytest.mark.django_db
+def test_index_not_shared_between_requests(school, teachers):
+    # Réaffectation faite par un autre worker : aucune version locale ne change
+    assert can_manage_class_subject(teachers['titular'], teachers['maths_6a'])
+    ClassSubject.objects.filter(pk=teachers['maths_6a'].pk).update(teacher=None)
+    assert can_manage_class_subject(teachers['titular'], teachers['maths_6a'])
+    # La requête suivante recharge l'utilisateur et recalcule ses droits
+    assert not can_manage_class_subject(User.objects.get(pk=teachers['titular'].pk), teachers['maths_6a'])
+
+
+@pytest.mark.django_db
+def test_template_filter(school, teachers):
+    template = Template('{% load bulletin_tags %}{% for cs in items %}{{ cs|can_manage:user|yesno:"o,n" }}{% endfor %}')
+    items = list(ClassSubject.objects.filter(classroom=school['classrooms'][0]).order_by('subject__code'))
+    assert template.render(Context({'items': items, 'user': teachers['titular']})) == 'no'
+
+
+@pytest.mark.django_db
+def test_api_writes_limited_to_managed_class_subjects(school, teachers):
+    client = APIClient()
+    client.force_authenticate(teachers['titular'])
+    own = Grade.objects.filter(class_subject=teachers['maths_6a']).first()
+    other = Grade.objects.exclude(class_subject=teachers['maths_6a']).first()
+    assert client.patch(f'/api/grades/{own.id}/', {'value': 12}, format='json').status_code == 200
+    assert client.patch(f'/api/grades/{other.id}/', {'value': 12}, format='json').status_code == 403
+    assert client.post('/api/grades/validate_grade/', {'grade_id': other.id}, format='json').status_code == 403
+    rows = client.get('/api/classsubjects/', {'managed': 1}).json()['results']
+    assert [row['id'] for row in rows] == [teachers['maths_6a'].id]
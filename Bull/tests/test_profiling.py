@@ -0,0 +1,61 @@
+import pstats
+import pytest
+from django.core.management import call_command
+from Bull.services import generation, profiling
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def test_spans_nest_and_are_noop_outside_a_run():
+    with profiling.span('ignoré'):
+        pass
+    with profiling.profile_run('essai') as profile:
+        with profiling.span('calcul'):
+            with profiling.span('classement'):
+                pass
+            with profiling.span('classement'):
+                pass
+    assert [(r['stage'], r['calls']) for r in profile.summary()] == [('calcul', 1), ('calcul/classement', 2)]
+    assert 'TOTAL essai' in profiling.format_summary(profile)
+
+
+@pytest.mark.django_db
+def test_sequence_generation_stages(school, media, validate_all):
+    seq = school['sequences'][0]
+    validate_all(seq)
+    classroom = school['classrooms'][0]
+    with profiling.profile_run('sequence', mode='cprofile', directory=media / 'profiles') as profile:
+        recaps = generation.compute_sequence_results(classroom, seq)
+        generation.render_tasks(generation.sequence_render_tasks(classroom, seq, recaps))
+        generation.save_sequence_bulletins(classroom, seq, recaps)
+    stages = {row['stage']: row for row in profile.summary()}
+    assert stages['calcul/requêtes']['queries'] >= 3
+    assert stages['rendu/dessin']['calls'] == stages['rendu/écriture']['calls'] == 3
+    assert stages['enregistrement/verrouillage']['queries'] == 1
+    assert pstats.Stats(profile.output).total_calls > 0
+
+
+@pytest.mark.django_db
+def test_command_prints_stage_summary_and_sample(school, media, validate_all, capsys):
+    seq = school['sequences'][0]
+    validate_all(seq)
+    call_command('generate_bulletins', sequence=seq.id, threads=True, profile='sample', profile_dir=str(media))
+    out = capsys.readouterr().out
+    assert 'préparation' in out and 'classement' in out and 'TOTAL sequence' in out
+    folded = list(media.glob('sequence-*.folded'))
+    assert len(folded) == 1
+
+
+@pytest.mark.django_db
+def test_views_profiled_by_setting(client, school, media, validate_all, settings, caplog):
+    settings.BULLETIN_PROFILE = 'spans'
+    seq = school['sequences'][0]
+    validate_all(seq)
+    client.force_login(school['admin'])
+    with caplog.at_level('INFO', logger='Bull.profiling'):
+        client.post('/bulletins/calculate/', {'sequence': seq.id, 'classroom': school['classrooms'][0].id})
+    assert 'rendu' in caplog.text and 'enregistrement' in caplog.text
@@ -0,0 +1,49 @@
+import pytest
+from django.test import Client
+from rest_framework.test import APIClient
+from Bull.models import Grade
+from Bull.services.readiness import readiness_report
+
+
+@pytest.mark.django_db
+def test_report_counts_per_class_subject_and_student(school, validate_all, django_assert_max_num_queries):
+    seq = school['sequences'][0]
+    validate_all(seq)
+    class_a, class_b = school['classrooms']
+    maths = school['subjects'][0]
+    blocked = Grade.objects.filter(sequence=seq, student__classroom=class_b, class_subject__subject=maths).order_by('id').first()
+    blocked.status = 'draft'
+    blocked.value = 0
+    blocked.save()
+
+    with django_assert_max_num_queries(3):
+        report = readiness_report(seq)
+
+    assert report[class_a.id]['can_calculate']
+    entry = report[class_b.id]
+    assert (entry['expected'], entry['provisioned'], entry['validated'], entry['zero'], entry['blocking']) == (6, 6, 5, 1, 1)
+    assert not entry['can_calculate']
+    assert entry['students'][blocked.student_id]['ready'] == 1
+    assert [s['ready'] for s in entry['subjects'].values()] == [2, 3]
+
+
+@pytest.mark.django_db
+def test_bulletins_page_and_api_read_the_report(school, validate_all):
+    seq = school['sequences'][0]
+    validate_all(seq)
+    class_a = school['classrooms'][0]
+    Grade.objects.filter(sequence=seq, student__classroom=class_a).update(status='draft')
+
+    client = Client()
+    client.force_login(school['admin'])
+    response = client.get('/bulletins/', {'sequence': seq.id, 'classroom': class_a.id})
+    assert response.context['can_calculate'] is False
+    assert [s['can_calculate'] for s in response.context['classroom_stats']] == [False, True]
+
+    api = APIClient()
+    api.force_authenticate(school['admin'])
+    data = api.get('/api/readiness/', {'sequence': seq.id, 'blocking': '1'}).json()
+    assert [c['name'] for c in data['classrooms']] == ['6A']
+    assert data['classrooms'][0]['blocking'] == 6
+    assert api.get('/api/readiness/', {'sequence': 'abc'}).status_code == 400
+    assert api.get('/api/readiness/', {'sequence': seq.id, 'classroom': 'x'}).status_code == 400
@@ -0,0 +1,63 @@
+import json
+import os
+import pytest
+from Bull.models import User
+from Bull.services import telemetry
+
+
+@pytest.fixture(autouse=True)
+def fresh_buffer():
+    telemetry.clear()
+
+
+@pytest.mark.django_db
+def test_requests_recorded_with_duplicates(client, school):
+    client.force_login(school['admin'])
+    client.get('/dashboard/')
+    entry = [e for e in telemetry.recent() if e['endpoint'] == 'dashboard'][0]
+    assert entry['status'] == 200 and entry['queries'] > 0 and entry['bytes'] > 0
+    assert entry['db_ms'] <= entry['ms']
+    # Les moyennes par élève rejouent la même requête pour chaque élève
+    assert entry['duplicates'] and entry['duplicates'][0][1] >= telemetry.DUPLICATE_THRESHOLD
+
+
+@pytest.mark.django_db
+def test_report_page_admin_only(client, school):
+    client.force_login(school['admin'])
+    client.get('/dashboard/')
+    response = client.get('/parameters/performance/')
+    assert response.status_code == 200
+    assert any(row['endpoint'] == 'dashboard' for row in response.context['summary']['endpoints'])
+    assert response.context['summary']['offenders']
+    client.force_login(User.objects.create_user(username='sec', password='pass', role='secretary'))
+    assert client.get('/parameters/performance/').status_code == 302
+
+
+@pytest.mark.django_db
+def test_shared_log(client, school, settings, tmp_path):
+    settings.REQUEST_STATS_LOG = str(tmp_path / 'requests.log')
+    client.force_login(school['admin'])
+    client.get('/api/classsubjects/')
+    # Relu depuis le journal, pas depuis le tampon du processus
+    telemetry._records().clear()
+    entries = telemetry.recent()
+    assert [e['endpoint'] for e in entries] == ['classsubject-list']
+    assert json.loads((tmp_path / 'requests.log').read_text())['queries'] == entries[0]['queries']
+
+    # Après une rotation externe, les sauvegardes sont relues
+    os.replace(tmp_path / 'requests.log', tmp_path / 'requests.log.1')
+    client.get('/api/subjects/')
+    assert [e['endpoint'] for e in telemetry.recent()] == ['classsubject-list', 'subject-list']
+
+    # La remise à zéro de la page vaut pour le journal
+    # (la requête POST de remise à zéro est elle-même mesurée après la marque)
+    client.post('/parameters/performance/')
+    client.get('/api/subjects/')
+    assert [e['endpoint'] for e in telemetry.recent()] == ['request_stats', 'subject-list']
+
+
+def test_fingerprint_groups_in_lists():
+    recorder = telemetry.QueryRecorder()
+    for sql in ['SELECT 1 WHERE id IN (%s)', 'SELECT 1 WHERE id IN (%s, %s)', 'SELECT 1 WHERE id IN (%s, %s, %s)']:
+        recorder(lambda *args: None, sql, (), False, {})
+    assert recorder.duplicates() == [('SELECT 1 WHERE id IN (...)', 3)]
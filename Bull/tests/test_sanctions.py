@@ -0,0 +1,102 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from Bull.models import Discipline, Sanction, Student
+from Bull.services import sanctions
+
+
+@pytest.fixture
+def thresholds(db):
+    return {
+        'warning': Sanction.objects.create(texte='Avertissement', min_heures_absence=4),
+        'blame': Sanction.objects.create(texte='Blâme', min_heures_absence=10),
+        'exclusion': Sanction.objects.create(texte='Exclusion', min_heures_absence=30),
+    }
+
+
+@pytest.mark.django_db
+def test_interval_lookup_without_queries(thresholds):
+    sanctions.thresholds()
+    with CaptureQueriesContext(connection) as ctx:
+        found = [sanctions.sanction_id_for(hours) for hours in (0, 3, 4, 9, 10, 29, 30, 500)]
+    assert len(ctx) == 0
+    warning, blame, exclusion = (thresholds[k].id for k in ('warning', 'blame', 'exclusion'))
+    assert found == [None, None, warning, warning, blame, blame, exclusion, exclusion]
+
+
+@pytest.mark.django_db
+def test_save_uses_table_and_follows_sanction_views(client, school, thresholds):
+    student = Student.objects.first()
+    discipline = Discipline.objects.create(student=student, term=school['term'], absences=12)
+    assert discipline.sanction == thresholds['blame']
+    with CaptureQueriesContext(connection) as ctx:
+        discipline.save()
+    assert not any('Bull_sanction' in q['sql'] for q in ctx.captured_queries)
+
+    # Un nouveau seuil ajouté depuis les paramètres est pris en compte immédiatement
+    client.post('/parameters/add-sanction/', {'texte': 'Retenue', 'min_heures_absence': 12})
+    discipline.save()
+    assert discipline.sanction.texte == 'Retenue'
+    client.post(f"/parameters/delete-sanction/?id={discipline.sanction_id}")
+    discipline.save()
+    assert discipline.sanction == thresholds['blame']
+
+
+@pytest.mark.django_db
+def test_bulk_api_creates_and_updates(school, thresholds):
+    client = APIClient()
+    client.force_authenticate(school['admin'])
+    students = list(Student.objects.order_by('id'))
+    term, seq = school['term'], school['sequences'][0]
+    Discipline.objects.create(student=students[0], term=term, sequence=seq, absences=1)
+    payload = [{'student': s.id, 'term': term.id, 'sequence': seq.id, 'absences': 5 * i, 'lates': 1}
+               for i, s in enumerate(students)]
+    payload.append({'student': students[0].id, 'term': term.id, 'sequence': school['sequences'][1].id + 99})
+    with CaptureQueriesContext(connection) as ctx:
+        body = client.post('/api/disciplines/bulk/', payload, format='json').json()
+    assert len(ctx) < 15
+    assert body['errors'] == 1
+    assert [r['status'] for r in body['results'][:2]] == ['updated', 'created']
+    assert Discipline.objects.count() == 6
+    assert Discipline.objects.get(student=students[2], sequence=seq).sanction == thresholds['blame']
+    assert Discipline.objects.get(student=students[0]).sanction is None
+
+    teacher = school['admin'].__class__.objects.create_user(username='prof', password='x', role='teacher')
+    client.force_authenticate(teacher)
+    assert client.post('/api/disciplines/bulk/', payload, format='json').status_code == 403
+
+
+@pytest.mark.django_db
+def test_entry_view_saves_class(client, school, thresholds):
+    client.force_login(school['admin'])
+    classroom = school['classrooms'][0]
+    students = list(classroom.students.order_by('last_name', 'first_name'))
+    data = {'classroom': classroom.id, 'term': school['term'].id}
+    data.update({f'absences_{s.id}': 4 for s in students})
+    data[f'lates_{students[0].id}'] = 2
+    response = client.post('/discipline/', data)
+    assert response.status_code == 302
+    assert Discipline.objects.filter(sanction=thresholds['warning'], sequence=None).count() == 3
+    response = client.get(response['Location'])
+    assert [d.lates for _, d in response.context['rows']] == [2, 0, 0]
+
+    assert client.get('/discipline/', {'classroom': 'abc', 'term': 'x', 'sequence': '1;'}).status_code == 200
+    # Toutes les lignes refusées : pas de message de succès
+    data.update({f'absences_{s.id}': -1 for s in students})
+    response = client.post('/discipline/', data, follow=True)
+    levels = [m.level_tag for m in response.context['messages']]
+    assert levels == ['error']
+
+
+@pytest.mark.django_db
+def test_reapply_after_threshold_change(school, thresholds):
+    for i, student in enumerate(Student.objects.order_by('id')):
+        Discipline.objects.create(student=student, term=school['term'], absences=8 * i)
+    # Modification hors des vues : les fiches existantes gardent l'ancienne sanction
+    Sanction.objects.filter(pk=thresholds['exclusion'].pk).update(min_heures_absence=16)
+    call_command('reapply_sanctions', '--batch-size', '4')
+    assert [d.sanction.texte if d.sanction else None for d in Discipline.objects.order_by('id')] == [
+        None, 'Avertissement', 'Exclusion', 'Exclusion', 'Exclusion', 'Exclusion',
+    ]
@@ -0,0 +1,7 @@
+from Bull.management.commands.import_profile import HEAVY_MODULES, profile_imports
+
+
+def test_cold_start_skips_heavy_libraries():
+    modules = profile_imports()
+    assert 'Bull.views.exports' in modules
+    assert not {name.split('.')[0] for name in modules} & set(HEAVY_MODULES)
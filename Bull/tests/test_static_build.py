@@ -0,0 +1,52 @@
+import gzip
+import json
+import os
+
+import pytest
+from django.core.management import call_command
+from django.templatetags.static import static
+
+
+@pytest.fixture
+def built(settings, tmp_path):
+    settings.STATIC_ROOT = str(tmp_path)
+    call_command('build_static')
+    return tmp_path
+
+
+def test_static_falls_back_to_plain_names_without_build(settings, tmp_path):
+    settings.STATIC_ROOT = str(tmp_path)
+    assert static('css/bootstrap.css') == '/static/css/bootstrap.css'
+
+
+def test_build_hashes_and_precompresses(built):
+    manifest = json.loads((built / 'staticfiles.json').read_text())
+    hashed = manifest['paths']['css/bootstrap.css']
+    assert hashed != 'css/bootstrap.css'
+    assert static('css/bootstrap.css') == f'/static/{hashed}'
+    original = (built / hashed).read_bytes()
+    assert gzip.decompress((built / f'{hashed}.gz').read_bytes()) == original
+    # Les polices absentes du dépôt ne bloquent pas le build
+    assert manifest['paths']['css/all.css'] != 'css/all.css'
+
+
+@pytest.mark.django_db
+def test_service_worker_precaches_hashed_urls(built, client):
+    body = client.get('/service-worker.js').content.decode()
+    assert static('js/grade-queue.js') in body
+    assert static('css/bootstrap.css') in body
+    assert "'smartecole-static-" in body
+    assert os.path.exists(built / 'service-worker.js')
+
+
+@pytest.mark.django_db
+def test_hashed_assets_are_immutable_and_precompressed(built, client):
+    url = static('css/bootstrap.css')
+    response = client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+    assert response['Content-Encoding'] == 'gzip'
+    assert 'immutable' in response['Cache-Control']
+    assert response['Content-Type'] == 'text/css'
+    response = client.get('/static/css/bootstrap.css')
+    assert response['Cache-Control'] == 'no-cache'
+    assert 'Content-Encoding' not in response
+    assert client.get('/static/../manage.py').status_code == 404
@@ -0,0 +1,90 @@
+import json
+import pytest
+from datetime import date
+from Bull.models import Student
+from Bull.services import search
+
+
+def _student(classroom, matricule, last_name, first_name):
+    return Student(
+        matricule=matricule, last_name=last_name, first_name=first_name, gender='F',
+        birth_date=date(2012, 1, 1), birth_place='Douala', classroom=classroom,
+    )
+
+
+def _matricules(results):
+    return [student.matricule for student in results[:100]]
+
+
+@pytest.mark.django_db
+def test_prefix_accent_insensitive_and_ranked(school):
+    assert search.fts_available()
+    classroom = school['classrooms'][0]
+    _student(classroom, 'X-1', 'Éloundou', 'Marie').save()
+    _student(classroom, 'X-2', 'Mbarga', 'Éloïse').save()
+    results = search.search_students('elo')
+    assert sorted(_matricules(results)) == ['X-1', 'X-2']
+    # Tous les mots sont requis, dans n'importe quel champ
+    assert _matricules(search.search_students('eloundou mar')) == ['X-1']
+    assert _matricules(search.search_students('x-2')) == ['X-2']
+    assert search.search_students('').count() == 0
+
+
+@pytest.mark.django_db
+def test_index_follows_update_delete_and_bulk_create(school):
+    classroom = school['classrooms'][1]
+    student = _student(classroom, 'Y-1', 'Ngono', 'Awa')
+    student.save()
+    student.last_name = 'Tchami'
+    student.save()
+    assert _matricules(search.search_students('ngono')) == []
+    assert _matricules(search.search_students('tcha')) == ['Y-1']
+    student.delete()
+    assert _matricules(search.search_students('tcha')) == []
+    Student.objects.bulk_create([_student(classroom, f'Z-{i}', 'Fotso', f'E{i}') for i in range(3)])
+    assert len(_matricules(search.search_students('fotso', classroom.id))) == 3
+    assert search.search_students('fotso', school['classrooms'][0].id).count() == 0
+
+
+@pytest.mark.django_db
+def test_ensure_triggers_repairs_index(school):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TRIGGER "{search.TABLE}_ai"')
+    _student(school['classrooms'][0], 'W-1', 'Kamga', 'Lea').save()
+    assert _matricules(search.search_students('kamga')) == []
+    search.ensure_triggers()
+    assert _matricules(search.search_students('kamga')) == ['W-1']
+
+
+@pytest.mark.django_db
+def test_students_view_paginated(client, school):
+    classroom = school['classrooms'][0]
+    Student.objects.bulk_create([_student(classroom, f'P-{i:03d}', 'Onana', f'E{i:03d}') for i in range(60)])
+    client.force_login(school['admin'])
+    response = client.get('/students/', {'search': 'onana'})
+    page = response.context['page']
+    assert page.paginator.count == 60 and len(page.object_list) == 50
+    response = client.get('/students/', {'search': 'onana', 'page': 2})
+    assert len(response.context['page'].object_list) == 10
+    response = client.get('/students/', {'class': school['classrooms'][1].id})
+    assert [s.matricule for s in response.context['students']] == ['6B-0', '6B-1', '6B-2']
+
+
+@pytest.mark.django_db
+def test_autocomplete_endpoint(client, school):
+    client.force_login(school['admin'])
+    response = client.get('/students/autocomplete/', {'q': '6a-1'})
+    assert response.status_code == 200
+    results = json.loads(response.content)['results']
+    assert [r['matricule'] for r in results] == ['6A-1']
+    assert results[0]['classroom'] == '6A'
+    assert json.loads(client.get('/students/autocomplete/').content)['results'] == []
+
+
+@pytest.mark.django_db
+def test_fallback_without_fts(school, monkeypatch):
+    monkeypatch.setattr(search, 'fts_available', lambda: False)
+    results = search.search_students('n1 p1')
+    assert [s.matricule for s in results] == ['6A-1', '6B-1']
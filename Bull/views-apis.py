@@ -1,24 +1,31 @@
 from rest_framework import viewsets, status, generics
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth import get_user_model, authenticate, login, logout
-from rest_framework.permissions import AllowAny, BasePermission
+from rest_framework.permissions import AllowAny, BasePermission, SAFE_METHODS
 from .models import (
     User, SchoolYear, Term, Sequence, Classroom, Teacher, Student,
     Subject, ClassSubject, Grade, Discipline, MentionRule,
-    Settings, Bulletin, ArchivedGrade, ArchivedBulletin
+    Settings, Bulletin, ArchivedGrade, ArchivedBulletin, ArchivedDiscipline
 )
 from .serializers import (
     UserSerializer, SchoolYearSerializer, TermSerializer, SequenceSerializer,
     ClassroomSerializer, TeacherSerializer, StudentSerializer, SubjectSerializer,
     ClassSubjectSerializer, GradeSerializer, DisciplineSerializer, MentionRuleSerializer,
-    SettingsSerializer, BulletinSerializer, ArchivedGradeSerializer, ArchivedBulletinSerializer
+    SettingsSerializer, BulletinSerializer, ArchivedGradeSerializer, ArchivedBulletinSerializer,
+    ArchivedDisciplineSerializer
 )
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from django.http import FileResponse
-import os
+from django.utils.dateparse import parse_datetime
+from .responses import byte_range_response, compact_json_response, not_modified
+from .services import bundles, generation, grade_bulk, grade_sheet, profiling, sanctions
+from .services.permissions import (
+    can_manage_class_subject, is_admin_or_secretary, is_school_staff, managed_class_subjects,
+)
+from .services.readiness import readiness_report, serialize_report
 
 
 
@@ -27,6 +34,31 @@ User = get_user_model()
 # ---------------------------
 # Permission personnalisée
 # ---------------------------
+# Élèves et parents n'ont pas accès à l'API de gestion : ils consultent leur
+# bulletin par les pages dédiées. Les enseignants lisent, l'administration écrit.
+class IsManager(BasePermission):
+    message = "Réservé à l'administration."
+
+    def has_permission(self, request, view):
+        return is_admin_or_secretary(request.user)
+
+
+class IsSchoolStaff(BasePermission):
+    message = "Réservé au personnel de l'établissement."
+
+    def has_permission(self, request, view):
+        return is_school_staff(request.user)
+
+
+class IsManagerOrStaffReadOnly(BasePermission):
+    message = "Modification réservée à l'administration."
+
+    def has_permission(self, request, view):
+        if request.method in SAFE_METHODS:
+            return is_school_staff(request.user)
+        return is_admin_or_secretary(request.user)
+
+
 class IsTeacherOrReadOnly(BasePermission):
     def has_permission(self, request, view):
         user = request.user
@@ -35,12 +67,38 @@ class IsTeacherOrReadOnly(BasePermission):
         return hasattr(user, 'role') and user.role == 'teacher'
 
 
+class CanManageClassSubject(BasePermission):
+    """Écritures réservées aux ClassSubject que l'utilisateur gère (titulaire ou professeur principal)."""
+    message = "Vous ne gérez pas cette matière."
+
+    def has_permission(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        # Création : la matière visée est dans le corps de la requête
+        class_subject = request.data.get('class_subject') if hasattr(request.data, 'get') else None
+        if isinstance(class_subject, dict):
+            class_subject = class_subject.get('id')
+        if class_subject in (None, ''):
+            return True
+        try:
+            return can_manage_class_subject(request.user, int(class_subject))
+        except (TypeError, ValueError):
+            return True  # laissé à la validation du serializer
+
+    def has_object_permission(self, request, view, obj):
+        if request.method in SAFE_METHODS:
+            return True
+        class_subject_id = obj.pk if isinstance(obj, ClassSubject) else getattr(obj, 'class_subject_id', None)
+        return class_subject_id is not None and can_manage_class_subject(request.user, class_subject_id)
+
+
 # ---------------------------
 # Utilisateur
 # ---------------------------
 class UserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.all()
+    queryset = User.objects.order_by('id')
     serializer_class = UserSerializer
+    permission_classes = [IsManager]
 
 
 # ---------------------------
@@ -65,58 +123,76 @@ class RegisterView(generics.CreateAPIView):
 # SchoolYear / Term / Sequence
 # ---------------------------
 class SchoolYearViewSet(viewsets.ModelViewSet):
-    queryset = SchoolYear.objects.all()
+    queryset = SchoolYear.objects.prefetch_related('terms__sequences').order_by('id')
     serializer_class = SchoolYearSerializer
+    permission_classes = [IsManagerOrStaffReadOnly]
 
 
 class TermViewSet(viewsets.ModelViewSet):
-    queryset = Term.objects.all()
+    queryset = Term.objects.prefetch_related('sequences').order_by('id')
     serializer_class = TermSerializer
+    permission_classes = [IsManagerOrStaffReadOnly]
 
 
 class SequenceViewSet(viewsets.ModelViewSet):
-    queryset = Sequence.objects.all()
+    queryset = Sequence.objects.order_by('id')
     serializer_class = SequenceSerializer
+    permission_classes = [IsManagerOrStaffReadOnly]
 
 
 # ---------------------------
 # Classroom / Teacher / Student
 # ---------------------------
 class ClassroomViewSet(viewsets.ModelViewSet):
-    queryset = Classroom.objects.all()
+    queryset = Classroom.objects.order_by('id')
     serializer_class = ClassroomSerializer
+    permission_classes = [IsManagerOrStaffReadOnly]
 
 
 class TeacherViewSet(viewsets.ModelViewSet):
-    queryset = Teacher.objects.all()
+    queryset = Teacher.objects.order_by('id')
     serializer_class = TeacherSerializer
+    permission_classes = [IsManagerOrStaffReadOnly]
 
 
 class StudentViewSet(viewsets.ModelViewSet):
-    queryset = Student.objects.all()
+    queryset = Student.objects.order_by('id')
     serializer_class = StudentSerializer
+    permission_classes = [IsManagerOrStaffReadOnly]
 
 
 # ---------------------------
 # Subject / ClassSubject
 # ---------------------------
 class SubjectViewSet(viewsets.ModelViewSet):
-    queryset = Subject.objects.all()
+    queryset = Subject.objects.order_by('id')
     serializer_class = SubjectSerializer
+    permission_classes = [IsManagerOrStaffReadOnly]
 
 
 class ClassSubjectViewSet(viewsets.ModelViewSet):
-    queryset = ClassSubject.objects.all()
+    queryset = ClassSubject.objects.order_by('id')
     serializer_class = ClassSubjectSerializer
+    permission_classes = [IsManagerOrStaffReadOnly]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # ?managed=1 : uniquement les matières que l'utilisateur peut saisir
+        if self.request.query_params.get('managed') in ('1', 'true'):
+            queryset = managed_class_subjects(self.request.user, queryset)
+        return queryset
 
 
 # ---------------------------
 # Grade / Notes
 # ---------------------------
 class GradeViewSet(viewsets.ModelViewSet):
-    queryset = Grade.objects.all()
+    # Une jointure par objet imbriqué dans GradeSerializer
+    queryset = Grade.objects.select_related(
+        'student', 'class_subject', 'sequence', 'created_by', 'updated_by'
+    ).order_by('id')
     serializer_class = GradeSerializer
-    permission_classes = [IsTeacherOrReadOnly]
+    permission_classes = [IsSchoolStaff, IsTeacherOrReadOnly, CanManageClassSubject]
 
     @action(detail=False, methods=['post'])
     def calculate_sequence(self, request):
@@ -140,57 +216,146 @@ class GradeViewSet(viewsets.ModelViewSet):
     def validate_grade(self, request):
         grade_id = request.data.get('grade_id')
         grade = get_object_or_404(Grade, id=grade_id)
+        self.check_object_permissions(request, grade)
         grade.status = 'validated'
         grade.save()
         return Response({'status': 'validated'})
 
+    # Écritures groupées : une requête pour toute une feuille de notes.
+    # L'en-tête Idempotency-Key permet de rejouer une requête sans la réappliquer.
+    @action(detail=False, methods=['post'], url_path='bulk', permission_classes=[IsSchoolStaff])
+    def bulk_upsert(self, request):
+        items = request.data.get('grades') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list):
+            return Response({'error': 'Une liste de notes est attendue.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        def apply():
+            results = grade_bulk.upsert_grades(request.user, items)
+            return status.HTTP_200_OK, {'results': results, 'errors': sum(r['status'] == 'error' for r in results)}
+        return self._idempotent(request, 'grades/bulk', request.data, apply)
+
+    @action(detail=False, methods=['post'], url_path='bulk-status', permission_classes=[IsSchoolStaff])
+    def bulk_status(self, request):
+        data = request.data
+        if not isinstance(data, dict):
+            return Response({'error': 'Un objet JSON est attendu.'}, status=status.HTTP_400_BAD_REQUEST)
+        ids = data.get('ids')
+        if ids is not None:
+            if not isinstance(ids, list):
+                return Response({'error': 'ids doit être une liste.'}, status=status.HTTP_400_BAD_REQUEST)
+            ids = [int(i) for i in ids if str(i).isdigit()]
+        elif not all(str(data.get(key, '')).isdigit() for key in ('class_subject', 'sequence')):
+            return Response({'error': 'Indiquez ids ou class_subject et sequence.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        def apply():
+            try:
+                results = grade_bulk.change_status(
+                    request.user, data.get('action'), ids=ids,
+                    class_subject=data.get('class_subject'), sequence=data.get('sequence'),
+                )
+            except PermissionError as e:
+                return status.HTTP_403_FORBIDDEN, {'error': str(e)}
+            except ValueError as e:
+                return status.HTTP_400_BAD_REQUEST, {'error': str(e)}
+            return status.HTTP_200_OK, {'results': results, 'errors': sum(r['status'] == 'error' for r in results)}
+        return self._idempotent(request, 'grades/bulk-status', data, apply)
+
+    # File hors ligne du service worker : un lot de modifications appliqué en une transaction
+    @action(detail=False, methods=['post'], url_path='sync', permission_classes=[IsSchoolStaff])
+    def sync(self, request):
+        changes = request.data.get('changes') if isinstance(request.data, dict) else None
+        if not isinstance(changes, list):
+            return Response({'error': 'Une liste changes est attendue.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        def apply():
+            results = grade_bulk.sync_grades(request.user, changes)
+            return status.HTTP_200_OK, {
+                'results': results,
+                'conflicts': sum(r['status'] == 'conflict' for r in results),
+                'errors': sum(r['status'] == 'error' for r in results),
+            }
+        key = request.headers.get('Idempotency-Key') or request.data.get('batch')
+        code, body = grade_bulk.run_idempotent(request.user, 'grades/sync', key, request.data, apply)
+        return Response(body, status=code)
+
+    def _idempotent(self, request, endpoint, payload, func):
+        code, body = grade_bulk.run_idempotent(
+            request.user, endpoint, request.headers.get('Idempotency-Key'), payload, func
+        )
+        return Response(body, status=code)
+
 
 # ---------------------------
 # Discipline
 # ---------------------------
 class DisciplineViewSet(viewsets.ModelViewSet):
-    queryset = Discipline.objects.all()
+    queryset = Discipline.objects.select_related('student', 'term').prefetch_related('term__sequences').order_by('id')
     serializer_class = DisciplineSerializer
+    permission_classes = [IsManagerOrStaffReadOnly]
+
+    # Saisie groupée des absences (fin de trimestre) : sanctions attribuées sans requête par fiche
+    @action(detail=False, methods=['post'], url_path='bulk', permission_classes=[IsSchoolStaff])
+    def bulk_upsert(self, request):
+        if not is_admin_or_secretary(request.user):
+            return Response({'error': "Réservé à l'administration."}, status=status.HTTP_403_FORBIDDEN)
+        items = request.data.get('disciplines') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list):
+            return Response({'error': 'Une liste de fiches est attendue.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        def apply():
+            results = sanctions.record_absences(items)
+            return status.HTTP_200_OK, {'results': results, 'errors': sum(r['status'] == 'error' for r in results)}
+        code, body = grade_bulk.run_idempotent(
+            request.user, 'disciplines/bulk', request.headers.get('Idempotency-Key'), request.data, apply
+        )
+        return Response(body, status=code)
 
 
 # ---------------------------
 # MentionRule / Settings
 # ---------------------------
 class MentionRuleViewSet(viewsets.ModelViewSet):
-    queryset = MentionRule.objects.all()
+    queryset = MentionRule.objects.order_by('id')
     serializer_class = MentionRuleSerializer
+    permission_classes = [IsManager]
 
 
 class SettingsViewSet(viewsets.ModelViewSet):
-    queryset = Settings.objects.all()
+    queryset = Settings.objects.order_by('id')
     serializer_class = SettingsSerializer
+    permission_classes = [IsManager]
 
 
 # ---------------------------
 # Bulletin
 # ---------------------------
 class BulletinViewSet(viewsets.ModelViewSet):
-    queryset = Bulletin.objects.all()
+    # Mentions et appréciations sont calculées par lot dans BulletinListSerializer
+    queryset = Bulletin.objects.select_related('student', 'sequence__term').order_by('id')
     serializer_class = BulletinSerializer
+    permission_classes = [IsManagerOrStaffReadOnly]
 
     @action(detail=False, methods=['post'])
     def generate(self, request):
-        classroom_id = request.data.get('classroom_id')
-        term_id = request.data.get('term_id')
-        classroom = get_object_or_404(Classroom, id=classroom_id)
-        term = get_object_or_404(Term, id=term_id)
-        bulletins = []
-
-        for student in classroom.students.all():
-            bulletin = Bulletin.objects.create(
-                student=student,
-                term=term,
-                pdf_path=f'bulletins/{student.matricule}_{term.name}.pdf'
-            )
-            bulletins.append(bulletin)
-
-        serializer = BulletinSerializer(bulletins, many=True)
-        return Response(serializer.data)
+        """Bulletins trimestriels d'une classe, comme la page de génération (séquences déjà générées)."""
+        data = request.data if isinstance(request.data, dict) else {}
+        classroom_id, term_id = (str(data.get(key, '')) for key in ('classroom_id', 'term_id'))
+        if not classroom_id.isdigit() or not term_id.isdigit():
+            return Response({'error': 'classroom_id et term_id doivent être des identifiants numériques.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        classroom = get_object_or_404(Classroom, id=int(classroom_id))
+        term = get_object_or_404(Term, id=int(term_id))
+        sequences = list(term.sequences.order_by('order'))
+        missing = generation.missing_sequence_bulletins(classroom, sequences) if sequences else ['-']
+        if missing:
+            return Response({'error': 'Bulletins de séquence manquants.', 'missing': missing[:50]},
+                            status=status.HTTP_400_BAD_REQUEST)
+        with profiling.profiled(f"trimester-{classroom.id}-{term.id}"):
+            recaps = generation.compute_consolidated_results(classroom, sequences)
+            generation.render_tasks(generation.consolidated_render_tasks(generation.TRIMESTER, classroom, term, recaps))
+            generation.save_consolidated_bulletins(generation.TRIMESTER, classroom, term, sequences, recaps)
+        bulletins = self.get_queryset().filter(classroom=classroom, sequence=sequences[0], is_trimester=True)
+        return Response(self.get_serializer(bulletins, many=True).data)
 
     @action(detail=False, methods=['get'])
     def ranks(self, request):
@@ -205,23 +370,105 @@ class BulletinViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def export_pdf(self, request, pk=None):
         bulletin = self.get_object()
-        pdf_path = bulletin.pdf_path
-        if not pdf_path or not os.path.exists(pdf_path):
+        content = bundles.bulletin_pdf(bulletin)
+        if content is None:
             return Response({'error': 'PDF non généré ou introuvable.'}, status=404)
-        return FileResponse(open(pdf_path, 'rb'), content_type='application/pdf')
+        return byte_range_response(request, content, f"{bulletin.student_id}.pdf")
 
 
 # ---------------------------
 # Archivage
 # ---------------------------
-class ArchivedGradeViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = ArchivedGrade.objects.all()
+class ArchiveFilterMixin:
+    """Lecture seule, filtrable par ``?school_year=`` et ``?matricule=`` (index school_year, matricule)."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if params.get('school_year'):
+            if not params['school_year'].isdigit():
+                raise ValidationError({'school_year': "Identifiant d'année numérique attendu."})
+            queryset = queryset.filter(school_year_id=int(params['school_year']))
+        if params.get('matricule'):
+            queryset = queryset.filter(matricule=params['matricule'])
+        return queryset
+
+
+class ArchivedGradeViewSet(ArchiveFilterMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = ArchivedGrade.objects.order_by('id')
     serializer_class = ArchivedGradeSerializer
+    permission_classes = [IsManagerOrStaffReadOnly]
 
 
-class ArchivedBulletinViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = ArchivedBulletin.objects.all()
+class ArchivedBulletinViewSet(ArchiveFilterMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = ArchivedBulletin.objects.order_by('id')
     serializer_class = ArchivedBulletinSerializer
+    permission_classes = [IsManagerOrStaffReadOnly]
+
+
+class ArchivedDisciplineViewSet(ArchiveFilterMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = ArchivedDiscipline.objects.order_by('id')
+    serializer_class = ArchivedDisciplineSerializer
+    permission_classes = [IsManagerOrStaffReadOnly]
+
+
+# ---------------------------
+# Complétude des notes
+# ---------------------------
+class ReadinessView(APIView):
+    """Classes pouvant être calculées pour une séquence, et ce qui bloque les autres."""
+    permission_classes = [IsSchoolStaff]
+
+    def get(self, request):
+        sequence_id = request.query_params.get('sequence', '')
+        classroom_ids = request.query_params.getlist('classroom')
+        if not sequence_id.isdigit() or not all(c.isdigit() for c in classroom_ids):
+            return Response({'error': 'sequence et classroom doivent être des identifiants numériques.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        sequence = get_object_or_404(Sequence, id=int(sequence_id))
+        classroom_ids = [int(c) for c in classroom_ids] or None
+        report = serialize_report(readiness_report(sequence, classroom_ids))
+        if request.query_params.get('blocking') == '1':
+            report = [entry for entry in report if not entry['can_calculate']]
+        return Response({'sequence': sequence.id, 'classrooms': report})
+
+
+# ---------------------------
+# Feuille de notes compacte
+# ---------------------------
+class GradeSheetView(APIView):
+    """Feuille de notes d'une classe pour une séquence, au format colonnes.
+
+    ``If-None-Match`` renvoie 304 si la feuille n'a pas changé ; ``since`` (valeur
+    ``updated_at`` d'une réponse précédente) ne renvoie que les notes modifiées.
+    """
+    permission_classes = [IsSchoolStaff]
+
+    def get(self, request):
+        classroom_id = request.query_params.get('classroom', '')
+        sequence_id = request.query_params.get('sequence', '')
+        if not classroom_id.isdigit() or not sequence_id.isdigit():
+            return Response({'error': 'classroom et sequence doivent être des identifiants numériques.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        classroom = get_object_or_404(Classroom, id=int(classroom_id))
+        sequence = get_object_or_404(Sequence, id=int(sequence_id))
+        version, last_update = grade_sheet.sheet_version(classroom, sequence)
+        etag = f'W/"{version}"'
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+
+        since = request.query_params.get('since')
+        if since:
+            since_dt = parse_datetime(since.replace(' ', '+'))
+            if since_dt is None:
+                return Response({'error': 'Paramètre since invalide (ISO 8601 attendu).'}, status=status.HTTP_400_BAD_REQUEST)
+            data = grade_sheet.sheet_changes(classroom, sequence, since_dt)
+        else:
+            data = grade_sheet.build_sheet(classroom, sequence)
+        data['version'] = version
+        data['updated_at'] = last_update.isoformat() if last_update else None
+        return compact_json_response(request, data, etag=etag)
 
 
 # ---------------------------
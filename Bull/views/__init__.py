@@ -0,0 +1,10 @@
+# Vues HTML, regroupées par domaine. Les bibliothèques lourdes (openpyxl,
+# ReportLab, python-docx) ne sont importées que dans les vues qui s'en servent,
+# pour que le démarrage des workers et des commandes manage.py reste rapide.
+from .pages import *  # noqa: F401,F403
+from .people import *  # noqa: F401,F403
+from .subjects import *  # noqa: F401,F403
+from .grades import *  # noqa: F401,F403
+from .bulletins import *  # noqa: F401,F403
+from .exports import *  # noqa: F401,F403
+from .parameters import *  # noqa: F401,F403
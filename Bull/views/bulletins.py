@@ -0,0 +1,434 @@
+# Vues des bulletins (consultation, génération, statistiques)
+import os
+
+from django.urls import reverse
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404
+from django.contrib import messages
+from Bull.models import SchoolYear, Term, Sequence, Classroom, Student, Subject, Grade, Bulletin
+from Bull.responses import byte_range_response
+from Bull.services import bundles, generation, profiling
+from Bull.services.lookups import BulletinIndex, GradeIndex
+from Bull.services.overview import classroom_overview
+from Bull.services.readiness import readiness_report, blocking_subjects
+
+
+# ---------------------------------------------------
+#    GESTION DES bulletins 
+# ---------------------------------------------------
+
+
+@login_required
+def bulletin_view(request):
+    selected_schoolyear = request.GET.get('schoolyear')
+    selected_sequence = request.GET.get('sequence')
+    selected_classroom = request.GET.get('classroom')
+
+    # Statistiques par salle pour affichage global (deux requêtes groupées, en cache)
+    # Si pas de sélection, on affiche le nombre de bulletins existants pour la salle (toutes années et séquences)
+    if selected_sequence and selected_schoolyear:
+        classroom_stats = classroom_overview(school_year=selected_schoolyear, sequence=selected_sequence)
+    else:
+        classroom_stats = classroom_overview()
+    # Copie : les indicateurs de complétude ajoutés plus bas ne doivent pas modifier le cache
+    classroom_stats = [dict(stat) for stat in classroom_stats]
+
+    # Si aucune année n'est sélectionnée, prendre l'année active
+    if not selected_schoolyear:
+        active_sy = request.academic['school_year']
+        if active_sy:
+            selected_schoolyear = str(active_sy.id)
+
+    # Filtrage : uniquement les colonnes affichées dans les listes déroulantes
+    schoolyears = SchoolYear.objects.only('id', 'name')
+    terms = Term.objects.filter(school_year_id=selected_schoolyear).only('id', 'name', 'school_year_id') if selected_schoolyear else Term.objects.none()
+    sequences = Sequence.objects.select_related('term').only('id', 'name', 'term__name')
+    classrooms = Classroom.objects.only('id', 'name')
+
+    selected_schoolyear_obj = SchoolYear.objects.filter(id=selected_schoolyear).first() if selected_schoolyear else None
+    selected_sequence_obj = Sequence.objects.select_related('term').filter(id=selected_sequence).first() if selected_sequence else None
+    selected_classroom_obj = Classroom.objects.select_related('head_teacher__user').filter(id=selected_classroom).first() if selected_classroom else None
+
+    students = Student.objects.filter(classroom_id=selected_classroom).order_by('last_name', 'first_name') if selected_classroom else []
+    subjects = Subject.objects.filter(classsubject__classroom_id=selected_classroom).distinct() if selected_classroom else Subject.objects.none()
+
+    # Index {student_id: {subject_id: grade}} partagé par la vue et les filtres du template
+    grades = GradeIndex([])
+    if selected_classroom and selected_sequence:
+        term_obj = selected_sequence_obj.term if selected_sequence_obj else None
+        grades = GradeIndex(Grade.objects.filter(
+            class_subject__classroom_id=selected_classroom,
+            sequence_id=selected_sequence,
+            term=term_obj
+        ).select_related('student', 'class_subject'))
+
+    # Construire une structure directement exploitable dans le template
+    subjects = list(subjects)
+    student_grades = []
+    for student in students:
+        row = {"student": student, "grades": []}
+        for subject in subjects:
+            row["grades"].append(grades.get(student.id, subject.id))
+        student_grades.append(row)
+
+    # Bulletins de séquence seulement : les consolidés référencent aussi la première séquence
+    bulletins = Bulletin.objects.filter(
+        sequence_id=selected_sequence,
+        is_trimester=False,
+        is_annual=False,
+        student__classroom_id=selected_classroom,
+        sequence__term__school_year_id=selected_schoolyear
+    ) if selected_sequence and selected_classroom and selected_schoolyear else Bulletin.objects.none()
+
+    # Complétude des notes de toutes les classes pour la séquence (une requête groupée)
+    readiness = readiness_report(selected_sequence_obj) if selected_sequence_obj else {}
+    for stat in classroom_stats:
+        entry = readiness.get(stat['id'])
+        stat['can_calculate'] = bool(entry and entry['can_calculate'])
+        stat['blocking'] = entry['blocking'] if entry else None
+    selected_readiness = readiness.get(selected_classroom_obj.id) if selected_classroom_obj else None
+    can_calculate = request.user.role in ['admin', 'secretary'] and bool(selected_readiness and selected_readiness['can_calculate'])
+    bulletins = BulletinIndex(bulletins)
+    can_export = len(bulletins) > 0
+
+    context = {
+        'schoolyears': schoolyears,
+        'terms': terms,
+        'sequences': sequences,
+        'classrooms': classrooms,
+        'selected_schoolyear': selected_schoolyear,
+        'selected_sequence': selected_sequence,
+        'selected_classroom': selected_classroom,
+        'selected_schoolyear_obj': selected_schoolyear_obj,
+        'selected_sequence_obj': selected_sequence_obj,
+        'selected_classroom_obj': selected_classroom_obj,
+        'students': students,
+        'subjects': subjects,
+        'grades': grades,
+        'student_grades': student_grades,  
+        'bulletins': bulletins,
+        'can_calculate': can_calculate,
+        'can_export': can_export,
+        'classroom_stats': classroom_stats,
+        'readiness': selected_readiness,
+        'blocking_subjects': blocking_subjects(selected_readiness) if selected_readiness else [],
+    }
+    return render(request, 'Bull/bulletins.html', context)
+
+@login_required
+@user_passes_test(lambda u: u.role in ['admin', 'secretary'])
+def calculate_bulletins(request):
+    if request.method != 'POST':
+        return redirect('bulletins')
+    sequence_id = request.POST.get('sequence')
+    classroom_id = request.POST.get('classroom')
+    sequence = Sequence.objects.get(id=sequence_id)
+    classroom = Classroom.objects.get(id=classroom_id)
+    # Vérification : tous les élèves doivent avoir une note valide à chaque matière
+    readiness = readiness_report(sequence, [classroom.id]).get(classroom.id)
+    if not readiness or not readiness['can_calculate']:
+        msg = "Impossible de générer les bulletins : certaines notes sont manquantes ou non validées."
+        from django.contrib import messages
+        messages.error(request, msg)
+        return redirect(f"{reverse('bulletins')}?sequence={sequence_id}&classroom={classroom_id}")
+    with profiling.profiled(f"sequence-{classroom.id}-{sequence.id}"):
+        # Récupération du canevas bulletin (entête et pied de page) au format Word
+        entete_text, pied_text = generation.load_canevas_text()
+
+        # Calcul des moyennes, rangs et génération des PDF (ReportLab)
+        recap_bulletins = generation.compute_sequence_results(classroom, sequence)
+        generation.render_tasks(generation.sequence_render_tasks(classroom, sequence, recap_bulletins, entete_text, pied_text))
+        # Enregistrement des bulletins et verrouillage des notes
+        generation.save_sequence_bulletins(classroom, sequence, recap_bulletins)
+
+    # Rendu HTML du bulletin pour chaque élève (optionnel, pour consultation ou export)
+    # Exemple pour le premier élève (à adapter selon besoin)
+    if recap_bulletins:
+        bulletin_data = recap_bulletins[0]
+        return render(request, 'Bull/bulletin.html', {
+            'recap_notes': bulletin_data['recap_notes'],
+            'average': bulletin_data['average'],
+            'total_coef': bulletin_data['total_coef'],
+        })
+    
+# 3. Vue détail du bulletin
+@login_required
+def bulletin_detail_view(request, student_id, sequence_id):
+    student = get_object_or_404(Student, id=student_id)
+    sequence = get_object_or_404(Sequence, id=sequence_id)
+    classroom = student.classroom
+    # Inclure toutes les matières ayant au moins une note pour cette classe et séquence
+    from Bull.models import Grade, ClassSubject, Subject, Bulletin
+    subjects = Subject.objects.filter(
+        id__in=Grade.objects.filter(
+            class_subject__classroom=classroom,
+            sequence=sequence
+        ).values_list('class_subject__subject_id', flat=True)
+    ).distinct()
+    class_subjects = ClassSubject.objects.filter(classroom=classroom, subject__in=subjects)
+    grades = Grade.objects.filter(student=student, class_subject__in=class_subjects, sequence=sequence)
+    bulletin = Bulletin.objects.filter(student=student, sequence=sequence, is_trimester=False, is_annual=False).first()
+    # Calcul moyenne et rang
+    avg = bulletin.average if bulletin else None
+    rank = bulletin.rank if bulletin else None
+    pdf_path = bulletin.pdf_path if bulletin else None
+    # Calcul detailed_row pour le template
+    notes = []
+    notes_x_coef = []
+    somme = 0
+    total_coef = 0
+    rangs_matiere = {}
+    # Rang par matière
+    for subject in subjects:
+        cs = class_subjects.filter(subject=subject).first()
+        grades_matiere = Grade.objects.filter(class_subject=cs, sequence=sequence)
+        notes_matiere = []
+        for g in grades_matiere:
+            note = g.value if g.value is not None else 0
+            notes_matiere.append({'student_id': g.student_id, 'note': note})
+        notes_matiere.sort(key=lambda x: x['note'], reverse=True)
+        for idx, entry in enumerate(notes_matiere, 1):
+            rangs_matiere[(subject.id, entry['student_id'])] = idx
+    for subject in subjects:
+        cs = class_subjects.filter(subject=subject).first()
+        grade = grades.filter(class_subject=cs).first()
+        note = grade.value if grade and grade.value is not None else 0
+        coef = cs.coefficient if cs else 1
+        note_x_coef = round(note * coef, 2)
+        rang_matiere = rangs_matiere.get((subject.id, student.id), '-')
+        notes.append({'subject': subject.name, 'note': note, 'coef': coef, 'note_x_coef': note_x_coef, 'rang_matiere': rang_matiere})
+        notes_x_coef.append(note_x_coef)
+        somme += note_x_coef
+        total_coef += coef
+    moyenne = round(somme / total_coef, 2) if total_coef > 0 else 0
+    somme_notes = round(sum([n['note'] for n in notes]), 2)
+    detailed_row = {
+        'nom': f"{student.last_name} {student.first_name}",
+        'notes': notes,
+        'notes_x_coef': notes_x_coef,
+        'somme': somme,
+        'somme_notes': somme_notes,
+        'total_coef': total_coef,
+        'moyenne': moyenne,
+        'rang': rank,
+    }
+    return render(request, 'Bull/bulletin_detail.html', {
+        'student': student,
+        'sequence': sequence,
+        'classroom': classroom,
+        'subjects': subjects,
+        'grades': grades,
+        'avg': avg,
+        'rank': rank,
+        'pdf_path': pdf_path,
+        'detailed_row': detailed_row,
+    })
+    # Génération Excel
+    import openpyxl
+    excel_path = os.path.join(pdf_dir, f"bulletins_classe_{classroom.id}_seq_{sequence.id}.xlsx")
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Bulletins"
+    ws.append(["Élève", "Moyenne", "Rang"])
+    for res in results:
+        student = res['student']
+        ws.append([f"{student.last_name} {student.first_name}", res['average'], res['rank']])
+    wb.save(excel_path)
+    # Stocke les stats en session pour la page suivante
+    request.session['bulletin_stats'] = {
+        'moyenne_generale': moyenne_generale,
+        'moyenne_min': moyenne_min,
+        'moyenne_max': moyenne_max,
+        'nb_echec': nb_echec,
+        'results': [
+            {'nom': f"{r['student'].last_name} {r['student'].first_name}", 'moyenne': r['average'], 'rang': r['rank']} for r in results
+        ],
+        'excel_path': excel_path,
+    }
+    return redirect('bulletin_stats')
+
+@login_required
+def bulletin_stats(request):
+    # Récupère les paramètres de classe et séquence
+    classroom_id = request.GET.get('classroom')
+    sequence_id = request.GET.get('sequence')
+    stats = {}
+    if classroom_id and sequence_id:
+        from Bull.models import Bulletin, Student, Classroom, Sequence, Subject, ClassSubject, Grade
+        classroom = Classroom.objects.filter(id=classroom_id).first()
+        sequence = Sequence.objects.filter(id=sequence_id).first()
+        bulletins = Bulletin.objects.filter(
+            classroom_id=classroom_id, sequence_id=sequence_id, is_trimester=False, is_annual=False,
+        )
+        students = Student.objects.filter(classroom_id=classroom_id).order_by('last_name', 'first_name')
+        subjects = Subject.objects.filter(
+            id__in=Grade.objects.filter(
+                class_subject__classroom_id=classroom_id,
+                sequence_id=sequence_id
+            ).values_list('class_subject__subject_id', flat=True)
+        ).distinct()
+        class_subjects = ClassSubject.objects.filter(classroom_id=classroom_id, subject__in=subjects)
+        results = []
+        averages = []
+        detailed_rows = []
+        # Calcul du rang par matière
+        rangs_matiere = {}
+        for subject in subjects:
+            # Pour chaque matière, on récupère toutes les notes des élèves
+            cs = class_subjects.filter(subject=subject).first()
+            grades_matiere = Grade.objects.filter(class_subject=cs, sequence_id=sequence_id)
+            notes_matiere = []
+            for student in students:
+                grade = grades_matiere.filter(student=student).first()
+                note = grade.value if grade and grade.value is not None else 0
+                notes_matiere.append({'student_id': student.id, 'note': note})
+            # Classement décroissant
+            notes_matiere.sort(key=lambda x: x['note'], reverse=True)
+            for idx, entry in enumerate(notes_matiere, 1):
+                rangs_matiere[(subject.id, entry['student_id'])] = idx
+
+        for student in students:
+            b = bulletins.filter(student=student).first()
+            grades = Grade.objects.filter(student=student, class_subject__in=class_subjects, sequence_id=sequence_id)
+            notes = []
+            notes_x_coef = []
+            somme = 0
+            total_coef = 0
+            for subject in subjects:
+                cs = class_subjects.filter(subject=subject).first()
+                grade = grades.filter(class_subject=cs).first()
+                note = grade.value if grade and grade.value is not None else 0
+                coef = cs.coefficient if cs else 1
+                rang_matiere = rangs_matiere.get((subject.id, student.id), '-')
+                notes.append({'subject': subject.name, 'note': note, 'coef': coef, 'rang_matiere': rang_matiere})
+                notes_x_coef.append(note * coef)
+                somme += note * coef
+                total_coef += coef
+            moyenne = round(somme / total_coef, 2) if total_coef > 0 else 0
+            avg = b.average if b and b.average is not None else moyenne
+            averages.append(avg)
+            rang = b.rank if b else None
+            results.append({'student': student, 'average': avg, 'rank': rang})
+            detailed_rows.append({
+                'nom': f"{student.last_name} {student.first_name}",
+                'notes': notes,
+                'notes_x_coef': notes_x_coef,
+                'somme': somme,
+                'total_coef': total_coef,
+                'moyenne': moyenne,
+                'rang': rang,
+            })
+        # Stats simples
+        moyenne_generale = round(sum(averages) / len(averages), 2) if averages else 0
+        moyenne_min = min(averages) if averages else 0
+        moyenne_max = max(averages) if averages else 0
+        nb_echec = len([a for a in averages if a < request.academic['pass_mark']])
+        # Calcul du rang
+        results.sort(key=lambda x: x['average'], reverse=True)
+        for idx, res in enumerate(results, 1):
+            res['rank'] = idx
+        # Format pour le template
+        stats = {
+            'moyenne_generale': moyenne_generale,
+            'moyenne_min': moyenne_min,
+            'moyenne_max': moyenne_max,
+            'nb_echec': nb_echec,
+            'results': [
+                {'nom': f"{r['student'].last_name} {r['student'].first_name}", 'moyenne': r['average'], 'rang': r['rank']} for r in results
+            ],
+            'detailed_rows': detailed_rows,
+            'subjects': [s.name for s in subjects],
+            'excel_path': None,
+        }
+    return render(request, 'Bull/bulletin_stats.html', {'stats': stats})
+
+
+@login_required
+def download_bulletin_pdf(request, student_id, sequence_id):
+    bulletin = Bulletin.objects.filter(
+        student_id=student_id, sequence_id=sequence_id, is_trimester=False, is_annual=False,
+    ).first()
+    content = bundles.bulletin_pdf(bulletin) if bulletin else None
+    if content is None:
+        # Année clôturée : le PDF est dans l'archive annuelle
+        sequence = get_object_or_404(Sequence.objects.select_related('term'), pk=sequence_id)
+        content = bundles.read_bundled(sequence.term.school_year_id, generation.SEQUENCE, sequence_id, student_id)
+        if content is None:
+            raise Http404("Bulletin PDF introuvable.")
+    return byte_range_response(request, content, f"{student_id}.pdf")
+
+
+# Vue de consultation des bulletins consolidés
+@login_required
+@user_passes_test(lambda u: u.role in ['admin', 'secretary'])
+def consolidated_bulletins(request):
+    classroom_id = request.GET.get('classroom')
+    schoolyear_id = request.GET.get('schoolyear')
+    classroom = Classroom.objects.filter(id=classroom_id).first()
+    schoolyear = SchoolYear.objects.filter(id=schoolyear_id).first()
+    students = Student.objects.filter(classroom=classroom).order_by('last_name', 'first_name') if classroom else []
+    terms = schoolyear.terms.all() if schoolyear else []
+    sequences = Sequence.objects.filter(term__in=terms) if terms else []
+    # Récupère tous les bulletins (séquence, trimestre, annuel) de la classe en une requête
+    bulletins_by_student = BulletinIndex(
+        Bulletin.objects.filter(student__in=students).order_by('sequence__order')
+    ) if classroom else BulletinIndex([])
+    context = {
+        'classroom': classroom,
+        'schoolyear': schoolyear,
+        'students': students,
+        'terms': terms,
+        'sequences': sequences,
+        'bulletins_by_student': bulletins_by_student,
+    }
+    return render(request, 'Bull/consolidated_bulletins.html', context)
+# Génération des bulletins trimestriels
+@login_required
+@user_passes_test(lambda u: u.role in ['admin', 'secretary'])
+def generate_bulletins_trimester(request):
+    if request.method != 'POST':
+        return redirect('bulletins')
+    classroom_id = request.POST.get('classroom')
+    schoolyear_id = request.POST.get('schoolyear')
+    trimester_id = request.POST.get('trimester')
+    classroom = Classroom.objects.get(id=classroom_id)
+    term = Term.objects.get(id=trimester_id)
+    sequences = list(term.sequences.order_by('order'))
+    # Vérification : tous les élèves ont un bulletin pour chaque séquence du trimestre
+    missing = generation.missing_sequence_bulletins(classroom, sequences)
+    if missing:
+        messages.error(request, "Impossible de générer le bulletin trimestriel : certains bulletins de séquence sont manquants.")
+        return redirect(f"{reverse('bulletins')}?classroom={classroom_id}&schoolyear={schoolyear_id}")
+    # Calcul des moyennes, rangs, remarques, génération PDF individuel
+    with profiling.profiled(f"trimester-{classroom.id}-{term.id}"):
+        recaps = generation.compute_consolidated_results(classroom, sequences)
+        generation.render_tasks(generation.consolidated_render_tasks(generation.TRIMESTER, classroom, term, recaps))
+        generation.save_consolidated_bulletins(generation.TRIMESTER, classroom, term, sequences, recaps)
+    # Redirection vers la page de consultation des bulletins consolidés
+    return redirect(f"{reverse('consolidated_bulletins')}?classroom={classroom_id}&schoolyear={schoolyear_id}")
+
+# Génération des bulletins annuels
+@login_required
+@user_passes_test(lambda u: u.role in ['admin', 'secretary'])
+def generate_bulletins_annual(request):
+    if request.method != 'POST':
+        return redirect('bulletins')
+    classroom_id = request.POST.get('classroom')
+    schoolyear_id = request.POST.get('schoolyear')
+    classroom = Classroom.objects.get(id=classroom_id)
+    schoolyear = SchoolYear.objects.get(id=schoolyear_id)
+    sequences = list(Sequence.objects.filter(term__school_year=schoolyear).order_by('term__order', 'order'))
+    # Vérification : tous les élèves ont un bulletin pour chaque séquence de l'année
+    missing = generation.missing_sequence_bulletins(classroom, sequences)
+    if missing:
+        messages.error(request, "Impossible de générer le bulletin annuel : certains bulletins de séquence sont manquants.")
+        return redirect(f"{reverse('bulletins')}?classroom={classroom_id}&schoolyear={schoolyear_id}")
+    # Calcul des moyennes, rangs, remarques, génération PDF individuel
+    with profiling.profiled(f"annual-{classroom.id}-{schoolyear.id}"):
+        recaps = generation.compute_consolidated_results(classroom, sequences)
+        generation.render_tasks(generation.consolidated_render_tasks(generation.ANNUAL, classroom, schoolyear, recaps))
+        generation.save_consolidated_bulletins(generation.ANNUAL, classroom, schoolyear, sequences, recaps)
+    # Redirection vers la page de consultation des bulletins consolidés
+    return redirect(f"{reverse('consolidated_bulletins')}?classroom={classroom_id}&schoolyear={schoolyear_id}")
+# Vue pour servir le PDF du bulletin d'un élève
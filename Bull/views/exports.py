@@ -0,0 +1,219 @@
+# Exports PDF et Excel (openpyxl et ReportLab importés à l'usage)
+import io
+import os
+
+from django.urls import reverse
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.shortcuts import redirect
+from django.http import HttpResponse, FileResponse
+from django.conf import settings
+from Bull.models import Classroom, Student, Bulletin, ClassSubject
+from Bull.services.permissions import is_admin_or_secretary
+
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def download_grades_pdf(request, cs_id):
+    from Bull.models import Grade, Sequence, Term, SchoolYear
+    from django.http import HttpResponse
+    # require term and sequence like the listing
+    term_id = request.GET.get('term')
+    sequence_id = request.GET.get('sequence')
+    schoolyear_id = request.GET.get('schoolyear')
+    if not (term_id and sequence_id and schoolyear_id):
+        return redirect(reverse('classsubject_students', args=[cs_id]) + f'?error=Veuillez sélectionner année/trimestre/séquence pour exporter')
+    cs = ClassSubject.objects.select_related('classroom', 'subject').get(id=cs_id)
+    term = Term.objects.get(id=term_id)
+    sequence = Sequence.objects.get(id=sequence_id)
+    schoolyear = SchoolYear.objects.get(id=schoolyear_id)
+    grades = Grade.objects.filter(class_subject=cs, term=term, sequence=sequence).select_related('student').order_by('student__last_name', 'student__first_name')
+
+    # generate PDF using reportlab
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib import colors
+        from reportlab.lib.styles import getSampleStyleSheet
+    except Exception as e:
+        # reportlab not installed
+        return redirect(reverse('classsubject_students', args=[cs_id]) + f'?error=Package reportlab requis pour exporter en PDF: {e}')
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    styles = getSampleStyleSheet()
+    elems = []
+    title = Paragraph(f"Notes - {cs.subject.name} - {cs.classroom.name}", styles['Title'])
+    info = Paragraph(f"Année: {schoolyear.name} — Trimestre: {term.name} — Séquence: {sequence.name}", styles['Normal'])
+    elems.append(title)
+    elems.append(Spacer(1, 12))
+    elems.append(info)
+    elems.append(Spacer(1, 12))
+
+    data = [["Élève", "Note", "Coefficient", "Statut"]]
+    for g in grades:
+        name = f"{g.student.last_name} {g.student.first_name}"
+        value = g.value if g.value is not None else ""
+        coef = getattr(g.class_subject, 'coefficient', '')
+        status = g.status
+        data.append([name, str(value), str(coef), status])
+
+    table = Table(data, colWidths=[200, 60, 80, 80])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
+        ('GRID', (0,0), (-1,-1), 0.5, colors.black),
+    ]))
+    elems.append(table)
+    doc.build(elems)
+    buffer.seek(0)
+    response = HttpResponse(buffer, content_type='application/pdf')
+    filename = f"notes_{cs.classroom.name}_{cs.subject.name}_{sequence.name}.pdf"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required
+def export_bulletins_pdf(request):
+    sequence_id = request.GET.get('sequence')
+    classroom_id = request.GET.get('classroom')
+    bulletins = Bulletin.objects.filter(
+        classroom_id=classroom_id, sequence_id=sequence_id, is_trimester=False, is_annual=False,
+    ).select_related('student')
+    import zipfile
+    from io import BytesIO
+    zip_buffer = BytesIO()
+    with zipfile.ZipFile(zip_buffer, 'w') as zip_file:
+        for b in bulletins:
+            if b.pdf_path and hasattr(b.pdf_path, 'path') and os.path.exists(b.pdf_path.path):
+                filename = f"{b.student.last_name}_{b.student.first_name}_bulletin_{sequence_id}.pdf"
+                zip_file.write(b.pdf_path.path, arcname=filename)
+    zip_buffer.seek(0)
+    return FileResponse(zip_buffer, as_attachment=True, filename=f"bulletins_classe_{classroom_id}_seq_{sequence_id}.zip")
+
+@login_required
+def export_bulletins_excel(request):
+    import openpyxl
+    sequence_id = request.GET.get('sequence')
+    classroom_id = request.GET.get('classroom')
+    from Bull.models import Bulletin, Student, Subject, ClassSubject, Grade, Sequence, Classroom
+    bulletins = Bulletin.objects.filter(
+        classroom_id=classroom_id, sequence_id=sequence_id, is_trimester=False, is_annual=False,
+    )
+    students = Student.objects.filter(classroom_id=classroom_id).order_by('last_name', 'first_name')
+    classroom = Classroom.objects.filter(id=classroom_id).first()
+    sequence = Sequence.objects.filter(id=sequence_id).first()
+    subjects = Subject.objects.filter(classsubject__classroom_id=classroom_id).distinct()
+    class_subjects = ClassSubject.objects.filter(classroom_id=classroom_id, subject__in=subjects)
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Bulletins"
+    # Titre
+    ws.append([f"Classe : {classroom.name if classroom else classroom_id}", f"Séquence : {sequence.name if sequence else sequence_id}"])
+    # En-tête
+    header = ["Nom"]
+    for subject in subjects:
+        header.append(subject.name)
+    for subject in subjects:
+        header.append(f"{subject.name} x coef")
+    header += ["Somme", "Total coef", "Moyenne", "Rang"]
+    ws.append(header)
+    # Lignes élèves
+    for student in students:
+        b = bulletins.filter(student=student).first()
+        grades = Grade.objects.filter(student=student, class_subject__in=class_subjects, sequence_id=sequence_id)
+        row = [f"{student.last_name} {student.first_name}"]
+        notes = []
+        notes_x_coef = []
+        somme = 0
+        total_coef = 0
+        for subject in subjects:
+            cs = class_subjects.filter(subject=subject).first()
+            grade = grades.filter(class_subject=cs).first()
+            note = grade.value if grade and grade.value is not None else 0
+            coef = cs.coefficient if cs else 1
+            notes.append(note)
+            notes_x_coef.append(note * coef)
+            somme += note * coef
+            total_coef += coef
+        row += notes
+        row += notes_x_coef
+        row += [somme, total_coef]
+        moyenne = round(somme / total_coef, 2) if total_coef > 0 else 0
+        row.append(moyenne)
+        rang = b.rank if b else "-"
+        row.append(rang)
+        ws.append(row)
+    excel_path = os.path.join(settings.MEDIA_ROOT, f"bulletins/bulletins_classe_{classroom_id}_seq_{sequence_id}.xlsx")
+    wb.save(excel_path)
+    return FileResponse(open(excel_path, 'rb'), as_attachment=True, filename=os.path.basename(excel_path))
+
+
+@login_required
+def export_students_view(request):
+    classroom_id = request.GET.get('classroom')
+    export_format = request.GET.get('format', 'excel')
+    classroom = Classroom.objects.filter(id=classroom_id).first()
+    if not classroom:
+        return HttpResponse('Classe non trouvée', status=404)
+    students = Student.objects.filter(classroom=classroom)
+
+    if export_format == 'excel':
+        import openpyxl
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = classroom.name
+        ws.append([f"Liste des élèves de la classe {classroom.name}"])
+        ws.append(['Matricule', 'Nom', 'Prénom', 'Genre', 'Date Naissance', 'Lieu Naissance', 'Redouble', 'Photo'])
+        for s in students:
+            ws.append([
+                s.matricule,
+                s.last_name,
+                s.first_name,
+                s.gender,
+                s.birth_date.strftime('%Y-%m-%d') if s.birth_date else '',
+                s.birth_place,
+                'Oui' if s.repeater else 'Non',
+                s.photo.url if s.photo else ''
+            ])
+        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        response['Content-Disposition'] = f'attachment; filename=eleves_{classroom.name}.xlsx'
+        wb.save(response)
+        return response
+
+    elif export_format == 'pdf':
+        response = HttpResponse(content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename=eleves_{classroom.name}.pdf'
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+        p = canvas.Canvas(response, pagesize=A4)
+        width, height = A4
+        y = height - 50
+        p.setFont('Helvetica-Bold', 16)
+        p.drawString(50, y, f"Liste des élèves de la classe {classroom.name}")
+        y -= 40
+        p.setFont('Helvetica', 10)
+        headers = ['Matricule', 'Nom', 'Prénom', 'Genre', 'Date Naissance', 'Lieu Naissance', 'Redouble']
+        p.drawString(50, y, ' | '.join(headers))
+        y -= 20
+        for s in students:
+            line = [
+                s.matricule,
+                s.last_name,
+                s.first_name,
+                s.gender,
+                s.birth_date.strftime('%Y-%m-%d') if s.birth_date else '',
+                s.birth_place,
+                'Oui' if s.repeater else 'Non'
+            ]
+            p.drawString(50, y, ' | '.join(line))
+            y -= 18
+            if y < 50:
+                p.showPage()
+                y = height - 50
+        p.save()
+        return response
+
+    else:
+        return HttpResponse('Format non supporté', status=400)
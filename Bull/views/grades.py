@@ -0,0 +1,291 @@
+# Vues de saisie et de validation des notes
+from django.urls import reverse
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.shortcuts import render, redirect
+from Bull.models import SchoolYear, Term, Sequence, Grade, ClassSubject
+from Bull.services.permissions import can_manage_class_subject, is_admin_or_secretary
+
+
+# ------------------------------------------
+# gestion des notes
+# -----------------------------------------
+
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def classsubject_students_view(request, cs_id):
+    cs = ClassSubject.objects.select_related('classroom', 'subject').get(id=cs_id)
+    students = cs.classroom.students.all().order_by('last_name', 'first_name')
+    # from Bull.models import Grade, Sequence, Term, SchoolYear
+    schoolyears = SchoolYear.objects.all()
+    terms = Term.objects.all()
+    sequences = Sequence.objects.all()
+    # Récupère les messages transmis par la redirection
+    message = request.GET.get('success')
+    error_message = request.GET.get('error')
+    selected_schoolyear_id = request.GET.get('schoolyear')
+    selected_term_id = request.GET.get('term')
+    selected_sequence_id = request.GET.get('sequence')
+
+    # If not selected, use active sequence/term/year
+    if not (selected_schoolyear_id and selected_term_id and selected_sequence_id):
+        active_seq = request.academic['sequence']
+        if active_seq:
+            selected_sequence_id = str(active_seq.id)
+            selected_term_id = str(active_seq.term.id)
+            selected_schoolyear_id = str(active_seq.term.school_year.id)
+
+    # Enforce only one active sequence per term/year
+    if selected_sequence_id:
+        active_seqs = Sequence.objects.filter(term_id=selected_term_id, active=True)
+        if active_seqs.count() > 1:
+            # Keep only the first as active
+            for seq in active_seqs[1:]:
+                seq.active = False
+                seq.save()
+    grades = None
+    selected_schoolyear_obj = selected_term_obj = selected_sequence_obj = None
+    # Only show a list when a school year is selected (and term + sequence)
+    if selected_schoolyear_id:
+        try:
+            selected_schoolyear_obj = SchoolYear.objects.get(id=selected_schoolyear_id)
+        except SchoolYear.DoesNotExist:
+            selected_schoolyear_obj = None
+        if selected_term_id and selected_sequence_id:
+            try:
+                selected_term_obj = Term.objects.get(id=selected_term_id)
+            except Term.DoesNotExist:
+                selected_term_obj = None
+            try:
+                selected_sequence_obj = Sequence.objects.get(id=selected_sequence_id)
+            except Sequence.DoesNotExist:
+                selected_sequence_obj = None
+
+            # Ensure StudentSubject and Grade records exist for every student in the class for this sequence/term
+            from Bull.models import StudentSubject
+            created_ss = 0
+            created_grades = 0
+            for student in students:
+                try:
+                    ss, ss_new = StudentSubject.objects.get_or_create(
+                        student=student,
+                        subject=cs.subject,
+                        defaults={'is_optional': False}
+                    )
+                    if ss_new:
+                        created_ss += 1
+                except Exception:
+                    # ignore per-student failures
+                    pass
+                try:
+                    g, g_new = Grade.objects.get_or_create(
+                        student=student,
+                        class_subject=cs,
+                        term=selected_term_obj,
+                        sequence=selected_sequence_obj,
+                        defaults={
+                            'value': 0.0,
+                            'status': 'draft',
+                            'created_by': request.user,
+                            'updated_by': request.user
+                        }
+                    )
+                    if g_new:
+                        created_grades += 1
+                except Exception:
+                    pass
+
+            grades = Grade.objects.filter(
+                class_subject=cs,
+                term=selected_term_id,
+                sequence=selected_sequence_id
+            ).select_related('student').order_by('student__last_name', 'student__first_name')
+        else:
+            # schoolyear selected but missing term/sequence -> do not display list
+            grades = None
+    else:
+        # no schoolyear selected: do not show list
+        grades = None
+    auto_open_edit = request.GET.get('open_edit') == '1'
+    # permission flag for template (teacher assigned to subject can manage)
+    can_manage = can_manage_class_subject(request.user, cs)
+    # admin/secretary check for edit rights on validated/locked grades
+    is_admin_sec = is_admin_or_secretary(request.user)
+    return render(request, 'Bull/classsubject_students.html', {
+        'cs': cs,
+        'students': students,
+        'schoolyears': schoolyears,
+        'terms': terms,
+        'sequences': sequences,
+        'selected_schoolyear': selected_schoolyear_id,
+        'selected_term': selected_term_id,
+        'selected_sequence': selected_sequence_id,
+        'selected_schoolyear_obj': selected_schoolyear_obj,
+        'selected_term_obj': selected_term_obj,
+        'selected_sequence_obj': selected_sequence_obj,
+        'grades': grades,
+    'auto_open_edit': auto_open_edit,
+    'can_manage': can_manage,
+    'is_admin_or_secretary': is_admin_sec,
+        'message': request.GET.get('success'),
+        'error_message': request.GET.get('error'),
+    })
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def generate_grades_view(request, cs_id):
+    from Bull.models import ClassSubject, Grade, Sequence
+    cs = ClassSubject.objects.select_related('classroom', 'subject').get(id=cs_id)
+    students = cs.classroom.students.all().order_by('last_name', 'first_name')
+    term_id = request.GET.get('term')
+    sequence_id = request.GET.get('sequence')
+    if not (term_id and sequence_id):
+        url = reverse('classsubject_students', args=[cs_id]) + '?error=Veuillez sélectionner le trimestre et la séquence.'
+        return redirect(url)
+    from Bull.models import Term
+    term = Term.objects.get(id=term_id)
+    sequence = Sequence.objects.get(id=sequence_id)
+    created_count = 0
+    updated_count = 0
+    ss_created = 0
+    error_details = []
+    from Bull.models import StudentSubject
+    for student in students:
+        # ensure StudentSubject exists
+        try:
+            ss, ss_new = StudentSubject.objects.get_or_create(
+                student=student,
+                subject=cs.subject,
+                defaults={'is_optional': False}
+            )
+            if ss_new:
+                ss_created += 1
+        except Exception as e:
+            error_details.append(f"StudentSubject {student.id}: {str(e)}")
+            # continue to try creating grades even if student-subject linkage fails
+        try:
+            obj, created = Grade.objects.get_or_create(
+                student=student,
+                class_subject=cs,
+                term=term,
+                sequence=sequence,
+                defaults={
+                    'value': 0.0,
+                    'status': 'draft',
+                    'created_by': request.user,
+                    'updated_by': request.user
+                }
+            )
+            if created:
+                created_count += 1
+            else:
+                obj.term = term
+                obj.sequence = sequence
+                obj.updated_by = request.user
+                obj.save()
+                updated_count += 1
+        except Exception as e:
+            error_details.append(f"Grade {student.id}: {str(e)}")
+    # Redirige avec tous les paramètres pour afficher la liste générée
+    params = f'?term={term_id}&sequence={sequence_id}'
+    if request.GET.get('schoolyear'):
+        params += f'&schoolyear={request.GET.get("schoolyear")}'
+    # If caller requested generate+fill, instruct the classsubject page to open edit mode
+    if request.GET.get('action') == 'generate_and_fill' or request.GET.get('action') == 'generate_and_edit':
+        params += '&open_edit=1'
+    if error_details:
+        params += f'&error=Erreur création notes: {'; '.join(error_details)}'
+    else:
+        params += f'&success={created_count} notes créées, {updated_count} notes mises à jour.'
+    url = reverse('classsubject_students', args=[cs_id]) + params
+    return redirect(url)
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def save_grades_view(request, cs_id):
+    from Bull.models import Grade
+    if request.method != 'POST':
+        return redirect('classsubject_students', cs_id=cs_id)
+    cs = ClassSubject.objects.get(id=cs_id)
+    sequence_id = request.POST.get('sequence')
+    term_id = request.POST.get('term')
+    saved = 0
+    skipped_locked = 0
+    skipped_validated = 0
+    errors = []
+    # expect inputs named grade_<id>
+    for key, val in request.POST.items():
+        if not key.startswith('grade_'):
+            continue
+        try:
+            gid = int(key.split('_', 1)[1])
+        except Exception:
+            continue
+        try:
+            grade = Grade.objects.get(id=gid, class_subject=cs)
+        except Grade.DoesNotExist:
+            errors.append(f"Grade {gid} introuvable")
+            continue
+        try:
+            # normalize empty to 0
+            if val is None or val == '':
+                num = 0.0
+            else:
+                num = float(val)
+            # skip if grade locked
+            if grade.status == 'locked':
+                skipped_locked += 1
+                continue
+            # skip if grade validated and user is not admin/secretary
+            if grade.status == 'validated' and not is_admin_or_secretary(request.user):
+                skipped_validated += 1
+                continue
+            # basic validation
+            if num < 0 or num > request.academic['scale_max']:
+                errors.append(f"Valeur invalide pour {grade.student}: {num}")
+                continue
+            grade.value = num
+            grade.updated_by = request.user
+            # keep status as draft; you can change to validated if desired
+            grade.save()
+            saved += 1
+        except Exception as e:
+            errors.append(f"Erreur sauvegarde grade {gid}: {str(e)}")
+    params = ''
+    if term_id:
+        params += f'?term={term_id}&sequence={sequence_id}'
+    if errors:
+        params += ('&' if params else '?') + 'error=' + '%20'.join(errors)
+    else:
+        msg = f'{saved} notes enregistrées'
+        if skipped_locked:
+            msg += f', {skipped_locked} notes verrouillées ignorées'
+        if skipped_validated:
+            msg += f', {skipped_validated} notes validées (modifiables seulement par admin/secrétariat) ignorées'
+        params += ('&' if params else '?') + f'success={msg}'
+    return redirect(reverse('classsubject_students', args=[cs_id]) + params)
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def validate_grades_view(request, cs_id):
+    from Bull.models import Grade
+    cs = ClassSubject.objects.get(id=cs_id)
+    term_id = request.GET.get('term')
+    sequence_id = request.GET.get('sequence')
+    if not (term_id and sequence_id):
+        return redirect(reverse('classsubject_students', args=[cs_id]) + '?error=Sélectionnez trimestre et séquence pour valider')
+    from Bull.models import Grade
+    grades = Grade.objects.filter(class_subject=cs, term_id=term_id, sequence_id=sequence_id)
+    # prevent validation if any student has value <= 0 or null -> require strict > 0
+    from django.db import models as djmodels
+    bad_exists = grades.filter(djmodels.Q(value__lte=0) | djmodels.Q(value__isnull=True)).exists()
+    if bad_exists:
+        return redirect(reverse('classsubject_students', args=[cs_id]) + f'?error=Impossible de valider: un ou plusieurs élèves ont une note nulle ou ≤ 0')
+    # mark as validated (do not lock) and record who validated
+    for grade in grades:
+        grade.status = 'validated'
+        grade.updated_by = request.user
+        grade.validated_by = request.user
+        grade.save()
+    updated = grades.count()
+    return redirect(reverse('classsubject_students', args=[cs_id]) + f'?success={updated} notes validées')
@@ -0,0 +1,362 @@
+# Vues : pages publiques, authentification, tableau de bord
+import os
+import re
+
+from django.template.loader import render_to_string
+from django.views.decorators.http import require_GET
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.shortcuts import render, redirect
+from django.http import HttpResponse, FileResponse, Http404
+from django.db import models
+from django.db.models import Count
+from django.contrib.auth import authenticate, login, logout
+from django.conf import settings
+from Bull.models import Classroom, Student, Subject, Teacher
+from Bull.services.demographics import school_demographics
+from Bull.services.overview import classroom_overview
+from Bull.services.permissions import is_admin_or_secretary
+
+
+# Pages publiques
+def home(request):
+    return render(request, 'Bull/home.html')
+
+# Service worker servi à la racine : sa portée couvre alors toute l'application
+def service_worker(request):
+    from Bull.storage import service_worker_context
+    response = HttpResponse(
+        render_to_string('Bull/service-worker.js', service_worker_context()),
+        content_type='application/javascript',
+    )
+    response['Service-Worker-Allowed'] = '/'
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+# Fichiers statiques du build (STATIC_ROOT), quand aucun serveur web ne s'en charge :
+# variante .br/.gz précompressée si le client l'accepte, cache d'un an pour les noms hachés
+HASHED_STATIC = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+
+@require_GET
+def static_asset(request, path):
+    import mimetypes
+    from django.core.exceptions import SuspiciousFileOperation
+    from django.utils._os import safe_join
+    from django.utils.cache import patch_vary_headers
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    content_type, _ = mimetypes.guess_type(full_path)
+    accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    encoding = None
+    for suffix, name in (('.br', 'br'), ('.gz', 'gzip')):
+        if name in accepted and os.path.isfile(full_path + suffix):
+            full_path, encoding = full_path + suffix, name
+            break
+    response = FileResponse(open(full_path, 'rb'), content_type=content_type or 'application/octet-stream')
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if HASHED_STATIC.search(path):
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = 'no-cache'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+def login_view(request):
+    if request.user.is_authenticated:
+        return redirect('profile')
+    error = False
+    if request.method == 'POST':
+        username = request.POST.get('username')
+        password = request.POST.get('password')
+        user = authenticate(request, username=username, password=password)
+        if user is not None:
+            login(request, user)
+            return redirect('profile')
+        else:
+            error = True
+    return render(request, 'Bull/login.html', {'form': {}, 'error': error})
+
+def logout_view(request):
+    logout(request)
+    return redirect('login')
+
+
+#-------------------------------------------------
+# fin AUTH et BASE
+#-------------------------------------------------
+
+
+# -----------------------------------------------------
+# Fonctions de dashboard et profil
+# ----------------------------------------------------
+
+
+@login_required
+def dashboard_view(request):
+    user_role = request.user.role
+    if user_role in ['admin', 'secretary']:
+        overview = classroom_overview()
+        nb_eleves = sum(stat['total_students'] for stat in overview)
+        nb_enseignants = Teacher.objects.count()
+        nb_classes = len(overview)
+        from Bull.models import User, SchoolYear, Term, Grade
+        roles_stats = User.objects.values('role').annotate(count=Count('id'))
+        academic = request.academic
+        school_year = academic['school_year']
+        trimestres = Term.objects.filter(school_year=school_year) if school_year else []
+
+        # Moyennes par classe/trimestre
+        moyennes_classes = []
+        if nb_classes > 0 and school_year:
+            for classroom in Classroom.objects.all():
+                for term in trimestres:
+                    students = classroom.students.all()
+                    total = 0
+                    count = 0
+                    for student in students:
+                        avg = Grade.calculate_term_average(student, term)
+                        if avg is not None:
+                            total += avg
+                            count += 1
+                    moyenne = round(total / count, 2) if count > 0 else None
+                    moyennes_classes.append({
+                        'class': classroom.name,
+                        'term': term.name,
+                        'average': moyenne
+                    })
+
+        # Taux de réussite global et nombre d'élèves ayant réussi/échoué
+        total_students = Student.objects.count()
+        nb_reussite = 0
+        nb_echec = 0
+        if school_year:
+            for student in Student.objects.all():
+                avg = Grade.calculate_annual_average(student, school_year)
+                if avg is not None:
+                    if avg >= academic['pass_mark']:
+                        nb_reussite += 1
+                    else:
+                        nb_echec += 1
+        taux_reussite = round((nb_reussite / total_students) * 100, 2) if total_students > 0 else None
+
+        # Évolution des performances
+        evolution = []
+        for sy in SchoolYear.objects.all():
+            total = 0
+            count = 0
+            for student in Student.objects.all():
+                avg = Grade.calculate_annual_average(student, sy)
+                if avg is not None:
+                    total += avg
+                    count += 1
+            evolution.append({
+                'year': sy.name,
+                'average': round(total / count, 2) if count > 0 else None
+            })
+
+        # État de la BD
+        from django.db import connection
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'")
+            nb_tables = cursor.fetchone()[0]
+
+        # 1. Nombre total de bulletins générés (toutes classes, toutes séquences)
+        total_bulletins = sum(stat['bulletins_count'] for stat in overview)
+
+        # 2. Stats min/max par matière (notes > 0.1 uniquement)
+        matiere_stats = []
+        for subject in Subject.objects.all():
+            grades = Grade.objects.filter(class_subject__subject=subject, value__gt=0.1)
+            if grades.exists():
+                min_note = grades.aggregate(models.Min('value'))['value__min']
+                max_note = grades.aggregate(models.Max('value'))['value__max']
+                matiere_stats.append({
+                    'subject': subject.name,
+                    'min': min_note,
+                    'max': max_note,
+                })
+
+        # 3. Moyenne générale par classe
+        moyennes_par_classe = []
+        for classroom in Classroom.objects.all():
+            students = classroom.students.all()
+            total = 0
+            count = 0
+            for student in students:
+                avg = Grade.objects.filter(student=student, status='validated').aggregate(models.Avg('value'))['value__avg']
+                if avg is not None:
+                    total += avg
+                    count += 1
+            moyenne = round(total / count, 2) if count > 0 else None
+            moyennes_par_classe.append({'class': classroom.name, 'average': moyenne})
+
+        # 4. Taille du dossier des bulletins générés
+        bulletins_dir = os.path.join(settings.MEDIA_ROOT, 'bulletins')
+        disk_usage = 0
+        if os.path.exists(bulletins_dir):
+            for root, dirs, files in os.walk(bulletins_dir):
+                for f in files:
+                    disk_usage += os.path.getsize(os.path.join(root, f))
+
+        # 5. Idée bonus : nombre d'élèves ayant au moins un bulletin généré
+        eleves_avec_bulletin = Student.objects.filter(bulletins__isnull=False).distinct().count()
+
+        # Paramètres de l'application : même objet que l'année active ci-dessus
+        active_schoolyear = school_year
+
+        context = {
+            'nb_eleves': nb_eleves,
+            'nb_enseignants': nb_enseignants,
+            'nb_classes': nb_classes,
+            'roles_stats': roles_stats,
+            'school_year': school_year,
+            'trimestres': trimestres,
+            'moyennes_classes': moyennes_classes,
+            'taux_reussite': taux_reussite,
+            'nb_reussite': nb_reussite,
+            'nb_echec': nb_echec,
+            'evolution': evolution,
+            'nb_tables': nb_tables,
+            'disk_usage': disk_usage,
+            'active_schoolyear': active_schoolyear,
+            'dashboard_title': 'Tableau de bord Administrateur/Secrétariat',
+            'total_bulletins': total_bulletins,
+            'matiere_stats': matiere_stats,
+            'moyennes_par_classe': moyennes_par_classe,
+            'eleves_avec_bulletin': eleves_avec_bulletin,
+            'classroom_overview': overview,
+            'demographics': school_demographics(),
+        }
+        return render(request, 'Bull/dashboard.html', context)
+
+    context = {}
+    if user_role in ['admin', 'secretary']:
+        nb_eleves = Student.objects.count()
+        nb_enseignants = Teacher.objects.count()
+        nb_classes = Classroom.objects.count()
+        from Bull.models import User, SchoolYear, Term, Grade
+        roles_stats = User.objects.values('role').annotate(count=Count('id'))
+        school_year = SchoolYear.objects.filter(is_active=True).first()
+        trimestres = Term.objects.filter(school_year=school_year) if school_year else []
+
+        # Moyennes par classe/trimestre
+        moyennes_classes = []
+        if nb_classes > 0 and school_year:
+            for classroom in Classroom.objects.all():
+                for term in trimestres:
+                    students = classroom.students.all()
+                    total = 0
+                    count = 0
+                    for student in students:
+                        avg = Grade.calculate_term_average(student, term)
+                        if avg is not None:
+                            total += avg
+                            count += 1
+                    moyenne = round(total / count, 2) if count > 0 else None
+                    moyennes_classes.append({
+                        'class': classroom.name,
+                        'term': term.name,
+                        'average': moyenne
+                    })
+
+        # Taux de réussite global
+        total_students = Student.objects.count()
+        reussite = 0
+        if school_year:
+            for student in Student.objects.all():
+                avg = Grade.calculate_annual_average(student, school_year)
+                if avg is not None and avg >= 10:
+                    reussite += 1
+        taux_reussite = round((reussite / total_students) * 100, 2) if total_students > 0 else None
+
+        # Évolution des performances
+        evolution = []
+        for sy in SchoolYear.objects.all():
+            total = 0
+            count = 0
+            for student in Student.objects.all():
+                avg = Grade.calculate_annual_average(student, sy)
+                if avg is not None:
+                    total += avg
+                    count += 1
+            evolution.append({
+                'year': sy.name,
+                'average': round(total / count, 2) if count > 0 else None
+            })
+
+        # État de la BD
+        from django.db import connection
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'")
+            nb_tables = cursor.fetchone()[0]
+
+        # Espace disque utilisé pour les bulletins
+        
+        bulletins_dir = os.path.join(os.path.dirname(__file__), '../bulletins')
+        disk_usage = 0
+        if os.path.exists(bulletins_dir):
+            for root, dirs, files in os.walk(bulletins_dir):
+                for f in files:
+                    disk_usage += os.path.getsize(os.path.join(root, f))
+
+        # Paramètres de l'application
+        active_schoolyear = SchoolYear.objects.filter(is_active=True).first()
+
+        context = {
+            'nb_eleves': nb_eleves,
+            'nb_enseignants': nb_enseignants,
+            'nb_classes': nb_classes,
+            'roles_stats': roles_stats,
+            'school_year': school_year,
+            'trimestres': trimestres,
+            'moyennes_classes': moyennes_classes,
+            'taux_reussite': taux_reussite,
+            'evolution': evolution,
+            'nb_tables': nb_tables,
+            'disk_usage': disk_usage,
+            'active_schoolyear': active_schoolyear,
+            'dashboard_title': 'Tableau de bord Administrateur/Secrétariat',
+            'total_bulletins': total_bulletins,
+            'matiere_stats': matiere_stats,
+            'moyennes_par_classe': moyennes_par_classe,
+            'eleves_avec_bulletin': eleves_avec_bulletin,
+            'classroom_overview': overview,
+            'demographics': school_demographics(),
+        }
+        return render(request, 'Bull/dashboard.html', context)
+    # Pour les autres rôles, tu peux ajouter la logique ici
+    return render(request, 'Bull/dashboard.html', {'dashboard_title': 'Tableau de bord', 'message': 'Dashboard personnalisé à venir.'})
+
+
+@login_required
+def profile_view(request):
+    return render(request, 'Bull/profile.html')
+
+
+# ---------------------------------------------
+# Fonctions diverses
+# ---------------------------------------------
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def users_view(request):
+    return render(request, 'Bull/users.html')
+
+@login_required
+@user_passes_test(lambda u: u.role in ['teacher', 'admin', 'secretary'])
+def grades_view(request):
+    return render(request, 'Bull/grades.html')
+
+@login_required
+@user_passes_test(lambda u: u.role in ['teacher', 'admin', 'secretary'])
+def bulletins_view(request):
+    return render(request, 'Bull/bulletins.html')
+
+@login_required
+@user_passes_test(lambda u: u.role in ['parent', 'student', 'admin', 'secretary'])
+def my_bulletin_view(request):
+    return render(request, 'Bull/my_bulletin.html')
@@ -0,0 +1,308 @@
+# Vues de paramétrage (années, trimestres, séquences, sanctions, canevas, performances)
+from django.template.loader import render_to_string
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST, require_GET
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse
+from Bull.models import BulletinTemplate, SchoolYear, Term, Sequence, Sanction
+from Bull.forms import BulletinTemplateForm
+from Bull.services import telemetry, versions
+from Bull.services.permissions import is_admin_or_secretary
+from Bull.responses import versioned_cache
+from Bull.pagination import KeysetPaginator
+
+
+# Vue édition canevas HTML bulletin
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def edit_html_canvas(request):
+    from Bull.models import BulletinTemplate
+    template = BulletinTemplate.objects.filter(active=True).first()
+    from Bull.forms import BulletinTemplateForm
+    if not template:
+        template = BulletinTemplate.objects.create(name="Canevas HTML", school_year=None, active=True)
+    if request.method == 'POST':
+        form = BulletinTemplateForm(request.POST, request.FILES, instance=template)
+        if form.is_valid():
+            form.save()
+            return redirect('parameters')
+    else:
+        form = BulletinTemplateForm(instance=template)
+    return render(request, 'Bull/edit_html_canvas.html', {'form': form, 'template': template})
+
+
+# -----------------------------------------------
+# gestion des séquences/trimestres
+# -----------------------------------------------
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def add_sequence_view(request):
+    from Bull.models import Term, Sequence
+    terms = Term.objects.select_related('school_year').all()
+    if request.method == 'POST':
+        term_id = request.POST.get('term')
+        name = request.POST.get('name')
+        order = request.POST.get('order')
+        weight = request.POST.get('weight')
+        if term_id and name and order:
+            term = Term.objects.get(id=term_id)
+            Sequence.objects.create(term=term, name=name, order=order, weight=weight or 1)
+            return redirect('dashboard')
+        else:
+            return render(request, 'Bull/add_sequence.html', {'terms': terms, 'error': 'Veuillez remplir tous les champs.'})
+    return render(request, 'Bull/add_sequence.html', {'terms': terms})
+
+
+# ---------------------------------------------
+# Fonctions sanctions
+# ---------------------------------------------
+@require_GET
+@versioned_cache(Sanction)
+def sanctions_table(request):
+    sanctions = Sanction.objects.all().order_by('min_heures_absence')
+    html = render_to_string('Bull/_sanctions_table.html', {'sanctions': sanctions})
+    return JsonResponse({'html': html})
+
+@csrf_exempt
+def add_sanction(request):
+    if request.method == 'POST':
+        from Bull.models import Sanction
+        texte = request.POST.get('texte')
+        min_heures_absence = request.POST.get('min_heures_absence')
+        if not texte or not min_heures_absence:
+            return JsonResponse({'success': False, 'message': "Champs requis manquants."}, status=400)
+        if Sanction.objects.filter(min_heures_absence=min_heures_absence).exists():
+            return JsonResponse({'success': False, 'message': "Une sanction avec ce nombre d'heures existe déjà !"}, status=400)
+        sanction = Sanction.objects.create(texte=texte, min_heures_absence=min_heures_absence)
+        return JsonResponse({'success': True, 'message': "Sanction bien ajoutée !", 'sanction': {'id': sanction.id, 'texte': sanction.texte, 'min_heures_absence': sanction.min_heures_absence}})
+    return JsonResponse({'success': False, 'message': 'Requête invalide.'}, status=400)
+
+@csrf_exempt
+def edit_sanction(request):
+    if request.method == 'POST':
+        from Bull.models import Sanction
+        sanction_id = request.POST.get('id')
+        texte = request.POST.get('texte')
+        min_heures_absence = request.POST.get('min_heures_absence')
+        if not texte or not min_heures_absence or not sanction_id:
+            return JsonResponse({'success': False, 'message': "Champs requis manquants."}, status=400)
+        try:
+            sanction = Sanction.objects.get(id=sanction_id)
+        except Sanction.DoesNotExist:
+            return JsonResponse({'success': False, 'message': "Sanction introuvable."}, status=404)
+        if Sanction.objects.filter(min_heures_absence=min_heures_absence).exclude(id=sanction_id).exists():
+            return JsonResponse({'success': False, 'message': "Une sanction avec ce nombre d'heures existe déjà !"}, status=400)
+        sanction.texte = texte
+        sanction.min_heures_absence = min_heures_absence
+        sanction.save()
+        return JsonResponse({'success': True, 'message': "Sanction bien modifiée !", 'sanction': {'id': sanction.id, 'texte': sanction.texte, 'min_heures_absence': sanction.min_heures_absence}})
+    return JsonResponse({'success': False, 'message': 'Requête invalide.'}, status=400)
+
+@csrf_exempt
+def delete_sanction(request):
+    if request.method == 'POST':
+        from Bull.models import Sanction
+        sanction_id = request.GET.get('id')
+        if not sanction_id:
+            return JsonResponse({'success': False, 'message': "ID manquant."}, status=400)
+        try:
+            sanction = Sanction.objects.get(id=sanction_id)
+            sanction.delete()
+            return JsonResponse({'success': True, 'message': "Sanction supprimée !"})
+        except Sanction.DoesNotExist:
+            return JsonResponse({'success': False, 'message': "Sanction introuvable."}, status=404)
+    return JsonResponse({'success': False, 'message': 'Requête invalide.'}, status=400)
+
+
+# Onglet paramètres : gestion des années, trimestres, séquences
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def parameters_view(request):
+    # La page elle-même n'est pas mise en cache (jeton CSRF, messages) : seules ses données le sont
+    schoolyears, sanctions = versions.cached(
+        'parameters', (SchoolYear, Term, Sequence, BulletinTemplate, Sanction),
+        lambda: (
+            list(SchoolYear.objects.prefetch_related('terms__sequences', 'bulletin_templates').order_by('-name')),
+            list(Sanction.objects.order_by('min_heures_absence')),
+        ),
+    )
+    return render(request, 'Bull/parameters.html', {'schoolyears': schoolyears, 'sanctions': sanctions})
+
+# Actions pour créer, modifier, supprimer, activer
+@login_required
+@user_passes_test(is_admin_or_secretary)
+@require_POST
+def set_active_schoolyear(request, sy_id):
+    # Une année clôturée est archivée : elle ne redevient pas l'année de saisie
+    if not SchoolYear.objects.filter(id=sy_id, is_closed=False).exists():
+        return redirect('parameters')
+    SchoolYear.objects.update(is_active=False)
+    SchoolYear.objects.filter(id=sy_id).update(is_active=True)
+    versions.bump(SchoolYear)
+    return redirect('parameters')
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+@require_POST
+def set_active_sequence(request, seq_id):
+    Sequence.objects.update(active=False)
+    Sequence.objects.filter(id=seq_id).update(active=True)
+    versions.bump(Sequence)
+    return redirect('parameters')
+
+# Les vues add/edit/delete pour SchoolYear, Term, Sequence sont à ajouter si non présentes
+# Vue édition année scolaire
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def edit_schoolyear(request, sy_id):
+    from Bull.models import SchoolYear
+    schoolyear = SchoolYear.objects.get(id=sy_id)
+    if request.method == 'POST':
+        name = request.POST.get('name')
+        if name:
+            schoolyear.name = name
+            schoolyear.save()
+            return redirect('parameters')
+    return render(request, 'Bull/edit_schoolyear.html', {'schoolyear': schoolyear})
+
+
+# Vue suppression année scolaire
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def delete_schoolyear(request, sy_id):
+    from Bull.models import SchoolYear
+    schoolyear = SchoolYear.objects.get(id=sy_id)
+    if request.method == 'POST':
+        schoolyear.delete()
+        return redirect('parameters')
+    return render(request, 'Bull/delete_schoolyear.html', {'schoolyear': schoolyear})
+
+
+# Vue création année scolaire
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def add_schoolyear(request):
+    from Bull.models import SchoolYear
+    if request.method == 'POST':
+        name = request.POST.get('name')
+        if name:
+            SchoolYear.objects.create(name=name, is_active=False)
+            return redirect('parameters')
+    return render(request, 'Bull/add_schoolyear.html')
+
+
+# Vue création trimestre
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def add_term(request):
+    from Bull.models import SchoolYear, Term
+    schoolyear_id = request.GET.get('schoolyear')
+    schoolyear = SchoolYear.objects.get(id=schoolyear_id) if schoolyear_id else None
+    if request.method == 'POST':
+        name = request.POST.get('name')
+        if name and schoolyear:
+            Term.objects.create(name=name, school_year=schoolyear)
+            return redirect('parameters')
+    return render(request, 'Bull/add_term.html', {'schoolyear': schoolyear})
+
+# Vue édition trimestre
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def edit_term(request, term_id):
+    from Bull.models import Term
+    term = Term.objects.get(id=term_id)
+    if request.method == 'POST':
+        name = request.POST.get('name')
+        if name:
+            term.name = name
+            term.save()
+            return redirect('parameters')
+    return render(request, 'Bull/edit_term.html', {'term': term})
+
+# Vue suppression trimestre
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def delete_term(request, term_id):
+    from Bull.models import Term
+    term = Term.objects.get(id=term_id)
+    if request.method == 'POST':
+        term.delete()
+        return redirect('parameters')
+    return render(request, 'Bull/delete_term.html', {'term': term})
+
+# Vue édition séquence
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def edit_sequence(request, seq_id):
+    from Bull.models import Sequence
+    seq = Sequence.objects.get(id=seq_id)
+    if request.method == 'POST':
+        name = request.POST.get('name')
+        if name:
+            seq.name = name
+            seq.save()
+            return redirect('parameters')
+    return render(request, 'Bull/edit_sequence.html', {'sequence': seq})
+
+# Vue suppression séquence
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def delete_sequence(request, seq_id):
+    from Bull.models import Sequence
+    seq = Sequence.objects.get(id=seq_id)
+    if request.method == 'POST':
+        seq.delete()
+        return redirect('parameters')
+    return render(request, 'Bull/delete_sequence.html', {'sequence': seq})
+
+
+# -------------------------------------------
+# vue pour les templates 
+# --------------------------------------------
+@staff_member_required
+def bulletin_template_list(request):
+    page = KeysetPaginator(BulletinTemplate.objects.select_related('school_year'), ('-created_at',)).get_page(
+        request.GET.get('cursor'))
+    return render(request, 'Bull/bulletin_template_list.html', {'templates': page, 'page': page})
+
+@staff_member_required
+def bulletin_template_create(request):
+    if request.method == 'POST':
+        form = BulletinTemplateForm(request.POST, request.FILES)
+        if form.is_valid():
+            form.save()
+            return redirect('bulletin_template_list')
+    else:
+        form = BulletinTemplateForm()
+    return render(request, 'Bull/bulletin_template_form.html', {'form': form})
+
+@staff_member_required
+def bulletin_template_edit(request, template_id):
+    template = get_object_or_404(BulletinTemplate, id=template_id)
+    if request.method == 'POST':
+        form = BulletinTemplateForm(request.POST, request.FILES, instance=template)
+        if form.is_valid():
+            form.save()
+            return redirect('bulletin_template_list')
+    else:
+        form = BulletinTemplateForm(instance=template)
+    return render(request, 'Bull/bulletin_template_form.html', {'form': form, 'template': template})
+
+
+# Performances : endpoints les plus lents et pires N+1 des dernières requêtes
+@login_required
+@user_passes_test(lambda u: u.role == 'admin')
+def request_stats_view(request):
+    if request.method == 'POST':
+        telemetry.clear()
+        return redirect('request_stats')
+    summary = telemetry.summarize(telemetry.recent(), limit=int(request.GET.get('limit', 20)))
+    return render(request, 'Bull/request_stats.html', {
+        'summary': summary,
+        'buffer_size': telemetry.buffer_size(),
+        'threshold': telemetry.DUPLICATE_THRESHOLD,
+    })
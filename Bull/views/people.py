@@ -0,0 +1,369 @@
+# Vues des classes, enseignants et élèves
+from django.views.decorators.http import require_POST
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib import messages
+from django import forms
+from Bull.models import Classroom, Discipline, Sequence, Student, ClassSubject, Teacher, Term
+from Bull.forms import ImportStudentsForm
+from Bull.services.demographics import classroom_demographics
+from Bull.services.overview import classroom_overview
+from Bull.services import sanctions
+from Bull.services import search as student_search
+from Bull.services.permissions import is_admin_or_secretary
+from Bull.responses import compact_json_response
+from Bull.pagination import KeysetPaginator
+from zipfile import BadZipFile
+
+
+# --------------------------------------------------
+#    GESTIONS DES CLASSE
+# ---------------------------------------------------
+
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def classes_view(request):
+    page = KeysetPaginator(Classroom.objects.select_related('head_teacher__user'), ('name',)).get_page(
+        request.GET.get('cursor'))
+    overview = {stat['id']: stat for stat in classroom_overview()}
+    for c in page:
+        c.stats = overview.get(c.id)
+    return render(request, 'Bull/classes.html', {'classes': page, 'page': page})
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def class_add_view(request):
+    from .models import Teacher
+    teachers = Teacher.objects.select_related('user').all()
+    if request.method == 'POST':
+        name = request.POST.get('name')
+        level = request.POST.get('level')
+        series = request.POST.get('series')
+        option = request.POST.get('option')
+        head_teacher_id = request.POST.get('head_teacher')
+        if name and level and option:
+            if Classroom.objects.filter(name=name, level=level, option=option).exists():
+                messages.error(request, "Cette classe existe déjà.")
+            else:
+                head_teacher = Teacher.objects.filter(id=head_teacher_id).first() if head_teacher_id else None
+                Classroom.objects.create(
+                    name=name,
+                    level=level,
+                    series=series,
+                    option=option,
+                    head_teacher=head_teacher
+                )
+                messages.success(request, "Classe ajoutée avec succès.")
+                return redirect('classes')
+        else:
+            messages.error(request, "Veuillez remplir tous les champs obligatoires.")
+    return render(request, 'Bull/class_add.html', {'teachers': teachers})
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def class_detail_view(request, class_id):
+    classroom = get_object_or_404(Classroom, id=class_id)
+    stats = classroom_demographics([classroom.id])[classroom.id]
+    return render(request, 'Bull/class_detail.html', {'classroom': classroom, 'stats': stats})
+
+class ClassroomForm(forms.ModelForm):
+    class Meta:
+        model = Classroom
+        fields = ['name', 'level', 'series', 'head_teacher']
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def class_edit_view(request, class_id):
+    classroom = Classroom.objects.get(id=class_id)
+    if request.method == 'POST':
+        form = ClassroomForm(request.POST, instance=classroom)
+        if form.is_valid():
+            form.save()
+            return redirect('classes')
+    else:
+        form = ClassroomForm(instance=classroom)
+    return render(request, 'Bull/class_edit.html', {'form': form, 'classroom': classroom})
+
+
+# ------------------------------------
+#   GESTIONS DES ENSEIGNANTS
+# -------------------------------------
+
+@login_required
+def teachers_list_view(request):
+    page = KeysetPaginator(
+        Teacher.objects.select_related('user'), ('user__last_name', 'user__first_name'),
+    ).get_page(request.GET.get('cursor'))
+    return render(request, 'Bull/teachers_list.html', {'teachers': page, 'page': page})
+
+@login_required
+def add_teacher_view(request):
+    from Bull.forms import UserForm, TeacherForm, TeacherClassSubjectForm
+    user_form = UserForm(request.POST or None)
+    teacher_form = TeacherForm(request.POST or None)
+    class_subject_form = TeacherClassSubjectForm(request.POST or None)
+    created_teacher = None
+    if request.method == 'POST':
+        valid = user_form.is_valid() and teacher_form.is_valid()
+        if valid:
+            user = user_form.save(commit=False)
+            user.role = 'teacher'
+            password = user_form.cleaned_data.get('password')
+            if password:
+                user.set_password(password)
+            user.save()
+            teacher = teacher_form.save(commit=False)
+            teacher.user = user
+            teacher.save()
+            created_teacher = teacher
+        if 'add_class_subject' in request.POST and class_subject_form.is_valid() and created_teacher:
+            classroom = class_subject_form.cleaned_data['classroom']
+            subject = class_subject_form.cleaned_data['subject']
+            from Bull.models import ClassSubject
+            class_subject = ClassSubject.objects.filter(classroom=classroom, subject=subject).first()
+            if class_subject:
+                class_subject.teacher = created_teacher
+                class_subject.save()
+            return redirect('edit_teacher', teacher_id=created_teacher.id)
+        if valid:
+            return redirect('/teachers/')
+    return render(request, 'Bull/add_teacher.html', {
+        'user_form': user_form,
+        'teacher_form': teacher_form,
+        'class_subject_form': class_subject_form,
+        'class_subjects': []
+    })
+
+@login_required
+def edit_teacher_view(request, teacher_id):
+    teacher = get_object_or_404(Teacher, id=teacher_id)
+    user = teacher.user
+    from Bull.forms import UserForm, TeacherForm, TeacherClassSubjectForm
+    user_form = UserForm(request.POST or None, instance=user)
+    teacher_form = TeacherForm(request.POST or None, instance=teacher)
+    class_subject_form = TeacherClassSubjectForm(request.POST or None, teacher=teacher)
+    if request.method == 'POST':
+        valid = user_form.is_valid() and teacher_form.is_valid()
+        if 'add_class_subject' in request.POST and class_subject_form.is_valid():
+            classroom = class_subject_form.cleaned_data['classroom']
+            subject = class_subject_form.cleaned_data['subject']
+            from Bull.models import ClassSubject
+            class_subject = ClassSubject.objects.filter(classroom=classroom, subject=subject).first()
+            if class_subject:
+                class_subject.teacher = teacher
+                class_subject.save()
+            return redirect('edit_teacher', teacher_id=teacher.id)
+        elif valid:
+            user_form.save()
+            teacher_form.save()
+            return redirect('/teachers/')
+    return render(request, 'Bull/edit_teacher.html', {
+        'user_form': user_form,
+        'teacher_form': teacher_form,
+        'class_subject_form': class_subject_form,
+        'teacher': teacher,
+        'class_subjects': teacher.classsubject_set.all()
+    })
+
+@login_required
+def delete_teacher_view(request, teacher_id):
+    teacher = get_object_or_404(Teacher, id=teacher_id)
+    if request.method == 'POST':
+        teacher.delete()
+        return redirect('/teachers/')
+    return render(request, 'Bull/confirm_delete_teacher.html', {'teacher': teacher})
+
+@login_required
+def teacher_detail_view(request, teacher_id):
+    teacher = get_object_or_404(Teacher, id=teacher_id)
+    # Récupère toutes les matières + classes associées à cet enseignant
+    class_subjects = ClassSubject.objects.filter(teacher=teacher).select_related('classroom', 'subject')
+    return render(request, 'Bull/teacher_detail.html', {
+        'teacher': teacher,
+        'class_subjects': class_subjects
+    })
+
+@login_required
+@require_POST
+def unlink_class_subject_teacher(request, teacher_id, classsubject_id):
+    teacher = get_object_or_404(Teacher, id=teacher_id)
+    class_subject = get_object_or_404(ClassSubject, id=classsubject_id, teacher=teacher)
+    class_subject.teacher = None
+    class_subject.save()
+    return redirect('edit_teacher', teacher_id=teacher.id)
+
+
+# ------------------------------------
+#   GESTIONS DES ELEVES
+# -------------------------------------
+
+class StudentForm(forms.ModelForm):
+    class Meta:
+        model = Student
+        fields = ['matricule', 'first_name', 'last_name', 'gender', 'birth_date', 'birth_place', 'classroom', 'photo']
+
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def students_view(request):
+    from django.core.paginator import Paginator
+    classes = Classroom.objects.all()
+    selected_class = request.GET.get('class')
+    search = request.GET.get('search', '').strip()
+    if search:
+        # Index plein texte : préfixes de mots, sans accents, classés par pertinence
+        # (le rang bm25 n'est pas une clé indexée : pagination par numéro de page)
+        students = student_search.search_students(search, selected_class or None)
+        page = Paginator(students, 50).get_page(request.GET.get('page'))
+    else:
+        students = Student.objects.select_related('classroom')
+        if selected_class:
+            students = students.filter(classroom__id=selected_class)
+        page = KeysetPaginator(students, ('last_name', 'first_name')).get_page(request.GET.get('cursor'))
+    return render(request, 'Bull/students.html', {
+        'students': page,
+        'page': page,
+        'classes': classes,
+        'selected_class': selected_class,
+        'search': search
+    })
+
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def students_autocomplete(request):
+    query = request.GET.get('q', '').strip()
+    return compact_json_response(request, {'results': student_search.autocomplete(query) if query else []})
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def student_detail_view(request, student_id):
+    student = Student.objects.get(id=student_id)
+    disciplines = student.disciplines.select_related('term').all()
+    return render(request, 'Bull/student_detail.html', {'student': student, 'disciplines': disciplines})
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def discipline_entry_view(request):
+    """Saisie des absences et retards de toute une classe pour un trimestre (ou une séquence)."""
+    params = request.POST if request.method == 'POST' else request.GET
+    # Identifiants non numériques : traités comme absents
+    ids = {name: int(params[name]) if params.get(name, '').isdigit() else None
+           for name in ('classroom', 'term', 'sequence')}
+    classroom = Classroom.objects.filter(id=ids['classroom']).first() if ids['classroom'] else None
+    term = (Term.objects.filter(id=ids['term']).first() if ids['term'] else None) or request.academic['term']
+    sequence = Sequence.objects.filter(id=ids['sequence'], term=term).first() if ids['sequence'] else None
+    students = list(classroom.students.order_by('last_name', 'first_name')) if classroom and term else []
+
+    if request.method == 'POST' and students:
+        results = sanctions.record_absences([{
+            'student': student.id, 'term': term.id, 'sequence': sequence.id if sequence else None,
+            'absences': request.POST.get(f'absences_{student.id}') or 0,
+            'lates': request.POST.get(f'lates_{student.id}') or 0,
+        } for student in students])
+        errors = [r for r in results if r['status'] == 'error']
+        if errors:
+            messages.error(request, f"{len(errors)} ligne(s) refusée(s) : {errors[0]['error']}")
+        if len(results) > len(errors):
+            messages.success(request, f"{len(results) - len(errors)} fiches de discipline enregistrées.")
+        query = f"?classroom={classroom.id}&term={term.id}" + (f"&sequence={sequence.id}" if sequence else '')
+        return redirect(request.path + query)
+
+    existing = {}
+    if students:
+        for discipline in Discipline.objects.filter(
+            student__in=students, term=term, sequence=sequence,
+        ).select_related('sanction').order_by('id'):
+            existing.setdefault(discipline.student_id, discipline)
+    return render(request, 'Bull/discipline_entry.html', {
+        'classrooms': Classroom.objects.order_by('name'),
+        'terms': Term.objects.select_related('school_year').filter(school_year__is_closed=False).order_by('-school_year__name', 'order'),
+        'sequences': term.sequences.order_by('order') if term else [],
+        'classroom': classroom, 'term': term, 'sequence': sequence,
+        'rows': [(student, existing.get(student.id)) for student in students],
+    })
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def student_edit_view(request, student_id):
+    student = Student.objects.get(id=student_id)
+    if request.method == 'POST':
+        form = StudentForm(request.POST, request.FILES, instance=student)
+        if form.is_valid():
+            form.save()
+            return redirect('student_detail', student_id=student.id)
+    else:
+        form = StudentForm(instance=student)
+    return render(request, 'Bull/student_edit.html', {'form': form, 'student': student})
+
+@login_required
+def add_student_view(request):
+    if request.method == 'POST':
+        form = StudentForm(request.POST, request.FILES)
+        if form.is_valid():
+            form.save()
+            return redirect('/students/')
+    else:
+        form = StudentForm()
+    return render(request, 'Bull/add_student.html', {'form': form})
+
+@login_required
+def import_students_view(request):
+    if request.method == 'POST':
+        form = ImportStudentsForm(request.POST, request.FILES)
+        if form.is_valid():
+            excel_file = request.FILES['excel_file']
+            errors = []
+            try:
+                import openpyxl
+                wb = openpyxl.load_workbook(excel_file)
+                ws = wb.active
+                for i, row in enumerate(ws.iter_rows(min_row=2, values_only=True)):
+                    try:
+                        matricule, last_name, first_name, gender, birth_date, birth_place, photo, class_name, redouble = row
+                        classroom = Classroom.objects.filter(name=class_name).first()
+                        if not classroom:
+                            errors.append(f"Ligne {i+2}: Classe '{class_name}' introuvable.")
+                            continue
+                        student = Student(
+                            matricule=matricule,
+                            last_name=last_name,
+                            first_name=first_name,
+                            gender=gender,
+                            birth_date=birth_date,
+                            birth_place=birth_place,
+                            classroom=classroom,
+                            repeater=(str(redouble).lower() == 'oui')
+                        )
+                        student.save()
+                    except Exception as e:
+                        errors.append(f"Ligne {i+2}: {str(e)}")
+            except BadZipFile:
+                errors.append("Le fichier n'est pas un vrai fichier Excel (.xlsx). Veuillez vérifier le format.")
+            except Exception as e:
+                errors.append(f"Erreur lors de l'import : {str(e)}")
+            if errors:
+                return render(request, 'Bull/students.html', {'import_errors': errors})
+            return redirect('/students/')
+    else:
+        form = ImportStudentsForm()
+    return render(request, 'Bull/students.html', {'form': form})
+
+
+@login_required
+def delete_student_view(request, student_id):
+    student = get_object_or_404(Student, id=student_id)
+    if request.method == 'POST':
+        student.delete()
+        return redirect('/students/')
+    # Optionnel : afficher une page de confirmation personnalisée
+    return redirect(f'/students/{student_id}/')
+
+@login_required
+def delete_student_view(request, student_id):
+    student = get_object_or_404(Student, id=student_id)
+    if request.method == 'POST':
+        student.delete()
+        return redirect('/students/')
+    return render(request, 'Bull/confirm_delete_student.html', {'student': student})
@@ -0,0 +1,264 @@
+# Vues des matières et des associations classe–matière
+from django.views.decorators.http import require_GET
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.shortcuts import render, redirect
+from django.http import JsonResponse
+from django.db import models
+from django.contrib import messages
+from Bull.models import Classroom, Subject, ClassSubject, Teacher
+from Bull.services.demographics import FIELDS as DEMOGRAPHIC_FIELDS, classroom_demographics
+from Bull.services.permissions import is_admin_or_secretary
+from Bull.responses import versioned_cache
+from Bull.pagination import KeysetPaginator
+
+
+# ---------------------------------------------
+#     GESTIONS DE MATIERES
+# ---------------------------------------------
+
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def subjects_view(request):
+    page = KeysetPaginator(Subject.objects.all(), ('name',)).get_page(request.GET.get('cursor'))
+    return render(request, 'Bull/subjects.html', {'subjects': page, 'page': page})
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def subject_add_view(request):
+    from Bull.models import Subject
+    if request.method == 'POST':
+        code = request.POST.get('code')
+        name = request.POST.get('name')
+        category = request.POST.get('category')
+        if code and name and category:
+            if Subject.objects.filter(code=code).exists():
+                messages.error(request, "Ce code existe déjà.")
+            else:
+                Subject.objects.create(code=code, name=name, category=category)
+                messages.success(request, "Matière ajoutée avec succès.")
+                return redirect('subjects')
+        else:
+            messages.error(request, "Veuillez remplir tous les champs.")
+    return render(request, 'Bull/subject_add.html')
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def subject_edit_view(request, subject_id):
+    from Bull.models import Subject
+    subject = Subject.objects.get(id=subject_id)
+    if request.method == 'POST':
+        code = request.POST.get('code')
+        name = request.POST.get('name')
+        category = request.POST.get('category')
+        if code and name and category:
+            if Subject.objects.filter(code=code).exclude(id=subject_id).exists():
+                messages.error(request, "Ce code existe déjà.")
+            else:
+                subject.code = code
+                subject.name = name
+                subject.category = category
+                subject.save()
+                messages.success(request, "Matière modifiée avec succès.")
+                return redirect('subjects')
+        else:
+            messages.error(request, "Veuillez remplir tous les champs.")
+    return render(request, 'Bull/subject_edit.html', {'subject': subject})
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def subject_detail_view(request, subject_id):
+    from Bull.models import Subject, ClassSubject, Classroom, Teacher
+    subject = Subject.objects.get(id=subject_id)
+    classrooms = Classroom.objects.all()
+    teachers = Teacher.objects.select_related('user').all()
+
+    # Filtrage et recherche
+    filter_class = request.GET.get('class')
+    search = request.GET.get('search', '').strip()
+    class_subjects = ClassSubject.objects.filter(subject=subject).select_related('classroom', 'teacher__user')
+    if filter_class:
+        class_subjects = class_subjects.filter(classroom__id=filter_class)
+    if search:
+        class_subjects = class_subjects.filter(
+            models.Q(classroom__name__icontains=search) |
+            models.Q(teacher__user__first_name__icontains=search) |
+            models.Q(teacher__user__last_name__icontains=search)
+        )
+
+    page_obj = KeysetPaginator(class_subjects, ('classroom__name',), per_page=10).get_page(request.GET.get('cursor'))
+
+    return render(request, 'Bull/subject_detail.html', {
+        'subject': subject,
+        'class_subjects': page_obj,
+        'classrooms': classrooms,
+        'teachers': teachers,
+        'filter_class': filter_class,
+        'search': search,
+        'page_obj': page_obj
+    })
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def subject_card_list_view(request):
+    subjects = Subject.objects.all()
+    return render(request, 'Bull/subject_card_list.html', {'subjects': subjects})
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def subject_class_cards_view(request, subject_id):
+    subject = Subject.objects.get(id=subject_id)
+    classsubjects = list(ClassSubject.objects.filter(subject=subject).select_related('classroom', 'teacher__user'))
+    # debug flag via ?debug=1
+    debug = request.GET.get('debug') == '1'
+    # Effectifs de toutes les classes associées en une requête
+    demographics = classroom_demographics([cs.classroom_id for cs in classsubjects])
+    class_cards = []
+    for cs in classsubjects:
+        stats = demographics.get(cs.classroom_id, {})
+        card = {
+            'cs': cs,
+            'stats': {field: stats.get(field, 0) for field in DEMOGRAPHIC_FIELDS},
+        }
+        if debug:
+            card['debug'] = {
+                'classroom_id': cs.classroom_id,
+                'count_via_filter': card['stats']['total'],
+            }
+        class_cards.append(card)
+    return render(request, 'Bull/subject_class_cards.html', {
+        'subject': subject,
+        'class_cards': class_cards,
+        'debug': debug,
+    })
+
+
+# ----------------------------------------------------
+#    gestion des associations classe-matière
+# ----------------------------------------------------
+
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def classsubject_add_view(request, subject_id):
+    subject = Subject.objects.get(id=subject_id)
+    # Filtrer pour n'afficher que les classes non associées à ce sujet
+    associated_classroom_ids = ClassSubject.objects.filter(subject=subject).values_list('classroom_id', flat=True)
+    classrooms = Classroom.objects.exclude(id__in=associated_classroom_ids)
+    teachers = Teacher.objects.select_related('user').all()
+    if request.method == 'POST':
+        classroom_id = request.POST.get('classroom')
+        teacher_id = request.POST.get('teacher')
+        coefficient = request.POST.get('coefficient')
+        if classroom_id and coefficient:
+            classroom = Classroom.objects.get(id=classroom_id)
+            teacher = Teacher.objects.get(id=teacher_id) if teacher_id else None
+            if ClassSubject.objects.filter(classroom=classroom, subject=subject).exists():
+                return render(request, 'Bull/classsubject_add.html', {
+                    'subject': subject,
+                    'classrooms': classrooms,
+                    'teachers': teachers,
+                    'error': "Cette association existe déjà."
+                })
+            ClassSubject.objects.create(classroom=classroom, subject=subject, teacher=teacher, coefficient=coefficient)
+            return redirect('subject_detail', subject_id=subject_id)
+        else:
+            return render(request, 'Bull/classsubject_add.html', {
+                'subject': subject,
+                'classrooms': classrooms,
+                'teachers': teachers,
+                'error': "Veuillez remplir tous les champs."
+            })
+    return render(request, 'Bull/classsubject_add.html', {
+        'subject': subject,
+        'classrooms': classrooms,
+        'teachers': teachers
+    })
+    return redirect('subject_detail', subject_id=subject_id)
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def classsubject_edit_view(request, cs_id):
+    cs = ClassSubject.objects.get(id=cs_id)
+    teachers = Teacher.objects.select_related('user').all()
+    if request.method == 'POST':
+        coefficient = request.POST.get('coefficient')
+        teacher_id = request.POST.get('teacher')
+        if coefficient:
+            cs.coefficient = coefficient
+            cs.teacher = Teacher.objects.get(id=teacher_id) if teacher_id else None
+            cs.save()
+            messages.success(request, "Association modifiée.")
+        else:
+            messages.error(request, "Veuillez remplir tous les champs.")
+        return redirect('subject_detail', subject_id=cs.subject.id)
+    return redirect('subject_detail', subject_id=cs.subject.id)
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def classsubject_delete_view(request, cs_id):
+    cs = ClassSubject.objects.get(id=cs_id)
+    subject_id = cs.subject.id
+    if request.method == 'POST':
+        cs.delete()
+        messages.success(request, "Association supprimée.")
+        return redirect('subject_detail', subject_id=subject_id)
+    return redirect('subject_detail', subject_id=subject_id)
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def classsubject_detail_page(request, cs_id):
+    from Bull.models import ClassSubject
+    classsubject = ClassSubject.objects.select_related('subject', 'classroom', 'teacher').get(id=cs_id)
+    return render(request, 'Bull/classsubject_detail.html', {'classsubject': classsubject})
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def classsubject_edit_page(request, cs_id):
+    from Bull.models import ClassSubject, Teacher
+    classsubject = ClassSubject.objects.select_related('teacher').get(id=cs_id)
+    teachers = Teacher.objects.select_related('user').all()
+    if request.method == 'POST':
+        coefficient = request.POST.get('coefficient')
+        teacher_id = request.POST.get('teacher')
+        if coefficient:
+            classsubject.coefficient = coefficient
+            classsubject.teacher = Teacher.objects.get(id=teacher_id) if teacher_id else None
+            classsubject.save()
+            return redirect('classsubject_detail', cs_id=classsubject.id)
+    return render(request, 'Bull/classsubject_edit.html', {'classsubject': classsubject, 'teachers': teachers})
+
+@login_required
+@user_passes_test(is_admin_or_secretary)
+def classsubject_delete_page(request, cs_id):
+    from Bull.models import ClassSubject
+    classsubject = ClassSubject.objects.get(id=cs_id)
+    if request.method == 'POST':
+        subject_id = classsubject.subject.id
+        classsubject.delete()
+        return redirect('subject_detail', subject_id=subject_id)
+    return render(request, 'Bull/classsubject_delete.html', {'classsubject': classsubject})
+
+
+# Endpoint AJAX pour récupérer les matières liées à une classe
+
+@require_GET
+@versioned_cache(ClassSubject, Subject)
+def get_subjects_for_class(request):
+    classroom_id = request.GET.get('classroom_id')
+    if not classroom_id:
+        return JsonResponse({'subjects': []})
+    subjects = Subject.objects.filter(classsubject__classroom_id=classroom_id).distinct().values('id', 'name')
+    data = list(subjects)
+    return JsonResponse({'subjects': data})
+# Endpoint AJAX pour récupérer les classes liées à une matière
+
+@require_GET
+@versioned_cache(ClassSubject, Classroom)
+def get_classes_for_subject(request):
+    subject_id = request.GET.get('subject_id')
+    if not subject_id:
+        return JsonResponse({'classes': []})
+    classes = Classroom.objects.filter(class_subjects__subject_id=subject_id).distinct().values('id', 'name')
+    data = list(classes)
+    return JsonResponse({'classes': data})
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'Bull.middleware.RequestStatsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,6 +55,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'Bull.middleware.AcademicContextMiddleware',
 ]
 
 REST_FRAMEWORK = {
@@ -66,6 +68,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'Bull.pagination.IdCursorPagination',
+    'PAGE_SIZE': 50,
 }
 
 # Utilisation du CustomUser
@@ -92,6 +96,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'Bull.context_processors.academic',
             ],
         },
     },
@@ -146,6 +151,45 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'Bull', 'static'),
 ]
+# Build : python manage.py build_static (noms hachés, minification, .gz/.br)
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'Bull.storage.VersionedStaticStorage'},
+}
+
+# Cache applicatif (données de paramétrage, vue d'ensemble des classes).
+# Mémoire locale par défaut ; avec plusieurs processus, SMARTBULL_CACHE_DIR
+# active un cache fichier partagé pour que les invalidations soient vues de tous.
+if os.environ.get('SMARTBULL_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['SMARTBULL_CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'smartbull',
+        }
+    }
+
+# Mesures par requête (page Paramètres > Performances) : tampon des N dernières
+# requêtes par processus ; SMARTBULL_REQUEST_LOG ajoute un journal commun à
+# tous les workers, relu par la page. Sa rotation est externe (logrotate, avec
+# des sauvegardes nommées requests.log.1, .2...), jamais faite par les workers.
+REQUEST_STATS = True
+REQUEST_STATS_SIZE = 5000
+REQUEST_STATS_LOG = os.environ.get('SMARTBULL_REQUEST_LOG')
+
+# Profilage des générations de bulletins depuis les vues : 'spans' (résumé par
+# étape dans le journal Bull.profiling), 'cprofile' ou 'sample' (fichier de
+# profil en plus, dans BULLETIN_PROFILE_DIR, par défaut MEDIA_ROOT/profiles).
+BULLETIN_PROFILE = os.environ.get('SMARTBULL_BULLETIN_PROFILE')
+BULLETIN_PROFILE_DIR = os.environ.get('SMARTBULL_BULLETIN_PROFILE_DIR')
 
 # Media files (photos, documents...)
 MEDIA_URL = '/students/'
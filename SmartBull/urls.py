@@ -1,48 +1,37 @@
 
 from django.contrib import admin
-from django.urls import path, include
-# from rest_framework import routers
+from django.urls import path, re_path, include
+from rest_framework import routers
 # from rest_framework_simplejwt.views import (
 #     TokenObtainPairView,
 #     TokenRefreshView,
 # )
+from importlib import import_module
 from Bull import views
 # from Bull.views import RegisterView, StudentAnalysisView
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-from rest_framework import permissions
+# Documentation OpenAPI désactivée : drf_yasg / drf_spectacular ne sont plus importés
+# au chargement des URL (à réimporter avec les routes commentées plus bas).
 
+api_views = import_module('Bull.views-apis')
 
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
-
-# router = routers.DefaultRouter()
-# router.register(r'users', views.UserViewSet)
-# router.register(r'schoolyears', views.SchoolYearViewSet)
-# router.register(r'terms', views.TermViewSet)
-# router.register(r'sequences', views.SequenceViewSet)
-# router.register(r'classrooms', views.ClassroomViewSet)
-# router.register(r'teachers', views.TeacherViewSet)
-# router.register(r'students', views.StudentViewSet)
-# router.register(r'subjects', views.SubjectViewSet)
-# router.register(r'classsubjects', views.ClassSubjectViewSet)
-# router.register(r'grades', views.GradeViewSet)
-# router.register(r'disciplines', views.DisciplineViewSet)
-# router.register(r'mentionrules', views.MentionRuleViewSet)
-# router.register(r'settings', views.SettingsViewSet)
-# router.register(r'bulletins', views.BulletinViewSet)
-# router.register(r'archivedgrades', views.ArchivedGradeViewSet)
-# router.register(r'archivedbulletins', views.ArchivedBulletinViewSet)
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="SmartBull API",
-        default_version='v1',
-        description="API de gestion des bulletins scolaires Camerounais",
-        contact=openapi.Contact(email="support@smartbull.local"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+router = routers.DefaultRouter()
+router.register(r'users', api_views.UserViewSet)
+router.register(r'schoolyears', api_views.SchoolYearViewSet)
+router.register(r'terms', api_views.TermViewSet)
+router.register(r'sequences', api_views.SequenceViewSet)
+router.register(r'classrooms', api_views.ClassroomViewSet)
+router.register(r'teachers', api_views.TeacherViewSet)
+router.register(r'students', api_views.StudentViewSet)
+router.register(r'subjects', api_views.SubjectViewSet)
+router.register(r'classsubjects', api_views.ClassSubjectViewSet)
+router.register(r'grades', api_views.GradeViewSet)
+router.register(r'disciplines', api_views.DisciplineViewSet)
+router.register(r'mentionrules', api_views.MentionRuleViewSet)
+router.register(r'settings', api_views.SettingsViewSet)
+router.register(r'bulletins', api_views.BulletinViewSet)
+router.register(r'archivedgrades', api_views.ArchivedGradeViewSet)
+router.register(r'archivedbulletins', api_views.ArchivedBulletinViewSet)
+router.register(r'archiveddisciplines', api_views.ArchivedDisciplineViewSet)
 
 urlpatterns = [
     path('parameters/sanctions-table/', views.sanctions_table, name='sanctions_table'),
@@ -70,6 +59,7 @@ urlpatterns = [
     path('parameters/edit-schoolyear/<int:sy_id>/', views.edit_schoolyear, name='edit_schoolyear'),
     path('parameters/delete-schoolyear/<int:sy_id>/', views.delete_schoolyear, name='delete_schoolyear'),
     path('parameters/', views.parameters_view, name='parameters'),
+    path('parameters/performance/', views.request_stats_view, name='request_stats'),
     path('parameters/edit-html-canvas/', views.edit_html_canvas, name='edit_html_canvas'),
     path('parameters/add-sanction/', views.add_sanction, name='add_sanction'),
     path('parameters/edit-sanction/', views.edit_sanction, name='edit_sanction'),
@@ -86,12 +76,15 @@ urlpatterns = [
     path('admin/', admin.site.urls),
 
     path('', views.home, name='home'),
+    path('service-worker.js', views.service_worker, name='service_worker'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('profile/', views.profile_view, name='profile'),
     path('dashboard/', views.dashboard_view, name='dashboard'),
     path('students/', views.students_view, name='students'),
+    path('students/autocomplete/', views.students_autocomplete, name='students_autocomplete'),
     path('students/<int:student_id>/', views.student_detail_view, name='student_detail'),
+    path('discipline/', views.discipline_entry_view, name='discipline_entry'),
     path('students/<int:student_id>/edit/', views.student_edit_view, name='student_edit'),
     path('users/', views.users_view, name='users'),
     path('classes/', views.classes_view, name='classes'),
@@ -119,8 +112,11 @@ urlpatterns = [
     path('bulletins/<int:student_id>/<int:sequence_id>/pdf/', views.download_bulletin_pdf, name='download_bulletin_pdf'),
     path('bulletins/generate/trimester/', views.generate_bulletins_trimester, name='generate_bulletins_trimester'),
     path('bulletins/generate/annual/', views.generate_bulletins_annual, name='generate_bulletins_annual'),
+    path('bulletins/consolidated/', views.consolidated_bulletins, name='consolidated_bulletins'),
 
-    # # path('api/', include(router.urls)),
+    path('api/readiness/', api_views.ReadinessView.as_view(), name='api_readiness'),
+    path('api/grade-sheet/', api_views.GradeSheetView.as_view(), name='api_grade_sheet'),
+    path('api/', include(router.urls)),
     # path('api/auth/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     # path('api/auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     # # path('api/auth/register/', RegisterView.as_view(), name='auth_register'),
@@ -134,3 +130,6 @@ urlpatterns = [
 from django.conf import settings
 from django.conf.urls.static import static
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Build statique (collectstatic) servi avec cache long quand aucun serveur web ne s'en charge ;
+# en développement, runserver sert /static/ depuis les sources avant d'atteindre cette route
+urlpatterns += [re_path(r'^static/(?P<path>.+)$', views.static_asset, name='static_asset')]